@@ -0,0 +1 @@
+"""End-to-end benchmarks of the PDF2AAS toolchain against a mock LLM server."""
@@ -0,0 +1,157 @@
+"""Local OpenAI compatible chat completions server with configurable latency."""
+
+import json
+import logging
+import re
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4
+_VALUE_UNIT = re.compile(r"(?P<value>.*?\d)\s+(?P<unit>\S*[^\d\s]\S*)$")
+
+
+class MockLLMServer(ThreadingHTTPServer):
+    """Answer chat completions like a perfect model for synthetic datasheets.
+
+    The values are taken from the "<label>: <value> <unit>" lines of the
+    prompt, where the label matches the `label_pattern` ignoring case. If the
+    prompt contains labels in the exact case of the pattern, e.g. in the
+    property table of a PropertyLLMSearch prompt, only these are answered, with
+    null values if they are not in the datasheet. Otherwise all labels with a
+    value are answered, like for a PropertyLLM extracting all properties.
+
+    The response is delayed by `latency` seconds plus `latency_per_token`
+    seconds per completion token, to simulate the time to first token and the
+    generation speed of a real model. The token usage is estimated from the
+    number of characters.
+
+    Attributes:
+        label_pattern (re.Pattern): Pattern to find the requested labels.
+        latency (float): Fixed delay of every response in seconds.
+        latency_per_token (float): Additional delay per completion token.
+        requests (int): Number of answered chat completions.
+
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        label_pattern: str,
+        *,
+        latency: float = 0.0,
+        latency_per_token: float = 0.0,
+        port: int = 0,
+    ) -> None:
+        """Bind the server to localhost. Use port 0 to pick a free port."""
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.label_pattern = re.compile(label_pattern)
+        self._value_line = re.compile(
+            rf"(?P<label>{label_pattern}):[ \t]*(?P<value>[^\n<]*[^\s<])",
+            re.IGNORECASE,
+        )
+        self.latency = latency
+        self.latency_per_token = latency_per_token
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        """Get the URL to be used as `base_url` of an OpenAI client."""
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+    def start(self) -> "MockLLMServer":
+        """Serve the requests in a daemon thread."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and close the socket."""
+        self.shutdown()
+        self.server_close()
+
+    def respond(self, messages: list[dict[str, Any]]) -> str:
+        """Get the answer content for the messages of a chat completion request."""
+        prompt = "\n".join(
+            str(message.get("content", "")) for message in messages if message["role"] == "user"
+        )
+        lines = {match.group("label").lower(): match for match in self._value_line.finditer(prompt)}
+        requested = dict.fromkeys(self.label_pattern.findall(prompt)) or lines
+        return json.dumps([self._answer(label, lines.get(label)) for label in requested])
+
+    @staticmethod
+    def _answer(label: str, line: re.Match | None) -> dict[str, Any]:
+        if line is None:
+            return {"property": label, "value": None, "unit": None, "reference": None}
+        value = _VALUE_UNIT.match(line.group("value"))
+        return {
+            "property": label,
+            "value": line.group("value") if value is None else value.group("value"),
+            "unit": None if value is None else value.group("unit"),
+            "reference": line.group(0),
+        }
+
+    def complete(self, request: dict[str, Any]) -> dict[str, Any]:
+        """Create the chat completion for the request, after the simulated latency."""
+        messages = request.get("messages", [])
+        content = self.respond(messages)
+        prompt_tokens = sum(len(str(message.get("content", ""))) for message in messages)
+        prompt_tokens //= CHARS_PER_TOKEN
+        completion_tokens = len(content) // CHARS_PER_TOKEN
+        time.sleep(self.latency + self.latency_per_token * completion_tokens)
+        with self._lock:
+            self.requests += 1
+            number = self.requests
+        return {
+            "id": f"chatcmpl-mock-{number}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "mock"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                },
+            ],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: MockLLMServer
+
+    def do_POST(self) -> None:
+        if self.path.rstrip("/") != "/v1/chat/completions":
+            self._send_json({"error": {"message": "not found"}}, HTTPStatus.NOT_FOUND)
+            return
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        if request.get("stream"):
+            self._send_json(
+                {"error": {"message": "streaming is not supported"}},
+                HTTPStatus.BAD_REQUEST,
+            )
+            return
+        self._send_json(self.server.complete(request))
+
+    def _send_json(self, data: dict, status: HTTPStatus = HTTPStatus.OK) -> None:
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        logger.debug(format, *args)
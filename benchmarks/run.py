@@ -0,0 +1,384 @@
+"""Run PDF2AAS.convert end to end on synthetic datasheets against the mock LLM server.
+
+Example:
+    python -m benchmarks.run --pages 1 10 --class-sizes 10 100 --latency 0.05
+
+For every combination of preprocessor, extractor, datasheet size (pages) and
+class size (number of property definitions), `--documents` datasheets are
+converted one after another. The throughput, the p50 and p99 latency of the
+conversions, the peak memory of one conversion traced by tracemalloc, the
+tokens and requests per datasheet and the recall of the mentioned values are
+reported. Use `--output` to store the results as JSON and `--baseline` to
+compare them against a previous run, which exits with code 1 on regressions.
+
+"""
+
+import argparse
+import itertools
+import json
+import logging
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+from openai import OpenAI
+from tabulate import tabulate
+
+from pdf2aas import PDF2AAS
+from pdf2aas.extractor import (
+    Extractor,
+    PropertyCascade,
+    PropertyLLMSearch,
+    PropertyRegex,
+)
+from pdf2aas.extractor.property_llm_map import PropertyLLMMap
+from pdf2aas.generator import AASSubmodelTechnicalData
+from pdf2aas.metrics import MetricsSink
+from pdf2aas.preprocessor import PDF2HTMLEX, PDFium, PDFPlumber, Preprocessor, Text
+
+from .mock_llm_server import MockLLMServer
+from .synthetic import LABEL_PATTERN, SyntheticDictionary, make_datasheet, make_definitions
+
+logger = logging.getLogger(__name__)
+
+PREPROCESSORS: dict[str, tuple[str, Callable[[str], Preprocessor]]] = {
+    "text": (".txt", lambda _: Text()),
+    "pdfium": (".pdf", lambda _: PDFium()),
+    "pdfplumber": (".pdf", lambda _: PDFPlumber()),
+    "pdf2htmlex": (".pdf", lambda temp_dir: PDF2HTMLEX(temp_dir=temp_dir)),
+}
+"""File suffix and factory getting a temporary directory per preprocessor."""
+
+
+def _client(base_url: str) -> OpenAI:
+    return OpenAI(base_url=base_url, api_key="mock", max_retries=0)
+
+
+EXTRACTORS: dict[str, Callable[[str], Extractor]] = {
+    "search": lambda url: PropertyLLMSearch("mock-small", client=_client(url)),
+    "map": lambda url: PropertyLLMMap("mock-small", client=_client(url)),
+    "regex": lambda url: PropertyRegex(
+        fallback=PropertyLLMSearch("mock-small", client=_client(url)),
+    ),
+    "cascade": lambda url: PropertyCascade(
+        PropertyLLMSearch("mock-small", client=_client(url)),
+        PropertyLLMSearch("mock-large", client=_client(url)),
+    ),
+}
+"""Extractor factories getting the base URL of the mock LLM server."""
+
+HIGHER_IS_BETTER = ("throughput", "recall")
+LOWER_IS_BETTER = (
+    "p50_seconds",
+    "p99_seconds",
+    "peak_memory_mib",
+    "prompt_tokens",
+    "completion_tokens",
+    "requests",
+)
+
+
+@dataclass
+class BenchmarkResult:
+    """Measurements of one benchmark case, all per datasheet except the throughput.
+
+    Attributes:
+        preprocessor (str): Name of the preprocessor, c.f. `PREPROCESSORS`.
+        extractor (str): Name of the extractor, c.f. `EXTRACTORS`.
+        pages (int): Number of pages per datasheet.
+        class_size (int): Number of property definitions of the class.
+        documents (int): Number of converted datasheets.
+        throughput (float): Converted datasheets per second.
+        p50_seconds (float): Median conversion time.
+        p99_seconds (float): 99th percentile of the conversion time.
+        peak_memory_mib (float): Peak of the python memory allocations during
+            one conversion.
+        prompt_tokens (float): Prompt tokens reported by the mock server.
+        completion_tokens (float): Completion tokens reported by the mock server.
+        requests (float): LLM requests.
+        recall (float): Share of the values mentioned in the datasheets, which
+            were extracted for the right definition.
+
+    """
+
+    preprocessor: str
+    extractor: str
+    pages: int
+    class_size: int
+    documents: int
+    throughput: float
+    p50_seconds: float
+    p99_seconds: float
+    peak_memory_mib: float
+    prompt_tokens: float
+    completion_tokens: float
+    requests: float
+    recall: float
+
+    @property
+    def key(self) -> tuple[str, str, int, int]:
+        """Identify the benchmark case across runs."""
+        return (self.preprocessor, self.extractor, self.pages, self.class_size)
+
+
+class CountingSink(MetricsSink):
+    """Sum the counters and count the LLM request spans."""
+
+    def __init__(self) -> None:
+        """Initialize all counts with zero."""
+        self.counts: dict[str, float] = {}
+
+    def record_span(self, name: str, seconds: float, attributes: dict[str, Any]) -> None:  # noqa: ARG002
+        """Count the LLM requests."""
+        if name == "llm_request":
+            self.counts["requests"] = self.counts.get("requests", 0) + 1
+
+    def record_count(self, name: str, value: float, attributes: dict[str, Any]) -> None:  # noqa: ARG002
+        """Add the value to the sum of the counter."""
+        self.counts[name] = self.counts.get(name, 0) + value
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Get the q-th percentile (0 to 100) with linear interpolation."""
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def run_case(
+    server: MockLLMServer,
+    workdir: Path,
+    case: tuple[str, str, int, int],
+    *,
+    documents: int,
+    batch_size: int,
+    max_workers: int,
+) -> BenchmarkResult:
+    """Convert the synthetic datasheets of one case and measure the conversions."""
+    preprocessor_name, extractor_name, pages, class_size = case
+    suffix, preprocessor = PREPROCESSORS[preprocessor_name]
+    case_dir = workdir / "-".join(str(part) for part in case)
+    case_dir.mkdir(parents=True)
+
+    class_id = f"bench-{class_size}"
+    dictionary = SyntheticDictionary(str(workdir / "dict"))
+    dictionary.add_class(class_id, make_definitions(class_size, seed=class_size))
+    definitions = dictionary.get_class_properties(class_id)
+    datasheets = []
+    for idx in range(documents):
+        datasheet = make_datasheet(definitions, pages, seed=idx)
+        filepath = str(case_dir / f"datasheet-{idx}{suffix}")
+        if suffix == ".pdf":
+            datasheet.write_pdf(filepath)
+        else:
+            datasheet.write_text(filepath)
+        datasheets.append((filepath, datasheet.values))
+
+    sink = CountingSink()
+    pdf2aas = PDF2AAS(
+        preprocessor(str(case_dir / "temp")),
+        dictionary,
+        EXTRACTORS[extractor_name](server.base_url),
+        AASSubmodelTechnicalData(),
+        batch_size,
+        max_workers=max_workers,
+    )
+    # warm up connections, caches and lazy imports
+    pdf2aas.convert(datasheets[0][0], class_id, str(case_dir / "submodel-warm-up.json"))
+    pdf2aas.extractor.set_metrics(sink)
+
+    latencies = []
+    found = 0
+    start = time.perf_counter()
+    for idx, (filepath, values) in enumerate(datasheets):
+        convert_start = time.perf_counter()
+        properties = pdf2aas.convert(filepath, class_id, str(case_dir / f"submodel-{idx}.json"))
+        latencies.append(time.perf_counter() - convert_start)
+        found += sum(
+            property_.value is not None
+            and property_.definition is not None
+            and property_.definition.name["en"] in values
+            for property_ in properties
+        )
+    total = time.perf_counter() - start
+
+    pdf2aas.extractor.set_metrics(None)
+    tracemalloc.start()
+    pdf2aas.convert(datasheets[0][0], class_id, str(case_dir / "submodel-memory.json"))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    mentioned = sum(len(values) for _, values in datasheets)
+    return BenchmarkResult(
+        preprocessor_name,
+        extractor_name,
+        pages,
+        class_size,
+        documents,
+        throughput=documents / total,
+        p50_seconds=percentile(latencies, 50),
+        p99_seconds=percentile(latencies, 99),
+        peak_memory_mib=peak / 1024**2,
+        prompt_tokens=sink.counts.get("llm_prompt_tokens", 0) / documents,
+        completion_tokens=sink.counts.get("llm_completion_tokens", 0) / documents,
+        requests=sink.counts.get("requests", 0) / documents,
+        recall=found / mentioned if mentioned else 1.0,
+    )
+
+
+def compare(
+    results: list[BenchmarkResult],
+    baseline: list[BenchmarkResult],
+    tolerance: float,
+) -> list[str]:
+    """Get a message for every measurement that is worse than the baseline by the tolerance."""
+    previous = {result.key: result for result in baseline}
+    regressions = []
+    for result in results:
+        old = previous.get(result.key)
+        if old is None:
+            continue
+        regressions.extend(
+            f"{result.key} {name}: {getattr(old, name):.4g} -> {getattr(result, name):.4g}"
+            for name in (*HIGHER_IS_BETTER, *LOWER_IS_BETTER)
+            if (
+                getattr(result, name) < getattr(old, name) * (1 - tolerance)
+                if name in HIGHER_IS_BETTER
+                else getattr(result, name) > getattr(old, name) * (1 + tolerance)
+            )
+        )
+    return regressions
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--pages",
+        type=int,
+        nargs="+",
+        default=[1, 10, 50],
+        help="Pages per datasheet.",
+    )
+    parser.add_argument(
+        "--class-sizes",
+        type=int,
+        nargs="+",
+        default=[10, 50, 200],
+        help="Property definitions per class.",
+    )
+    parser.add_argument("--documents", type=int, default=5, help="Datasheets per case.")
+    parser.add_argument(
+        "--preprocessors",
+        nargs="+",
+        choices=PREPROCESSORS,
+        default=["text", "pdfium"],
+    )
+    parser.add_argument(
+        "--extractors",
+        nargs="+",
+        choices=EXTRACTORS,
+        default=list(EXTRACTORS),
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=0,
+        help="Properties per LLM request, 0 for all.",
+    )
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=1,
+        help="Concurrent batches per datasheet.",
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.05,
+        help="Mock LLM delay per request in seconds.",
+    )
+    parser.add_argument(
+        "--latency-per-token",
+        type=float,
+        default=0.0,
+        help="Mock LLM delay per completion token in seconds.",
+    )
+    parser.add_argument("--output", type=str, help="JSON file to store the results.")
+    parser.add_argument("--baseline", type=str, help="JSON file of a previous run.")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="Relative change reported as regression.",
+    )
+    parser.add_argument("--debug", action="store_true", help="Print debug information.")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the benchmark cases and return the exit code."""
+    args = _parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.debug else logging.WARNING)
+    logger.setLevel(logging.DEBUG if args.debug else logging.INFO)
+    preprocessors = args.preprocessors
+    if "pdf2htmlex" in preprocessors and shutil.which("pdf2htmlEX") is None:
+        logger.warning("Skipping pdf2htmlex, the pdf2htmlEX executable was not found.")
+        preprocessors = [name for name in preprocessors if name != "pdf2htmlex"]
+
+    server = MockLLMServer(
+        LABEL_PATTERN,
+        latency=args.latency,
+        latency_per_token=args.latency_per_token,
+    ).start()
+    results = []
+    try:
+        with tempfile.TemporaryDirectory(prefix="pdf2aas-bench-") as workdir:
+            for case in itertools.product(
+                preprocessors,
+                args.extractors,
+                args.pages,
+                args.class_sizes,
+            ):
+                result = run_case(
+                    server,
+                    Path(workdir),
+                    case,
+                    documents=args.documents,
+                    batch_size=args.batch_size,
+                    max_workers=args.max_workers,
+                )
+                results.append(result)
+                logger.info("%s: %.2f datasheets/s", result.key, result.throughput)
+    finally:
+        server.stop()
+
+    table = tabulate([asdict(result) for result in results], headers="keys", floatfmt=".4g")
+    print(table)  # noqa: T201
+    if args.output:
+        Path(args.output).write_text(
+            json.dumps([asdict(result) for result in results], indent=2),
+            encoding="utf-8",
+        )
+    if args.baseline:
+        baseline = [
+            BenchmarkResult(**result)
+            for result in json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        ]
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"Regression {regression}")  # noqa: T201
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,220 @@
+"""Synthetic dictionaries and datasheets of configurable size."""
+
+import random
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, ClassVar
+
+from pdf2aas.dictionary import DefinitionMapping, Dictionary
+from pdf2aas.model import ClassDefinition, PropertyDefinition, SimplePropertyDataType
+
+ADJECTIVES = (
+    "rated",
+    "nominal",
+    "maximum",
+    "minimum",
+    "ambient",
+    "operating",
+    "storage",
+    "supply",
+    "output",
+    "input",
+    "peak",
+    "continuous",
+    "switching",
+    "holding",
+)
+NOUNS = (
+    "voltage",
+    "current",
+    "power",
+    "temperature",
+    "frequency",
+    "torque",
+    "speed",
+    "pressure",
+    "weight",
+    "length",
+    "width",
+    "height",
+    "diameter",
+    "capacity",
+)
+UNITS = ("V", "A", "W", "°C", "Hz", "Nm", "1/min", "bar", "kg", "mm")
+TYPES: tuple[SimplePropertyDataType, ...] = ("numeric", "range", "string", "bool", "string")
+VALUES = ("aluminium", "steel", "plastic", "brass", "copper", "ceramic")
+FILLER_TEXT = (
+    "The device is designed for industrial applications and complies with the "
+    "relevant standards. Installation and commissioning must only be carried out "
+    "by qualified personnel. Observe the safety instructions in the manual. "
+    "Dimensions and technical data are subject to change without notice."
+)
+FILLER = FILLER_TEXT.split()
+
+LABEL_PATTERN = r"\b[a-z]+ [a-z]+ \d{4}\b"
+"""Regular expression matching the labels of :func:`make_definitions`."""
+
+
+def make_definitions(count: int, seed: int = 0) -> list[PropertyDefinition]:
+    """Create property definitions with unique labels like "rated voltage 0007".
+
+    The types cycle through numeric, range, string with values, bool and free
+    string, so that all extractor code paths are exercised.
+    """
+    rng = random.Random(seed)  # noqa: S311
+    definitions = []
+    for idx in range(count):
+        label = f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {idx:04d}"
+        kind = idx % len(TYPES)
+        definitions.append(
+            PropertyDefinition(
+                id=f"BENCH-{idx:04d}",
+                name={"en": label},
+                type=TYPES[kind],
+                definition={"en": f"Synthetic {label} of the benchmark device."},
+                unit=rng.choice(UNITS) if TYPES[kind] in ("numeric", "range") else "",
+                values=list(VALUES) if kind == TYPES.index("string") else [],
+            ),
+        )
+    return definitions
+
+
+class SyntheticDictionary(Dictionary):
+    """In-memory dictionary, whose classes are added via :meth:`add_class`."""
+
+    releases: ClassVar[dict[str, DefinitionMapping[ClassDefinition]]] = {}
+    properties: ClassVar[DefinitionMapping[PropertyDefinition]] = DefinitionMapping("properties")
+    supported_releases: ClassVar[list[str]] = ["bench"]
+
+    def __init__(self, temp_dir: str) -> None:
+        """Initialize the dictionary without classes, ignoring stores in the `temp_dir`."""
+        super().__init__("bench", temp_dir)
+
+    def add_class(self, class_id: str, definitions: list[PropertyDefinition]) -> None:
+        """Add a class with the given definitions."""
+        for definition in definitions:
+            self.properties[definition.id] = definition
+        self.classes[class_id] = ClassDefinition(class_id, class_id, properties=definitions)
+
+    def get_class_url(self, class_id: str) -> str | None:  # noqa: ARG002
+        """Synthetic classes have no URL."""
+        return None
+
+    def get_property_url(self, property_id: str) -> str | None:  # noqa: ARG002
+        """Synthetic properties have no URL."""
+        return None
+
+
+@dataclass
+class Datasheet:
+    """Pages of a synthetic datasheet and the values mentioned in it.
+
+    Attributes:
+        pages (list[str]): The text of each page.
+        values (dict[str, Any]): The mentioned values by property label.
+
+    """
+
+    pages: list[str]
+    values: dict[str, Any] = field(default_factory=dict)
+
+    def write_text(self, filepath: str) -> str:
+        """Write the pages separated by form feeds into a text file."""
+        Path(filepath).write_text("\f".join(self.pages), encoding="utf-8")
+        return filepath
+
+    def write_pdf(self, filepath: str) -> str:
+        """Write the pages into a minimal PDF file with one text line per datasheet line."""
+        Path(filepath).write_bytes(_pdf(self.pages))
+        return filepath
+
+
+def make_datasheet(
+    definitions: list[PropertyDefinition],
+    pages: int,
+    *,
+    coverage: float = 0.8,
+    lines_per_page: int = 50,
+    seed: int = 0,
+) -> Datasheet:
+    """Create a datasheet mentioning a `coverage` share of the definitions with a value.
+
+    The property lines are spread over the pages and the remaining lines are
+    filled with filler text, so that the size grows with the number of pages.
+    """
+    rng = random.Random(seed)  # noqa: S311
+    mentioned = rng.sample(definitions, round(len(definitions) * coverage))
+    property_lines: list[list[str]] = [[] for _ in range(pages)]
+    values = {}
+    for definition in mentioned:
+        label = definition.name["en"]
+        value = _value(definition, rng)
+        unit = definition.unit or None
+        line = f"{label.capitalize()}: {value if unit is None else f'{value} {unit}'}"
+        property_lines[rng.randrange(pages)].append(line)
+        values[label] = value
+    texts = []
+    for number, lines in enumerate(property_lines, start=1):
+        filler = [
+            " ".join(rng.choices(FILLER, k=rng.randint(8, 14))).capitalize() + "."
+            for _ in range(max(lines_per_page - len(lines) - 1, 0))
+        ]
+        page = [*lines, *filler]
+        rng.shuffle(page)
+        texts.append("\n".join([f"Datasheet page {number}", *page]))
+    return Datasheet(texts, values)
+
+
+def _value(definition: PropertyDefinition, rng: random.Random) -> Any:
+    if definition.type == "numeric":
+        return rng.randint(1, 1000)
+    if definition.type == "range":
+        low = rng.randint(-40, 100)
+        return f"{low} ... {low + rng.randint(10, 200)}"
+    if definition.type == "bool":
+        return rng.choice(("yes", "no"))
+    if len(definition.values) > 0:
+        return rng.choice(definition.values_list)
+    return f"X-{rng.randint(1000, 9999)}"
+
+
+def _pdf(pages: list[str]) -> bytes:
+    """Create a PDF with Helvetica text in WinAnsi encoding, one page per text."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"",  # pages, filled below
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    ]
+    kids = []
+    for text in pages:
+        lines = [
+            b"("
+            + line.encode("cp1252", "replace")
+            .replace(b"\\", b"\\\\")
+            .replace(b"(", b"\\(")
+            .replace(b")", b"\\)")
+            + b") Tj T*"
+            for line in text.splitlines()
+        ]
+        stream = b"BT /F1 9 Tf 11 TL 40 800 Td\n" + b"\n".join(lines) + b"\nET"
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (len(objects)),
+        )
+        kids.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), len(kids))
+
+    pdf = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, content in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n%s\nendobj\n" % (number, content)
+    xref = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    pdf += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1,
+        xref,
+    )
+    return bytes(pdf)
@@ -9,8 +9,8 @@ logger = logging.getLogger(__name__)
 # Load the .env file with openai API Key
 load_dotenv()
 
-def main(datasheet, eclass_class_id, batch_size, output_path):
-    PDF2AAS(batch_size=batch_size).convert(datasheet, eclass_class_id, output_path)
+def main(datasheet, eclass_class_id, batch_size, max_workers, output_path):
+    PDF2AAS(batch_size=batch_size, max_workers=max_workers).convert(datasheet, eclass_class_id, output_path)
 
 if __name__ == "__main__":
     import argparse
@@ -18,6 +18,7 @@ if __name__ == "__main__":
     parser.add_argument('eclass', type=str, help="ECLASS class id in number format, e.g. 27274001.")
     parser.add_argument('datasheet', type=str, help="File path to PDF datasheet or text file.")
     parser.add_argument('--batch_size', type=int, help="How many properties should be extracted per LLM request. All in one prompt = 0. One request per Property < 0.", default=0)
+    parser.add_argument('--max_workers', type=int, help="How many batches should be extracted concurrently.", default=1)
     parser.add_argument('--output', type=str, help="Filepath for the technical data submodel json file that is produced.", default='technical-data-submodel.json')
     parser.add_argument('--debug', action="store_true", help="Print debug information.")
     args = parser.parse_args()
@@ -28,4 +29,4 @@ if __name__ == "__main__":
         logging.basicConfig(level=logging.INFO, format="%(levelname)s - %(message)s")
     logger = logging.getLogger()
     
-    main(args.datasheet, args.eclass, args.batch_size, args.output)
+    main(args.datasheet, args.eclass, args.batch_size, args.max_workers, args.output)
@@ -464,13 +464,17 @@ def extract(
             gr.Info("Extracting all properties without definitions to search for.")
         else:
             gr.Info(f"Searching for {len(definitions)} property definitions at once.")
-        properties = extractor.extract(
+        properties = []
+        yield None, properties_to_dataframe([]), None, None, gr.update(interactive=True)
+        for property_ in extractor.extract_stream(
             datasheet,
             definitions,
             raw_prompts=raw_prompts,
             prompt_hint=prompt_hint,
             raw_results=raw_results
-        )
+        ):
+            properties.append(property_)
+            yield properties, properties_to_dataframe(properties, aas_template), raw_prompts, raw_results, gr.update()
     else:
         properties = []
         yield None, properties_to_dataframe([]), None, None, gr.update(interactive=True)
@@ -1,5 +1,5 @@
 """Module containing the default toolchain for the PDF to AAS conversion."""
 
-from .core import PDF2AAS
+from .core import PDF2AAS, BatchConversion, ConversionResult
 
-__all__ = ["PDF2AAS"]
+__all__ = ["PDF2AAS", "BatchConversion", "ConversionResult"]
@@ -0,0 +1,198 @@
+"""Caches to reuse results of expensive toolchain steps, e.g. LLM responses."""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+def hash_key(*parts: Any) -> str:
+    """Create a SHA-256 hex digest as cache key from JSON serializable parts.
+
+    Dictionary keys are sorted, so that the key does not depend on their order.
+    """
+    return hashlib.sha256(
+        json.dumps(parts, sort_keys=True, default=str).encode("utf-8"),
+    ).hexdigest()
+
+
+class Cache(ABC):
+    """Abstract key value store with JSON serializable values."""
+
+    @abstractmethod
+    def get(self, key: str) -> Any | None:
+        """Get the value stored for the key or None if it is not cached (anymore)."""
+
+    @abstractmethod
+    def set(self, key: str, value: Any) -> None:
+        """Store the value for the key, possibly evicting other entries."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Remove all entries from the cache."""
+
+
+class MemoryCache(Cache):
+    """Least recently used (LRU) cache in memory.
+
+    Attributes:
+        max_entries (int): Maximum number of entries. The least recently used
+            entries are evicted first. Defaults to 1024.
+        max_age (float | None): Maximum age of an entry in seconds. None
+            (default) means no limit.
+
+    """
+
+    def __init__(self, max_entries: int = 1024, max_age: float | None = None) -> None:
+        """Initialize an empty memory cache."""
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any | None:
+        """Get the value for the key and mark it as recently used."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            created, value = entry
+            if self.max_age is not None and time.time() - created > self.max_age:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        """Store the value and evict the least recently used entries if needed."""
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all entries from the cache."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        """Get the number of cached entries."""
+        return len(self._entries)
+
+
+class SQLiteCache(Cache):
+    """Persistent cache in a SQLite database file.
+
+    Values are stored as JSON. The least recently used entries are evicted
+    first, if one of the limits is exceeded. Can be shared by multiple
+    threads and processes.
+
+    Attributes:
+        path (str): Path to the SQLite database file.
+        max_entries (int | None): Maximum number of entries. None means no limit.
+        max_size (int | None): Maximum size of all JSON encoded values in
+            bytes. None means no limit.
+        max_age (float | None): Maximum age of an entry in seconds. None
+            (default) means no limit.
+
+    """
+
+    def __init__(
+        self,
+        path: str = "temp/cache.sqlite",
+        max_entries: int | None = None,
+        max_size: int | None = 1024**3,
+        max_age: float | None = None,
+    ) -> None:
+        """Open or create the SQLite cache. Defaults to 1 GiB size limit."""
+        self.path = path
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self.max_age = max_age
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value TEXT, size INTEGER, created REAL, accessed REAL)",
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)",
+            )
+
+    def get(self, key: str) -> Any | None:
+        """Get the value for the key and mark it as recently used."""
+        now = time.time()
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                "SELECT value, created FROM cache WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            if self.max_age is not None and now - row[1] > self.max_age:
+                self._connection.execute("DELETE FROM cache WHERE key = ?", (key,))
+                return None
+            self._connection.execute("UPDATE cache SET accessed = ? WHERE key = ?", (now, key))
+        try:
+            return json.loads(row[0])
+        except json.JSONDecodeError:
+            logger.warning("Couldn't decode cached value for key %s.", key)
+            return None
+
+    def set(self, key: str, value: Any) -> None:
+        """Store the value as JSON and evict entries exceeding the limits."""
+        try:
+            value_json = json.dumps(value)
+        except TypeError:
+            logger.warning("Value for key %s is not JSON serializable and not cached.", key)
+            return
+        now = time.time()
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?)",
+                (key, value_json, len(value_json), now, now),
+            )
+            self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        if self.max_age is not None:
+            self._connection.execute("DELETE FROM cache WHERE created < ?", (now - self.max_age,))
+        if self.max_entries is not None:
+            self._connection.execute(
+                "DELETE FROM cache WHERE key IN "
+                "(SELECT key FROM cache ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+        if self.max_size is not None:
+            # Keep the most recently used entries, whose cumulative size fits
+            self._connection.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM "
+                "(SELECT key, SUM(size) OVER (ORDER BY accessed DESC, key) AS total FROM cache) "
+                "WHERE total > ?)",
+                (self.max_size,),
+            )
+
+    def clear(self) -> None:
+        """Remove all entries from the cache."""
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM cache")
+
+    def __len__(self) -> int:
+        """Get the number of cached entries."""
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._connection.close()
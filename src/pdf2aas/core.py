@@ -1,16 +1,126 @@
 """Core class with default toolchain for the PDF to AAS conversion."""
 
+import asyncio
+import copy
+import hashlib
 import logging
+from collections.abc import Iterator
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from itertools import chain
+from pathlib import Path
+from typing import Any, Literal
 
+from .cache import Cache, hash_key
 from .dictionary import ECLASS, Dictionary
-from .extractor import Extractor, PropertyLLMSearch
+from .extractor import Extractor, PropertyLLM, PropertyLLMSearch
+from .extractor.tokens import (
+    MESSAGE_OVERHEAD_TOKENS,
+    OUTPUT_TOKENS_PER_PROPERTY,
+    estimate_tokens,
+)
 from .generator import AASSubmodelTechnicalData, AASTemplate, Generator
+from .metrics import MetricsSink, span
 from .model import Property, PropertyDefinition
 from .preprocessor import PDFium, Preprocessor, Text
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class ConversionResult:
+    """Result of a single document converted via :meth:`PDF2AAS.convert_many`.
+
+    Attributes:
+        filepath (str): The file path of the converted document.
+        classification (str | None): The classification used for the document.
+        output_filepath (str | None): The file path of the generated output, if
+            an output directory was given and the conversion succeeded.
+        properties (list[Property]): The extracted properties.
+        error (Exception | None): The error that stopped the conversion of the
+            document, None if the conversion succeeded.
+
+    """
+
+    filepath: str
+    classification: str | None = None
+    output_filepath: str | None = None
+    properties: list[Property] = field(default_factory=list)
+    error: Exception | None = None
+
+
+@dataclass
+class BatchConversion:
+    """Documents submitted via :meth:`PDF2AAS.submit_batch`.
+
+    Attributes:
+        batch_id (str): The id of the batch at the OpenAI Batch API.
+        results (list[ConversionResult]): One result per document. Filled by
+            :meth:`PDF2AAS.collect_batch`.
+        requests (dict[str, tuple[int, list[str] | str]]): Index of the
+            document and ids of the definitions per custom id of the batch
+            requests. A single id marks a request for a single definition.
+
+    """
+
+    batch_id: str
+    results: list[ConversionResult]
+    requests: dict[str, tuple[int, list[str] | str]] = field(default_factory=dict)
+
+    def to_dict(self) -> dict:
+        """Convert the batch conversion into a JSON serializable dictionary."""
+        return {
+            "batch_id": self.batch_id,
+            "results": [
+                {
+                    "filepath": result.filepath,
+                    "classification": result.classification,
+                    "output_filepath": result.output_filepath,
+                    "error": None if result.error is None else str(result.error),
+                }
+                for result in self.results
+            ],
+            "requests": {
+                custom_id: [document, definition_ids]
+                for custom_id, (document, definition_ids) in self.requests.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "BatchConversion":
+        """Restore a batch conversion from :meth:`to_dict`."""
+        return cls(
+            data["batch_id"],
+            [
+                ConversionResult(
+                    result["filepath"],
+                    result.get("classification"),
+                    result.get("output_filepath"),
+                    error=None if result.get("error") is None else RuntimeError(result["error"]),
+                )
+                for result in data["results"]
+            ],
+            {
+                custom_id: (document, definition_ids)
+                for custom_id, (document, definition_ids) in data["requests"].items()
+            },
+        )
+
+
+def _preprocess(preprocessors: list[Preprocessor], filepath: str) -> list[str] | str:
+    """Pass the filepath through the preprocessor chain.
+
+    The result of the last preprocessor is returned as is, e.g. a list of
+    pages, the results of the previous ones are passed on as string.
+    Defined on module level to be usable in a process pool.
+    """
+    preprocessed_datasheet: list[str] | str = filepath
+    for preprocessor in preprocessors:
+        result = preprocessor.convert(str(preprocessed_datasheet))
+        preprocessed_datasheet = result if isinstance(result, list) else str(result)
+    return preprocessed_datasheet
+
+
 class PDF2AAS:
     """Convert PDF documents into Asset Administration Shell (AAS) submodels.
 
@@ -28,9 +138,30 @@ class PDF2AAS:
             current openai model.
         generator (Generator): A generator object to create AAS submodels.
             Defaults to AASSubmodelTechnicalData.
-        batch_size (int): The number of properties that are extracted in one
-            batch. 0 (default) extracts all properties in one. 1 extracts each
-            property on its own.
+        batch_size (int | Literal["auto"]): The number of properties that are
+            extracted in one batch. 0 (default) extracts all properties in one.
+            1 extracts each property on its own. "auto" packs the properties
+            into batches, whose estimated prompt tokens fill the
+            `batch_token_budget` and whose estimated answer fits into the
+            `max_tokens` of a PropertyLLMSearch extractor.
+        batch_token_budget (int): Target number of prompt tokens (datasheet and
+            property table) per batch, if `batch_size` is "auto". Should be
+            well below the context window of the model. Defaults to 16000.
+        max_workers (int): The number of batches that are extracted
+            concurrently in a thread pool or awaited concurrently in
+            :meth:`aextract`. 1 (default) extracts the batches one after
+            another. Only used if `batch_size` is greater than 0.
+        preprocess_cache (Cache | None): Cache for the preprocessed documents,
+            e.g. a SQLiteCache. The key is the SHA-256 hash of the file content
+            together with the classes and configuration of the preprocessors,
+            hence repeated conversions of a document skip the preprocessing.
+            Defaults to None, i.e. no caching.
+        metrics (MetricsSink | None): Sink for the duration of the
+            "preprocess", "definitions", "extract" and "generate" steps and the
+            whole "convert" of a document, e.g. a PrometheusSink. It is passed
+            on to the PropertyLLM extractors without own `metrics`, also inside
+            composed extractors like PropertyCascade, which record the LLM
+            requests and their tokens. Defaults to None, i.e. no metrics.
 
     """
 
@@ -40,7 +171,12 @@ class PDF2AAS:
         dictionary: Dictionary | AASTemplate | None = None,
         extractor: Extractor | None = None,
         generator: Generator | None = None,
-        batch_size: int = 0,
+        batch_size: int | Literal["auto"] = 0,
+        *,
+        max_workers: int = 1,
+        preprocess_cache: Cache | None = None,
+        batch_token_budget: int = 16000,
+        metrics: MetricsSink | None = None,
     ) -> None:
         """Initialize the PDF2AAS toolchain with optional custom components.
 
@@ -58,9 +194,19 @@ class PDF2AAS:
                 PropertyLLMSearch with the current openai model.
             generator (Generator, optional): A generator object to create AAS
                 submodels. Defaults to AASSubmodelTechnicalData.
-            batch_size (int, optional): The number of properties that are
-                extracted in one batch. 0 (default) extracts all properties
-                in one. 1 extracts each property on its own.
+            batch_size (int, "auto", optional): The number of properties that
+                are extracted in one batch. 0 (default) extracts all properties
+                in one. 1 extracts each property on its own. "auto" fills each
+                batch up to the `batch_token_budget`.
+            max_workers (int, optional): The number of batches that are
+                extracted concurrently. 1 (default) extracts the batches one
+                after another.
+            preprocess_cache (Cache, optional): Cache for the preprocessed
+                documents, e.g. `SQLiteCache("temp/preprocess.sqlite")`.
+            batch_token_budget (int, optional): Target number of prompt tokens
+                per batch, if `batch_size` is "auto". Defaults to 16000.
+            metrics (MetricsSink, optional): Sink for the timing spans and
+                counters, e.g. `PrometheusSink()`.
 
         """
         self.preprocessor = preprocessor
@@ -70,6 +216,12 @@ class PDF2AAS:
             AASSubmodelTechnicalData() if generator is None else generator
         )
         self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.preprocess_cache = preprocess_cache
+        self.batch_token_budget = batch_token_budget
+        self.metrics = metrics
+        if metrics is not None:
+            self.extractor.set_metrics(metrics, overwrite=False)
 
     def convert(
         self,
@@ -99,28 +251,427 @@ class PDF2AAS:
                 `generator.dump` or by specifying `output_filepath`.
 
         """
-        text = self.preprocess(pdf_filepath)
-        definitions = self.definitions(classification)
-        properties = self.extract(text, definitions)
-        self.generate(classification, properties, output_filepath)
+        with span(self.metrics, "convert", filepath=pdf_filepath):
+            with span(self.metrics, "preprocess", filepath=pdf_filepath):
+                text = self.preprocess(pdf_filepath)
+            with span(self.metrics, "definitions", classification=classification) as attributes:
+                definitions = self.definitions(classification)
+                attributes["definitions"] = len(definitions)
+            with span(self.metrics, "extract", filepath=pdf_filepath) as attributes:
+                properties = self.extract(text, definitions)
+                attributes["properties"] = len(properties)
+            with span(self.metrics, "generate", filepath=pdf_filepath):
+                self.generate(classification, properties, output_filepath)
         return properties
 
-    def preprocess(self, filepath: str) -> str:
+    async def aconvert(
+        self,
+        pdf_filepath: str,
+        classification: str | None = None,
+        output_filepath: str | None = None,
+    ) -> list[Property]:
+        """Convert a PDF document into an AAS submodel asynchronously.
+
+        Same as :meth:`convert`, but awaits the extraction via :meth:`aextract`.
+        Preprocessing and definition lookup run in separate threads to keep the
+        event loop responsive.
+        """
+        with span(self.metrics, "convert", filepath=pdf_filepath):
+            with span(self.metrics, "preprocess", filepath=pdf_filepath):
+                text = await asyncio.to_thread(self.preprocess, pdf_filepath)
+            with span(self.metrics, "definitions", classification=classification) as attributes:
+                definitions = await asyncio.to_thread(self.definitions, classification)
+                attributes["definitions"] = len(definitions)
+            with span(self.metrics, "extract", filepath=pdf_filepath) as attributes:
+                properties = await self.aextract(text, definitions)
+                attributes["properties"] = len(properties)
+            with span(self.metrics, "generate", filepath=pdf_filepath):
+                self.generate(classification, properties, output_filepath)
+        return properties
+
+    def convert_many(
+        self,
+        pdf_filepaths: list[str],
+        classifications: str | list[str | None] | None = None,
+        output_dir: str | None = None,
+        *,
+        output_suffix: str = ".json",
+        max_processes: int | None = None,
+        max_threads: int = 4,
+    ) -> list[ConversionResult]:
+        """Convert multiple documents into AAS submodels using worker pools.
+
+        The documents are preprocessed in a process pool with `max_processes`
+        workers (defaults to the number of CPUs). As soon as a document is
+        preprocessed, its properties are extracted and generated in a thread
+        pool with `max_threads` workers. Each document gets its own copy of the
+        configured generator, so that the documents do not interfere.
+
+        On Windows and macOS the process pool spawns new interpreters, hence
+        the calling script needs a `if __name__ == "__main__":` guard.
+
+        Args:
+            pdf_filepaths (list[str]): The file paths to the input documents.
+            classifications (str, list[str | None], optional): The
+                classification id for all documents or a list with one
+                classification id per document.
+            output_dir (str, optional): Directory to save the generator output
+                to. The file name is the document file name with the
+                `output_suffix`.
+            output_suffix (str): Suffix of the generated files. Defaults to
+                ".json".
+            max_processes (int, optional): Maximum number of processes used for
+                preprocessing.
+            max_threads (int): Maximum number of documents, whose properties
+                are extracted concurrently. Defaults to 4.
+
+        Returns:
+            results (list[ConversionResult]): One result per document in the
+                order of `pdf_filepaths`. Errors are reported per document
+                instead of being raised.
+
+        """
+        results = self._conversion_results(
+            pdf_filepaths,
+            classifications,
+            output_dir,
+            output_suffix,
+        )
+        definitions = self._classification_definitions(results)
+
+        logger.info("Converting %s documents.", len(results))
+        with (
+            ProcessPoolExecutor(max_workers=max_processes) as process_pool,
+            ThreadPoolExecutor(max_workers=max_threads) as thread_pool,
+        ):
+            preprocessing: dict[Future, tuple[ConversionResult, str | None]] = {}
+            extraction: list[Future] = []
+            for result in results:
+                if result.error is not None:
+                    continue
+                preprocessors = self._get_preprocessors(result.filepath)
+                cache_key, cached = self._load_preprocessed(preprocessors, result.filepath)
+                if cached is not None:
+                    extraction.append(
+                        thread_pool.submit(
+                            self._convert_preprocessed,
+                            result,
+                            cached,
+                            definitions[result.classification],
+                        ),
+                    )
+                    continue
+                future = process_pool.submit(_preprocess, preprocessors, result.filepath)
+                preprocessing[future] = (result, cache_key)
+            for future in as_completed(preprocessing):
+                result, cache_key = preprocessing[future]
+                try:
+                    text = future.result()
+                except Exception as error:  # noqa: BLE001
+                    logger.warning("Couldn't preprocess %s: %s", result.filepath, error)
+                    result.error = error
+                    continue
+                self._store_preprocessed(cache_key, text)
+                extraction.append(
+                    thread_pool.submit(
+                        self._convert_preprocessed,
+                        result,
+                        text,
+                        definitions[result.classification],
+                    ),
+                )
+            for future in extraction:
+                future.result()
+        return results
+
+    def submit_batch(
+        self,
+        pdf_filepaths: list[str],
+        classifications: str | list[str | None] | None = None,
+        output_dir: str | None = None,
+        *,
+        output_suffix: str = ".json",
+        batch_filepath: str | None = None,
+    ) -> BatchConversion | None:
+        """Submit the extraction of multiple documents as one OpenAI batch.
+
+        The documents are preprocessed and their definitions are split
+        according to `batch_size`. All prompts are written to a JSONL file and
+        submitted to the OpenAI Batch API, which answers them within 24 hours
+        at reduced costs. Needs a PropertyLLM extractor with an OpenAI client.
+        Use :meth:`collect_batch` to get the results later, e.g. in a nightly
+        job. The returned batch conversion can be stored via `to_dict`.
+
+        Args:
+            pdf_filepaths (list[str]): The file paths to the input documents.
+            classifications (str, list[str | None], optional): The
+                classification id for all documents or one per document.
+            output_dir (str, optional): Directory to save the generator output
+                to, when the batch is collected.
+            output_suffix (str): Suffix of the generated files. Defaults to
+                ".json".
+            batch_filepath (str, optional): Path to keep a copy of the JSONL
+                batch file.
+
+        Returns:
+            batch (BatchConversion | None): The submitted batch or None, if the
+                submission failed.
+
+        """
+        extractor = self.extractor
+        if not isinstance(extractor, PropertyLLM):
+            error = "The batch mode needs a PropertyLLM extractor."
+            raise TypeError(error)
+        results = self._conversion_results(
+            pdf_filepaths,
+            classifications,
+            output_dir,
+            output_suffix,
+        )
+        definitions = self._classification_definitions(results)
+        batch_requests: list[dict] = []
+        requests: dict[str, tuple[int, list[str] | str]] = {}
+        for document, result in enumerate(results):
+            if result.error is not None:
+                continue
+            try:
+                text = self.preprocess(result.filepath)
+            except Exception as error:  # noqa: BLE001
+                logger.warning("Couldn't preprocess %s: %s", result.filepath, error)
+                result.error = error
+                continue
+            document_definitions = definitions[result.classification]
+            batches: list[PropertyDefinition | list[PropertyDefinition]] = (
+                [*self._batches(document_definitions, text)]
+                if not isinstance(self.batch_size, int) or self.batch_size > 0
+                else [document_definitions]
+            )
+            for idx, batch in enumerate(batches):
+                custom_id = f"{document}-{idx}"
+                batch_requests.append(extractor.create_batch_request(custom_id, text, batch))
+                requests[custom_id] = (
+                    document,
+                    batch.id if isinstance(batch, PropertyDefinition) else [d.id for d in batch],
+                )
+        if len(batch_requests) == 0:
+            logger.warning("No document could be prepared for the batch.")
+            return None
+        batch_id = extractor.submit_batch(batch_requests, batch_filepath)
+        if batch_id is None:
+            return None
+        return BatchConversion(batch_id, results, requests)
+
+    def collect_batch(self, batch: BatchConversion) -> list[ConversionResult] | None:
+        """Collect the results of a batch submitted via :meth:`submit_batch`.
+
+        Returns None, if the batch is still in progress. Otherwise parses the
+        answers with the configured extractor, generates the outputs and
+        returns the results of all documents, c.f. :meth:`convert_many`.
+        If the whole batch failed, the error is set for every document.
+        Collecting a batch again replaces the properties of the documents.
+        """
+        extractor = self.extractor
+        if not isinstance(extractor, PropertyLLM):
+            error = "The batch mode needs a PropertyLLM extractor."
+            raise TypeError(error)
+        try:
+            answers = extractor.collect_batch(batch.batch_id)
+        except RuntimeError as error:
+            logger.warning("Couldn't collect batch %s: %s", batch.batch_id, error)
+            answers = {}
+            for result in batch.results:
+                result.error = result.error or error
+        if answers is None:
+            return None
+        self._process_batch_answers(extractor, batch, answers)
+        for result in batch.results:
+            if result.error is not None:
+                result.output_filepath = None
+                continue
+            try:
+                self.generate(result.classification, result.properties, result.output_filepath)
+            except Exception as error:  # noqa: BLE001
+                logger.warning("Couldn't generate %s: %s", result.filepath, error)
+                result.error = error
+                result.output_filepath = None
+        return batch.results
+
+    def _process_batch_answers(
+        self,
+        extractor: PropertyLLM,
+        batch: BatchConversion,
+        answers: dict[str, tuple[str | None, Any]],
+    ) -> None:
+        for result in batch.results:
+            result.properties = []
+        definitions = self._classification_definitions(batch.results)
+        for custom_id, (document, definition_ids) in batch.requests.items():
+            result = batch.results[document]
+            if result.error is not None:
+                continue
+            if custom_id not in answers:
+                result.error = RuntimeError(f"Missing result of batch request {custom_id}.")
+                continue
+            by_id = {d.id: d for d in definitions.get(result.classification, [])}
+            batch_definitions: PropertyDefinition | list[PropertyDefinition] | None = (
+                by_id.get(definition_ids)
+                if isinstance(definition_ids, str)
+                else [by_id[id_] for id_ in definition_ids if id_ in by_id]
+            )
+            if batch_definitions is None:
+                result.error = RuntimeError(
+                    f"Missing definition {definition_ids} of batch request {custom_id}.",
+                )
+                continue
+            result.properties.extend(
+                extractor.process_batch_result(answers[custom_id][0], batch_definitions),
+            )
+
+    def _conversion_results(
+        self,
+        pdf_filepaths: list[str],
+        classifications: str | list[str | None] | None,
+        output_dir: str | None,
+        output_suffix: str,
+    ) -> list[ConversionResult]:
+        if classifications is None or isinstance(classifications, str):
+            classifications = [classifications] * len(pdf_filepaths)
+        if len(classifications) != len(pdf_filepaths):
+            error = (
+                f"Got {len(classifications)} classifications for {len(pdf_filepaths)} documents."
+            )
+            raise ValueError(error)
+
+        results = [
+            ConversionResult(filepath, classification)
+            for filepath, classification in zip(pdf_filepaths, classifications, strict=True)
+        ]
+        if output_dir is not None:
+            Path(output_dir).mkdir(parents=True, exist_ok=True)
+            self._set_output_filepaths(results, output_dir, output_suffix)
+        return results
+
+    def _classification_definitions(
+        self,
+        results: list[ConversionResult],
+    ) -> dict[str | None, list[PropertyDefinition]]:
+        definitions: dict[str | None, list[PropertyDefinition]] = {}
+        for result in results:
+            if result.classification in definitions:
+                continue
+            try:
+                definitions[result.classification] = self.definitions(result.classification)
+            except Exception as error:  # noqa: BLE001
+                logger.warning("Couldn't get definitions for %s: %s", result.classification, error)
+                result.error = error
+        return definitions
+
+    def _convert_preprocessed(
+        self,
+        result: ConversionResult,
+        text: list[str] | str,
+        definitions: list[PropertyDefinition],
+    ) -> None:
+        try:
+            with span(self.metrics, "extract", filepath=result.filepath) as attributes:
+                result.properties = self.extract(text, definitions)
+                attributes["properties"] = len(result.properties)
+            with span(self.metrics, "generate", filepath=result.filepath):
+                self.generate(
+                    result.classification,
+                    result.properties,
+                    result.output_filepath,
+                    copy.deepcopy(self.generator),
+                )
+        except Exception as error:  # noqa: BLE001
+            logger.warning("Couldn't convert %s: %s", result.filepath, error)
+            result.error = error
+            result.output_filepath = None
+
+    @staticmethod
+    def _set_output_filepaths(
+        results: list[ConversionResult],
+        output_dir: str,
+        output_suffix: str,
+    ) -> None:
+        used_names: set[str] = set()
+        for idx, result in enumerate(results):
+            name = Path(result.filepath).stem
+            if name in used_names:
+                name = f"{name}_{idx}"
+            used_names.add(name)
+            result.output_filepath = str(Path(output_dir, name + output_suffix))
+
+    def preprocess(self, filepath: str) -> list[str] | str:
         """Preprocess the document at the filepath using the configured preprocessors.
 
         Opens .pdf / .PDF documents with PDFium and other files with Text preprocessor,
-        if preprocessor is None.
+        if preprocessor is None. The pages of a PDF are returned as list. Returns
+        the cached text, if a `preprocess_cache`
+        is configured and the document was preprocessed with the same
+        configuration before.
         """
+        preprocessors = self._get_preprocessors(filepath)
+        cache_key, cached = self._load_preprocessed(preprocessors, filepath)
+        if cached is not None:
+            return cached
+        text = _preprocess(preprocessors, filepath)
+        self._store_preprocessed(cache_key, text)
+        return text
+
+    def _preprocess_cache_key(
+        self,
+        preprocessors: list[Preprocessor],
+        filepath: str,
+    ) -> str | None:
+        if self.preprocess_cache is None:
+            return None
+        file_hash = hashlib.sha256()
+        try:
+            with Path(filepath).open("rb") as file:
+                for chunk in iter(lambda: file.read(1024**2), b""):
+                    file_hash.update(chunk)
+        except OSError as error:
+            logger.debug("Couldn't hash %s for the preprocess cache: %s", filepath, error)
+            return None
+        return hash_key(
+            file_hash.hexdigest(),
+            [
+                (
+                    f"{type(preprocessor).__module__}.{type(preprocessor).__qualname__}",
+                    preprocessor.settings(),
+                )
+                for preprocessor in preprocessors
+            ],
+        )
+
+    def _load_preprocessed(
+        self,
+        preprocessors: list[Preprocessor],
+        filepath: str,
+    ) -> tuple[str | None, list[str] | str | None]:
+        """Get the cache key and the cached text or pages, if any."""
+        cache_key = self._preprocess_cache_key(preprocessors, filepath)
+        if self.preprocess_cache is None or cache_key is None:
+            return cache_key, None
+        cached = self.preprocess_cache.get(cache_key)
+        if not isinstance(cached, str | list):
+            return cache_key, None
+        logger.info("Using cached preprocessing result for %s.", filepath)
+        return cache_key, cached
+
+    def _store_preprocessed(self, cache_key: str | None, text: list[str] | str) -> None:
+        # failed conversions return None, which is converted to "None"
+        if self.preprocess_cache is None or cache_key is None or text in ("", "None", []):
+            return
+        self.preprocess_cache.set(cache_key, text)
+
+    def _get_preprocessors(self, filepath: str) -> list[Preprocessor]:
         if self.preprocessor is None:
-            preprocessors: list[Preprocessor] = (
-                [PDFium()] if filepath.lower().endswith(".pdf") else [Text()]
-            )
-        elif isinstance(self.preprocessor, Preprocessor):
-            preprocessors = [self.preprocessor]
-        preprocessed_datasheet = filepath
-        for preprocessor in preprocessors:
-            preprocessed_datasheet = str(preprocessor.convert(preprocessed_datasheet))
-        return preprocessed_datasheet
+            return [PDFium()] if filepath.lower().endswith(".pdf") else [Text()]
+        if isinstance(self.preprocessor, Preprocessor):
+            return [self.preprocessor]
+        return self.preprocessor
 
     def definitions(self, classification: str | None = None) -> list[PropertyDefinition]:
         """Get the definitions from the configured dictionary or aas template."""
@@ -132,29 +683,217 @@ class PDF2AAS:
 
     def extract(
         self,
-        text: str,
+        text: list[str] | str,
         definitions: list[PropertyDefinition],
         raw_prompts: list | None = None,
         raw_results: list | None = None,
     ) -> list[Property]:
-        """Extract the defined properties from the text using the configured extractor."""
-        if self.batch_size <= 0:
-            properties = self.extractor.extract(text, definitions, raw_prompts, raw_results)
-        elif self.batch_size == 1:
-            properties = []
-            for d in definitions:
-                properties.extend(self.extractor.extract(text, d, raw_prompts, raw_results))
-        else:
-            properties = []
-            for i in range(0, len(definitions), self.batch_size):
-                properties.extend(
-                    self.extractor.extract(
-                        text,
-                        definitions[i : i + self.batch_size],
-                        raw_prompts,
-                        raw_results,
-                    ),
+        """Extract the defined properties from the text using the configured extractor.
+
+        Splits the definitions into batches according to `batch_size`. If
+        `max_workers` is greater than 1, the batches are extracted concurrently.
+        The properties, `raw_prompts` and `raw_results` keep the order of the
+        definitions in any case.
+        """
+        if isinstance(self.batch_size, int) and self.batch_size <= 0:
+            return self.extractor.extract(text, definitions, raw_prompts, raw_results)
+        batches = self._batches(definitions, text)
+        if self.max_workers > 1 and len(batches) > 1:
+            return self._extract_concurrent(text, batches, raw_prompts, raw_results)
+        properties = []
+        for batch in batches:
+            properties.extend(self.extractor.extract(text, batch, raw_prompts, raw_results))
+        return properties
+
+    async def aextract(
+        self,
+        text: list[str] | str,
+        definitions: list[PropertyDefinition],
+        raw_prompts: list | None = None,
+        raw_results: list | None = None,
+    ) -> list[Property]:
+        """Extract the defined properties asynchronously, c.f. :meth:`extract`.
+
+        Awaits up to `max_workers` batches concurrently via the `aextract`
+        method of the configured extractor.
+        """
+        if isinstance(self.batch_size, int) and self.batch_size <= 0:
+            return await self.extractor.aextract(text, definitions, raw_prompts, raw_results)
+        semaphore = asyncio.Semaphore(max(self.max_workers, 1))
+
+        async def extract_batch(
+            batch: PropertyDefinition | list[PropertyDefinition],
+        ) -> tuple[list[Property], list, list]:
+            batch_prompts: list = []
+            batch_results: list = []
+            async with semaphore:
+                batch_properties = await self.extractor.aextract(
+                    text,
+                    batch,
+                    batch_prompts,
+                    batch_results,
                 )
+            return batch_properties, batch_prompts, batch_results
+
+        batches = self._batches(definitions, text)
+        warm_up = []
+        if len(batches) > 1 and self._warm_up_prompt_cache():
+            warm_up = [await extract_batch(batches[0])]
+            batches = batches[1:]
+        properties = []
+        # gather returns the results in the order of the batches
+        for batch_properties, batch_prompts, batch_results in warm_up + await asyncio.gather(
+            *(extract_batch(batch) for batch in batches),
+        ):
+            properties.extend(batch_properties)
+            if isinstance(raw_prompts, list):
+                raw_prompts.extend(batch_prompts)
+            if isinstance(raw_results, list):
+                raw_results.extend(batch_results)
+        return properties
+
+    def extract_stream(
+        self,
+        text: list[str] | str,
+        definitions: list[PropertyDefinition],
+        raw_prompts: list | None = None,
+        raw_results: list | None = None,
+    ) -> Iterator[Property]:
+        """Yield the extracted properties as soon as the extractor returns them.
+
+        The batches are extracted one after another via the `extract_stream`
+        method of the configured extractor, c.f. :meth:`extract`. Hence the
+        properties of a batch are yielded, while the LLM still generates them,
+        if the extractor supports streaming.
+        """
+        if isinstance(self.batch_size, int) and self.batch_size <= 0:
+            yield from self.extractor.extract_stream(text, definitions, raw_prompts, raw_results)
+            return
+        for batch in self._batches(definitions, text):
+            yield from self.extractor.extract_stream(text, batch, raw_prompts, raw_results)
+
+    def _batches(
+        self,
+        definitions: list[PropertyDefinition],
+        text: list[str] | str = "",
+    ) -> list[PropertyDefinition] | list[list[PropertyDefinition]]:
+        if self.batch_size == "auto":
+            return self._auto_batches(definitions, text)
+        if self.batch_size == 1:
+            return definitions
+        return [
+            definitions[i : i + self.batch_size]
+            for i in range(0, len(definitions), self.batch_size)
+        ]
+
+    def _warm_up_prompt_cache(self) -> bool:
+        """Check if the first batch should be sent alone to fill the provider prompt cache.
+
+        Concurrent requests sent before the first one was answered can't hit
+        the prompt cache. Skipped with a retriever, which changes the datasheet
+        per batch, so that the batches don't share a prefix.
+        """
+        extractor = self.extractor
+        if not isinstance(extractor, PropertyLLMSearch) or not extractor.stable_prompt_prefix:
+            return False
+        if extractor.retriever is not None:
+            logger.warning(
+                "Stable prompt prefix has no effect with a retriever. Sending all batches at once.",
+            )
+            return False
+        return True
+
+    def _auto_batches(
+        self,
+        definitions: list[PropertyDefinition],
+        text: list[str] | str,
+    ) -> list[list[PropertyDefinition]]:
+        """Pack the definitions into batches filling the `batch_token_budget`.
+
+        The tokens of each row of the property table are estimated from the
+        prompt with and without the definition. Only PropertyLLMSearch
+        extractors are supported, other extractors get a single batch.
+        """
+        extractor = self.extractor
+        if not isinstance(extractor, PropertyLLMSearch):
+            return [definitions] if definitions else []
+        model = extractor.model_identifier
+        if isinstance(text, list):
+            text = "\n".join(text)
+        base_tokens = (
+            estimate_tokens(extractor.system_prompt_template, model)
+            + estimate_tokens(extractor.create_prompt(text, []), model)
+            + 2 * MESSAGE_OVERHEAD_TOKENS
+        )
+        table_tokens = estimate_tokens(extractor.create_property_list_prompt([]), model)
+        max_properties = (
+            max(extractor.max_tokens // OUTPUT_TOKENS_PER_PROPERTY, 1)
+            if extractor.max_tokens
+            else len(definitions)
+        )
+        batches: list[list[PropertyDefinition]] = []
+        batch: list[PropertyDefinition] = []
+        batch_tokens = base_tokens
+        for definition in definitions:
+            row_tokens = max(
+                estimate_tokens(extractor.create_property_list_prompt([definition]), model)
+                - table_tokens,
+                1,
+            )
+            if batch and (
+                batch_tokens + row_tokens > self.batch_token_budget or len(batch) >= max_properties
+            ):
+                batches.append(batch)
+                batch = []
+                batch_tokens = base_tokens
+            batch.append(definition)
+            batch_tokens += row_tokens
+        if batch:
+            batches.append(batch)
+        logger.info(
+            "Packed %s definitions into %s batches with %s prompt tokens for the datasheet.",
+            len(definitions),
+            len(batches),
+            base_tokens,
+        )
+        return batches
+
+    def _extract_concurrent(
+        self,
+        text: list[str] | str,
+        batches: list[PropertyDefinition] | list[list[PropertyDefinition]],
+        raw_prompts: list | None,
+        raw_results: list | None,
+    ) -> list[Property]:
+        def extract_batch(
+            batch: PropertyDefinition | list[PropertyDefinition],
+        ) -> tuple[list[Property], list, list]:
+            batch_prompts: list = []
+            batch_results: list = []
+            batch_properties = self.extractor.extract(text, batch, batch_prompts, batch_results)
+            return batch_properties, batch_prompts, batch_results
+
+        logger.info(
+            "Extracting %s batches with %s concurrent workers.",
+            len(batches),
+            self.max_workers,
+        )
+        warm_up: list[tuple[list[Property], list, list]] = []
+        if self._warm_up_prompt_cache():
+            warm_up = [extract_batch(batches[0])]
+            batches = batches[1:]
+        properties = []
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(batches))) as executor:
+            # map yields the results in the order of the batches
+            for batch_properties, batch_prompts, batch_results in chain(
+                warm_up,
+                executor.map(extract_batch, batches),
+            ):
+                properties.extend(batch_properties)
+                if isinstance(raw_prompts, list):
+                    raw_prompts.extend(batch_prompts)
+                if isinstance(raw_results, list):
+                    raw_results.extend(batch_results)
         return properties
 
     def generate(
@@ -162,19 +901,22 @@ class PDF2AAS:
         classification: str | None,
         properties: list[Property],
         filepath: str | None,
+        generator: Generator | None = None,
     ) -> None:
-        """Export properties using the given generator."""
-        if self.generator is None:
+        """Export properties using the given or configured generator."""
+        if generator is None:
+            generator = self.generator
+        if generator is None:
             return
 
-        self.generator.reset()
+        generator.reset()
         if (
             classification
-            and isinstance(self.generator, AASSubmodelTechnicalData)
+            and isinstance(generator, AASSubmodelTechnicalData)
             and isinstance(self.dictionary, Dictionary)
         ):
-            self.generator.add_classification(self.dictionary, classification)
-        self.generator.add_properties(properties)
+            generator.add_classification(self.dictionary, classification)
+        generator.add_properties(properties)
         if filepath is not None:
-            self.generator.dump(filepath)
+            generator.dump(filepath)
             logger.info("Generated result in: %s", filepath)
@@ -4,11 +4,14 @@ from .cdd import CDD
 from .core import Dictionary, dictionary_serializer
 from .eclass import ECLASS
 from .etim import ETIM
+from .store import DefinitionMapping, DictionaryStore
 
 __all__ = [
     "CDD",
     "ECLASS",
     "ETIM",
+    "DefinitionMapping",
     "Dictionary",
+    "DictionaryStore",
     "dictionary_serializer",
 ]
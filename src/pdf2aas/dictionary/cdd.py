@@ -11,6 +11,7 @@ from bs4 import BeautifulSoup, Tag
 from pdf2aas.model import SimplePropertyDataType, ValueDefinitionKeyType
 
 from .core import ClassDefinition, Dictionary, PropertyDefinition
+from .store import DefinitionMapping
 
 logger = logging.getLogger(__name__)
 
@@ -57,10 +58,10 @@ class CDD(Dictionary):
     Attributes:
         temp_dir (str): The directory path used for loading/saving a cached
             dictionary.
-        properties (dict[str, PropertyDefinition]): Maps property IDs to
-            PropertyDefinition instances.
-        releases (dict[str, dict[str, ClassDefinition]]): Maps release versions
-            to class definition objects.
+        properties (DefinitionMapping[PropertyDefinition]): Maps property IDs
+            to PropertyDefinition instances.
+        releases (dict[str, DefinitionMapping[ClassDefinition]]): Maps release
+            versions to class definition objects.
         supported_releases (list[str]): A list of supported release versions.
         license (str): A link or note to the license or copyright of the
             dictionary.
@@ -72,8 +73,8 @@ class CDD(Dictionary):
 
     """
 
-    releases: ClassVar[dict[str, dict[str, ClassDefinition]]] = {}
-    properties: ClassVar[dict[str, PropertyDefinition]] = {}
+    releases: ClassVar[dict[str, DefinitionMapping[ClassDefinition]]] = {}
+    properties: ClassVar[DefinitionMapping[PropertyDefinition]] = DefinitionMapping("properties")
     supported_releases: ClassVar[list[str]] = [
         "V2.0018.0002",
     ]
@@ -1,8 +1,13 @@
 """Abstract dictionary class to provide class and property definitions."""
 
+import io
 import json
 import logging
+import re
+import sqlite3
+import zipfile
 from abc import ABC, abstractmethod
+from collections.abc import Mapping
 from dataclasses import asdict
 from pathlib import Path
 from typing import Any, ClassVar
@@ -11,6 +16,8 @@ import requests
 
 from pdf2aas.model import ClassDefinition, PropertyDefinition
 
+from .store import DefinitionMapping, DictionaryStore
+
 logger = logging.getLogger(__name__)
 
 
@@ -22,34 +29,53 @@ def dictionary_serializer(obj: Any) -> dict:
         class_dict = asdict(obj)
         class_dict["properties"] = [prop.id for prop in obj.properties]
         return class_dict
+    if isinstance(obj, Mapping):
+        return dict(obj)
     error = f"Object of type {obj.__class__.__name__} is not JSON serializable"
     raise TypeError(error)
 
 
+def open_zip_member(zip_file: zipfile.ZipFile, filename: str, encoding: str) -> io.TextIOWrapper:
+    """Open a file of a zip archive as text stream without unpacking it.
+
+    The member is searched by its file name, ignoring directories inside the
+    archive. Raises a FileNotFoundError, if no member matches.
+    """
+    for info in zip_file.infolist():
+        if not info.is_dir() and Path(info.filename).name == filename:
+            return io.TextIOWrapper(zip_file.open(info), encoding=encoding, newline="")
+    error = f"No file {filename} in zip archive {zip_file.filename}"
+    raise FileNotFoundError(error)
+
+
 class Dictionary(ABC):
     """Abstract dictionary to manage a collection of property and class definitions.
 
     Attributes:
         temp_dir (str): The directory path used for loading/saving a cached
             dictionary.
-        properties (dict[str, PropertyDefinition]): Maps property IDs to
-            PropertyDefinition instances.
-        releases (dict[str, dict[str, ClassDefinition]]): Maps release versions
-            to class definition objects.
+        properties (DefinitionMapping[PropertyDefinition]): Maps property IDs
+            to PropertyDefinition instances. Properties of loaded dictionary
+            stores are materialized lazily.
+        releases (dict[str, DefinitionMapping[ClassDefinition]]): Maps release
+            versions to class definition objects.
         supported_releases (list[str]): A list of supported release versions.
         license (str): A link or note to the license or copyright of the
             dictionary.
         timeout (float): Time limit in seconds for property or class information
             downloads. Defaults to 120s.
+        store_max_cached (int): Maximum number of classes and properties each,
+            that are kept in memory per loaded dictionary store. Defaults to 4096.
 
     """
 
     temp_dir = "temp/dict"
-    properties: ClassVar[dict[str, PropertyDefinition]] = {}
-    releases: ClassVar[dict[str, dict[str, ClassDefinition]]] = {}
+    properties: ClassVar[DefinitionMapping[PropertyDefinition]] = DefinitionMapping("properties")
+    releases: ClassVar[dict[str, DefinitionMapping[ClassDefinition]]] = {}
     supported_releases: ClassVar[list[str]] = []
     license: str | None = None
     timeout: float = 120
+    store_max_cached: int = 4096
 
     def __init__(
         self,
@@ -69,7 +95,7 @@ class Dictionary(ABC):
             )
         self.release = release
         if release not in self.releases:
-            self.releases[release] = {}
+            self.releases[release] = DefinitionMapping("classes")
             self.load_from_file()
 
     @property
@@ -107,15 +133,17 @@ class Dictionary(ABC):
         return self.properties.get(property_id)
 
     @property
-    def classes(self) -> dict[str, ClassDefinition]:
+    def classes(self) -> DefinitionMapping[ClassDefinition]:
         """Retrieves the class definitions for the currently set release version.
 
         Arguments:
-            dict[str, ClassDefinition]: A dictionary of class definitions for
-                the current release, with their class id as key.
+            DefinitionMapping[ClassDefinition]: A mapping of class definitions
+                for the current release, with their class id as key.
 
         """
-        return self.releases.get(self.release, {})
+        if self.release not in self.releases:
+            self.releases[self.release] = DefinitionMapping("classes")
+        return self.releases[self.release]
 
     @abstractmethod
     def get_class_url(self, class_id: str) -> str | None:
@@ -127,68 +155,176 @@ class Dictionary(ABC):
         """Get the web URL for the property id for details."""
         return None
 
+    def _default_path(self, suffix: str) -> Path:
+        return Path(self.temp_dir) / f"{self.name}-{self.release}{suffix}"
+
+    def _release_zips(self) -> list[Path]:
+        """Get the CSV release zip files of the release in the `temp_dir`."""
+        temp_path = Path(self.temp_dir)
+        if not temp_path.exists():
+            return []
+        return [
+            file
+            for file in temp_path.iterdir()
+            if re.match(f"{self.name}-{self.release}.*CSV.*\\.zip", file.name, re.IGNORECASE)
+        ]
+
+    def _snapshot_path(self) -> Path:
+        """Get the path of the snapshot compiled from the release zips.
+
+        Differs from the default path of :meth:`save_to_file`, so that a
+        partially scraped dictionary is not mistaken for a compiled release.
+        """
+        return self._default_path(".snapshot.sqlite")
+
+    def _snapshot_is_current(self) -> bool:
+        """Check if a snapshot exists, that is newer than the release zips."""
+        snapshot = self._snapshot_path()
+        if not snapshot.exists():
+            return False
+        mtime = snapshot.stat().st_mtime
+        return all(file.stat().st_mtime <= mtime for file in self._release_zips())
+
+    def compile_snapshot(self) -> Path | None:
+        """Compile the loaded definitions into a dictionary store snapshot.
+
+        The snapshot is saved in the `temp_dir` and preferred over parsing the
+        release zip files again, as long as it is newer than them. Thereby new
+        processes load the release in milliseconds and share the memory-mapped
+        snapshot. Called automatically after loading a release zip, but can
+        also be run upfront, e.g. while building a container image.
+
+        Returns the path of the snapshot or None, if it couldn't be written.
+        """
+        path = self._snapshot_path()
+        try:
+            self.save_to_file(str(path))
+        except (OSError, sqlite3.Error) as error:
+            logger.warning("Couldn't compile dictionary snapshot '%s': %s", path, error)
+            return None
+        return path
+
     def save_to_file(self, filepath: str | None = None) -> None:
         """Save the dictionary to a file.
 
-        Saves as json on default. Uses the `temp_dir` with dictionary name and
-        release, if none is provided.
+        Saves as indexed SQLite dictionary store on default, which can be
+        loaded lazily. Saves as JSON, if the `filepath` ends with ".json".
+        Uses the `temp_dir` with dictionary name and release, if no `filepath`
+        is provided.
         """
-        if filepath is None:
-            path = Path(self.temp_dir) / f"{self.name}-{self.release}.json"
-        else:
-            path = Path(filepath)
+        path = self._default_path(".sqlite") if filepath is None else Path(filepath)
         logger.info("Save dictionary to file: %s", path)
-        path.parent.mkdir(parents=True, exist_ok=True)
-        with open(path, "w") as file:
-            json.dump(
-                {
-                    "type": self.name,
-                    "release": self.release,
-                    "properties": self.properties,
-                    "classes": self.classes,
-                    "license": self.license,
-                },
-                file,
-                default=dictionary_serializer,
-            )
+        if path.suffix == ".json":
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "w") as file:
+                json.dump(
+                    {
+                        "type": self.name,
+                        "release": self.release,
+                        "properties": self.properties,
+                        "classes": self.classes,
+                        "license": self.license,
+                    },
+                    file,
+                    default=dictionary_serializer,
+                )
+            return
+
+        properties = list(self.properties.values())
+        classes = list(self.classes.values())
+        reattach = self._detach_store(path)
+        DictionaryStore.write(
+            path,
+            self.name,
+            self.release,
+            self.license,
+            properties=properties,
+            classes=classes,
+        )
+        if reattach:
+            self._attach_store(DictionaryStore(path, self.store_max_cached))
 
     def load_from_file(self, filepath: str | None = None) -> bool:
         """Load the dictionary from a file.
 
-        Checks the `temp_dir` for dictionary name and release, if none is given.
+        Checks the `temp_dir` for a dictionary store or JSON file with
+        dictionary name and release, if none is given. The definitions of a
+        dictionary store are loaded lazily, when they are requested.
         """
         if filepath is None:
-            path = Path(self.temp_dir) / f"{self.name}-{self.release}.json"
+            path = self._default_path(".sqlite")
+            if not path.exists():
+                path = self._default_path(".json")
         else:
             path = Path(filepath)
         if not path.exists():
             logger.debug("Couldn't load dictionary from file. File does not exist: %s", path)
             return False
         logger.info("Load dictionary from file: %s", path)
+        if path.suffix == ".json":
+            self._load_from_json(path)
+            return True
+        try:
+            store = DictionaryStore(path, self.store_max_cached)
+        except sqlite3.Error as error:
+            logger.warning("Couldn't load dictionary store '%s': %s", path, error)
+            return False
+        if store.release != self.release:
+            logger.warning(
+                "Loading release %s for dictionary with release %s.",
+                store.release,
+                self.release,
+            )
+        self._attach_store(store)
+        return True
+
+    def _attach_store(self, store: DictionaryStore) -> None:
+        self._detach_store(store.path)
+        self.properties.stores.append(store)
+        if store.release is not None:
+            if store.release not in self.releases:
+                self.releases[store.release] = DefinitionMapping("classes")
+            self.releases[store.release].stores.append(store)
+
+    def _detach_store(self, path: Path) -> bool:
+        """Remove and close stores loaded from the path, e.g. to overwrite it."""
+        path = path.resolve()
+        stores = [store for store in self.properties.stores if store.path.resolve() == path]
+        for store in stores:
+            self.properties.stores.remove(store)
+            for classes in self.releases.values():
+                if store in classes.stores:
+                    classes.stores.remove(store)
+            store.close()
+        return len(stores) > 0
+
+    def _load_from_json(self, path: Path) -> None:
         with open(path) as file:
             dict_ = json.load(file)
-            if dict_["release"] != self.release:
-                logger.warning(
-                    "Loading release %s for dictionary with release %s.",
-                    dict_["release"],
-                    self.release,
-                )
-            for id_, property_ in dict_["properties"].items():
-                if id_ not in self.properties:
-                    logger.debug("Load property %s: %s", property_["id"], property_["name"])
-                    self.properties[id_] = PropertyDefinition(**property_)
-            if dict_["release"] not in self.releases:
-                self.releases[dict_["release"]] = {}
-            for id_, class_ in dict_["classes"].items():
-                classes = self.releases[dict_["release"]]
-                if id_ not in classes:
-                    logger.debug("Load class %s: %s", class_["id"], class_["name"])
-                    new_class = ClassDefinition(**class_)
-                    new_class.properties = [
-                        self.properties[property_id] for property_id in new_class.properties # type: ignore[index]
-                    ]
-                    classes[id_] = new_class
-        return True
+        if dict_["release"] != self.release:
+            logger.warning(
+                "Loading release %s for dictionary with release %s.",
+                dict_["release"],
+                self.release,
+            )
+        for id_, property_ in dict_["properties"].items():
+            if id_ not in self.properties:
+                self.properties[id_] = PropertyDefinition(**property_)
+        if dict_["release"] not in self.releases:
+            self.releases[dict_["release"]] = DefinitionMapping("classes")
+        classes = self.releases[dict_["release"]]
+        for id_, class_ in dict_["classes"].items():
+            if id_ not in classes:
+                new_class = ClassDefinition(**class_)
+                new_class.properties = [
+                    self.properties[property_id] for property_id in new_class.properties # type: ignore[index]
+                ]
+                classes[id_] = new_class
+        logger.debug(
+            "Loaded %s properties and %s classes.",
+            len(dict_["properties"]),
+            len(dict_["classes"]),
+        )
 
     def save_all_releases(self) -> None:
         """Save all releases currently available in the Dictionary class."""
@@ -4,7 +4,7 @@ import csv
 import json
 import logging
 import re
-import shutil
+import zipfile
 from collections import defaultdict
 from pathlib import Path
 from typing import ClassVar
@@ -14,7 +14,8 @@ from bs4 import BeautifulSoup, Tag
 
 from pdf2aas.model import SimplePropertyDataType, ValueDefinitionKeyType
 
-from .core import ClassDefinition, Dictionary, PropertyDefinition
+from .core import ClassDefinition, Dictionary, PropertyDefinition, open_zip_member
+from .store import DefinitionMapping
 
 logger = logging.getLogger(__name__)
 
@@ -75,10 +76,10 @@ class ECLASS(Dictionary):
 
     Attributes:
         temp_dir (str): Overwrite temporary dictionary for caching the dict.
-        properties (dict[str, PropertyDefinition]): Maps property IDs to
-            PropertyDefinition instances.
-        releases (dict[str, dict[str, ClassDefinition]]): Maps release versions
-            to class definition objects.
+        properties (DefinitionMapping[PropertyDefinition]): Maps property IDs
+            to PropertyDefinition instances.
+        releases (dict[str, DefinitionMapping[ClassDefinition]]): Maps release
+            versions to class definition objects.
         supported_releases (list[str]): A list of supported release versions.
         license (str): A link or note to the license or copyright of the
             dictionary.
@@ -97,8 +98,8 @@ class ECLASS(Dictionary):
 
     class_search_pattern: str = "https://eclass.eu/en/eclass-standard/search-content/show?tx_eclasssearch_ecsearch%5Bdischarge%5D=0&tx_eclasssearch_ecsearch%5Bid%5D={class_id}&tx_eclasssearch_ecsearch%5Blanguage%5D={language}&tx_eclasssearch_ecsearch%5Bversion%5D={release}"
     property_search_pattern: str = "https://eclass.eu/en/eclass-standard/search-content/show?tx_eclasssearch_ecsearch%5Bcc2prdat%5D={property_id}&tx_eclasssearch_ecsearch%5Bdischarge%5D=0&tx_eclasssearch_ecsearch%5Bid%5D=-1&tx_eclasssearch_ecsearch%5Blanguage%5D={language}&tx_eclasssearch_ecsearch%5Bversion%5D={release}"
-    releases: ClassVar[dict[str, dict[str, ClassDefinition]]] = {}
-    properties: ClassVar[dict[str, PropertyDefinition]] = {}
+    releases: ClassVar[dict[str, DefinitionMapping[ClassDefinition]]] = {}
+    properties: ClassVar[DefinitionMapping[PropertyDefinition]] = DefinitionMapping("properties")
     properties_download_failed: ClassVar[dict[str, set[str]]] = {}
     supported_releases: ClassVar[list[str]] = [
         "15.0",
@@ -385,24 +386,16 @@ class ECLASS(Dictionary):
             return None
         return class_id
 
-    def _load_from_release_csv_zip(self, filepath_str: str | Path) -> None:  # noqa: C901, PLR0912, PLR0915
+    def _load_from_release_csv_zip(self, filepath_str: str | Path) -> None:
         logger.info("Load ECLASS dictionary from CSV release zip: %s", filepath_str)
+        with zipfile.ZipFile(filepath_str) as zip_file:
+            self._load_from_release_csv_zip_file(zip_file)
 
-        filepath = Path(filepath_str)
-        zip_dir = filepath.parent / filepath.stem
-        if not zip_dir.exists():
-            try:
-                zip_dir.mkdir(parents=True)
-                shutil.unpack_archive(filepath, zip_dir)
-            except (shutil.ReadError, FileNotFoundError, PermissionError) as e:
-                logger.warning("Error while unpacking ECLASS CSV Release: %s", e)
-                if zip_dir.exists():
-                    shutil.rmtree(zip_dir)
-
+    def _load_from_release_csv_zip_file(self, zip_file: zipfile.ZipFile) -> None:  # noqa: C901, PLR0912, PLR0915
         csv_filename = f"ECLASS{self.release.replace('.','_')}_{{}}_{self.language}.csv"
 
         units = {}
-        with open(zip_dir / csv_filename.format("UN"), encoding="utf-8") as file:
+        with open_zip_member(zip_file, csv_filename.format("UN"), "utf-8") as file:
             # PreferredName;ShortName;Definition;Source;Comment;SINotation;SIName;
             # DINNotation;ECEName;ECECode;NISTName;IECClassification;IrdiUN;
             # NameOfDedicatedQuantity
@@ -411,7 +404,24 @@ class ECLASS(Dictionary):
             for row in reader:
                 units[row[12]] = row[1]  # IrdiUN -> ShortName
 
-        with open(zip_dir / csv_filename.format("PR"), encoding="utf-8") as file:
+        # synonyms are read first, to be part of the definitions when they are built
+        class_keyword_map = defaultdict(list)
+        property_synonym_map = defaultdict(list)
+        with open_zip_member(zip_file, csv_filename.format("KWSY"), "utf-8") as file:
+            # SupplierKW/SupplierSY;Identifier;VersionNumber;IdCC/IdPR;
+            # KeywordValue/SynonymValue;Explanation;ISOLanguageCode;
+            # ISOCountryCode;TypeOfTargetSE;IrdiTarget;IrdiKW/IrdiSY;TypeOfSE
+            reader = csv.reader(file, delimiter=";")
+            next(reader, None)
+            for row in reader:
+                if row[8] == "PR":  # TypeOfTargetSE
+                    property_synonym_map[row[9]].append(row[4])  # IrdiTarget -> SynonymValue
+                    continue
+                if row[8] != "CC":  # TypeOfTargetSE
+                    continue
+                class_keyword_map[row[1]].append(row[4])  # Identifier -> KeywordValue/SynonymValue
+
+        with open_zip_member(zip_file, csv_filename.format("PR"), "utf-8") as file:
             # Supplier;IdPR;Identifier;VersionNumber;VersionDate;RevisionNumber;
             # PreferredName;ShortName;Definition;SourceOfDefinition;Note;Remark;
             # PreferredSymbol;IrdiUN;ISOLanguageCode;ISOCountryCode;Category;
@@ -426,11 +436,12 @@ class ECLASS(Dictionary):
                     type=eclass_datatype_to_type.get(row[19], "string"),  # DataType
                     definition={row[14]: row[8]},  # ISOLanguageCode: Definition
                     unit=units.get(row[13], ""),  # IrdiUN
+                    synonyms=property_synonym_map.get(irdi, []),
                 )
                 self.properties[irdi] = property_  # type: ignore[assignment]
 
         values = {}
-        with open(zip_dir / csv_filename.format("VA"), encoding="utf-8") as file:
+        with open_zip_member(zip_file, csv_filename.format("VA"), "utf-8") as file:
             # Supplier;IdVA;Identifier;VersionNumber;RevisionNumber;VersionDate;
             # PreferredName;ShortName;Definition;Reference;ISOLanguageCode;
             # ISOCountryCode;IrdiVA;DataType
@@ -443,9 +454,10 @@ class ECLASS(Dictionary):
                     "definition": row[8],  # Definition
                 }
 
-        with open(
-            zip_dir / csv_filename.format("CC_PR_VA_suggested_incl_constraints"),
-            encoding="utf-8",
+        with open_zip_member(
+            zip_file,
+            csv_filename.format("CC_PR_VA_suggested_incl_constraints"),
+            "utf-8",
         ) as file:
             # IrdiCC;IrdiPR;IrdiVA;Constraint
             reader = csv.reader(file, delimiter=";")
@@ -478,7 +490,7 @@ class ECLASS(Dictionary):
                     property_.values = property_values
 
         class_property_map: dict[str, list] = defaultdict(list)
-        with open(zip_dir / csv_filename.format("CC_PR"), encoding="utf-8") as file:
+        with open_zip_member(zip_file, csv_filename.format("CC_PR"), "utf-8") as file:
             # SupplierIdCC;IdCC;ClassCodedName;SupplierIdPR;IdPR;IrdiCC;IrdiPR;
             # PreferredNameBlockAspect
             reader = csv.reader(file, delimiter=";")
@@ -488,19 +500,7 @@ class ECLASS(Dictionary):
                     self.properties.get(row[6], []),
                 )  # ClassCodedName -> IrdiPR -> PropertyDefinition
 
-        class_keyword_map = defaultdict(list)
-        with open(zip_dir / csv_filename.format("KWSY"), encoding="utf-8") as file:
-            # SupplierKW/SupplierSY;Identifier;VersionNumber;IdCC/IdPR;
-            # KeywordValue/SynonymValue;Explanation;ISOLanguageCode;
-            # ISOCountryCode;TypeOfTargetSE;IrdiTarget;IrdiKW/IrdiSY;TypeOfSE
-            reader = csv.reader(file, delimiter=";")
-            next(reader, None)
-            for row in reader:
-                if row[8] != "CC":  # TypeOfTargetSE
-                    continue
-                class_keyword_map[row[1]].append(row[4])  # Identifier -> KeywordValue/SynonymValue
-
-        with open(zip_dir / csv_filename.format("CC"), encoding="utf-8") as file:
+        with open_zip_member(zip_file, csv_filename.format("CC"), "utf-8") as file:
             # Supplier;IdCC;Identifier;VersionNumber;VersionDate;RevisionNumber;
             # CodedName;PreferredName;Definition;ISOLanguageCode;ISOCountryCode;
             # Note;Remark;Level;MKSubclass;MKKeyword;IrdiCC
@@ -524,18 +524,20 @@ class ECLASS(Dictionary):
 
         Searches in `self.tempdir` for "ECLASS-<release>-...CSV....zip" file,
         if no filepath is given. Otherwise, searches for cached dicts.
+        A snapshot compiled from the zip file is preferred, if it is newer
+        than the zip file (c.f. `compile_snapshot`).
         """
-        temp_path = Path(self.temp_dir)
-        if filepath is None and temp_path.exists():
-            for file in temp_path.iterdir():
-                if re.match(f"{self.name}-{self.release}.*CSV.*\\.zip",
-                            file.name, re.IGNORECASE):
-                    try:
-                        self._load_from_release_csv_zip(str(file))
-                    except OSError as e:
-                        logger.warning("Error while loading csv zip '%s': %s", str(file), e)
-                        continue
-                    return True
+        if filepath is None and self._snapshot_is_current():
+            return super().load_from_file(str(self._snapshot_path()))
+        if filepath is None:
+            for file in self._release_zips():
+                try:
+                    self._load_from_release_csv_zip(str(file))
+                except (OSError, zipfile.BadZipFile) as e:
+                    logger.warning("Error while loading csv zip '%s': %s", str(file), e)
+                    continue
+                self.compile_snapshot()
+                return True
         return super().load_from_file(filepath)
 
     def _parse_html_eclass_valuelist(
@@ -4,8 +4,8 @@ import csv
 import logging
 import os
 import re
-import shutil
 import time
+import zipfile
 from collections import defaultdict
 from pathlib import Path
 from typing import ClassVar
@@ -14,7 +14,8 @@ import requests
 
 from pdf2aas.model import SimplePropertyDataType, ValueDefinitionKeyType
 
-from .core import ClassDefinition, Dictionary, PropertyDefinition
+from .core import ClassDefinition, Dictionary, PropertyDefinition, open_zip_member
+from .store import DefinitionMapping
 
 logger = logging.getLogger(__name__)
 
@@ -40,10 +41,10 @@ class ETIM(Dictionary):
     Attributes:
         temp_dir (str): The directory path used for loading/saving a cached
             dictionary.
-        properties (dict[str, PropertyDefinition]): Maps property IDs to
-            PropertyDefinition instances.
-        releases (dict[str, dict[str, ClassDefinition]]): Maps release versions
-            to class definition objects.
+        properties (DefinitionMapping[PropertyDefinition]): Maps property IDs
+            to PropertyDefinition instances.
+        releases (dict[str, DefinitionMapping[ClassDefinition]]): Maps release
+            versions to class definition objects.
         supported_releases (list[str]): A list of supported release versions.
         license (str): A link or note to the license or copyright of the
             dictionary.
@@ -52,8 +53,8 @@ class ETIM(Dictionary):
 
     """
 
-    releases: ClassVar[dict[str, dict[str, ClassDefinition]]] = {}
-    properties: ClassVar[dict[str, PropertyDefinition]] = {}
+    releases: ClassVar[dict[str, DefinitionMapping[ClassDefinition]]] = {}
+    properties: ClassVar[DefinitionMapping[PropertyDefinition]] = DefinitionMapping("properties")
     supported_releases: ClassVar[list[str]] = [
         "9.0",
         "8.0",
@@ -237,46 +238,38 @@ class ETIM(Dictionary):
             return None
         return class_id_match.group(0)
 
-    def _load_from_release_csv_zip(self, filepath_str: str | Path) -> None:  # noqa: C901, PLR0912
+    def _load_from_release_csv_zip(self, filepath_str: str | Path) -> None:
         logger.info("Load ETIM dictionary from CSV release zip: %s", filepath_str)
+        with zipfile.ZipFile(filepath_str) as zip_file:
+            self._load_from_release_csv_zip_file(zip_file)
 
-        filepath = Path(filepath_str)
-        zip_dir = filepath.parent / filepath.stem
-        if not zip_dir.exists():
-            try:
-                zip_dir.mkdir(parents=True)
-                shutil.unpack_archive(filepath, zip_dir)
-            except (shutil.ReadError, FileNotFoundError, PermissionError) as e:
-                logger.warning("Error while unpacking ETIM CSV Release: %s", e)
-                if zip_dir.exists():
-                    shutil.rmtree(zip_dir)
-
+    def _load_from_release_csv_zip_file(self, zip_file: zipfile.ZipFile) -> None:  # noqa: C901
         synonyms = defaultdict(list)
-        with open(zip_dir / "ETIMARTCLASSSYNONYMMAP.csv", encoding="utf-16") as file:
+        with open_zip_member(zip_file, "ETIMARTCLASSSYNONYMMAP.csv", "utf-16") as file:
             reader = csv.DictReader(file, delimiter=";")
             for row in reader:
                 synonyms[row["ARTCLASSID"]].append(row["CLASSSYNONYM"])
 
         feature_descriptions = {}
-        with open(zip_dir / "ETIMFEATURE.csv", encoding="utf-16") as file:
+        with open_zip_member(zip_file, "ETIMFEATURE.csv", "utf-16") as file:
             reader = csv.DictReader(file, delimiter=";")
             for row in reader:
                 feature_descriptions[row["FEATUREID"]] = row["FEATUREDESC"]
 
         unit_abbreviations = {}
-        with open(zip_dir / "ETIMUNIT.csv", encoding="utf-16") as file:
+        with open_zip_member(zip_file, "ETIMUNIT.csv", "utf-16") as file:
             reader = csv.DictReader(file, delimiter=";")
             for row in reader:
                 unit_abbreviations[row["UNITOFMEASID"]] = row["UNITDESC"]
 
         value_descriptions = {}
-        with open(zip_dir / "ETIMVALUE.csv", encoding="utf-16") as file:
+        with open_zip_member(zip_file, "ETIMVALUE.csv", "utf-16") as file:
             reader = csv.DictReader(file, delimiter=";")
             for row in reader:
                 value_descriptions[row["VALUEID"]] = row["VALUEDESC"]
 
         feature_value_map = {}
-        with open(zip_dir / "ETIMARTCLASSFEATUREVALUEMAP.csv", encoding="utf-16") as file:
+        with open_zip_member(zip_file, "ETIMARTCLASSFEATUREVALUEMAP.csv", "utf-16") as file:
             reader = csv.DictReader(file, delimiter=";")
             for row in reader:
                 value = {
@@ -290,7 +283,7 @@ class ETIM(Dictionary):
                     feature_value_map[row["ARTCLASSFEATURENR"]].append(value)
 
         class_feature_map = defaultdict(list)
-        with open(zip_dir / "ETIMARTCLASSFEATUREMAP.csv", encoding="utf-16") as file:
+        with open_zip_member(zip_file, "ETIMARTCLASSFEATUREMAP.csv", "utf-16") as file:
             reader = csv.DictReader(file, delimiter=";")
             for row in reader:
                 feature = {
@@ -312,7 +305,7 @@ class ETIM(Dictionary):
                     feature["values"] = values
                 class_feature_map[row["ARTCLASSID"]].append(feature)
 
-        with open(zip_dir / "ETIMARTCLASS.csv", encoding="utf-16") as file:
+        with open_zip_member(zip_file, "ETIMARTCLASS.csv", "utf-16") as file:
             reader = csv.DictReader(file, delimiter=";")
             for row in reader:
                 class_dict = {
@@ -334,17 +327,18 @@ class ETIM(Dictionary):
         """Load a whole ETIM release from CSV zip file.
 
         Searches in `self.tempdir` for "ETIM-<release>-...CSV....zip" file, if
-        no filepath is given.
+        no filepath is given. A snapshot compiled from the zip file is
+        preferred, if it is newer than the zip file (c.f. `compile_snapshot`).
         """
-        temp_path = Path(self.temp_dir)
-        if filepath is None and temp_path.exists():
-            for file in temp_path.iterdir():
-                if re.match(f"{self.name}-{self.release}.*CSV.*\\.zip",
-                            file.name, re.IGNORECASE):
-                    try:
-                        self._load_from_release_csv_zip(str(file))
-                    except OSError as e:
-                        logger.warning("Error while loading csv zip '%s': %s", str(file), e)
-                    return True
+        if filepath is None and self._snapshot_is_current():
+            return super().load_from_file(str(self._snapshot_path()))
+        if filepath is None:
+            for file in self._release_zips():
+                try:
+                    self._load_from_release_csv_zip(str(file))
+                except (OSError, zipfile.BadZipFile) as e:
+                    logger.warning("Error while loading csv zip '%s': %s", str(file), e)
+                else:
+                    self.compile_snapshot()
+                return True
         return super().load_from_file(filepath)
-
@@ -0,0 +1,260 @@
+"""Indexed SQLite store to load class and property definitions lazily."""
+
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+from collections import OrderedDict
+from collections.abc import Iterable, Iterator, MutableMapping
+from dataclasses import asdict
+from pathlib import Path
+from typing import Literal, TypeVar
+
+from pdf2aas.model import ClassDefinition, PropertyDefinition
+
+logger = logging.getLogger(__name__)
+
+DefinitionKind = Literal["properties", "classes"]
+DefinitionType = TypeVar("DefinitionType", PropertyDefinition, ClassDefinition)
+
+
+class DictionaryStore:
+    """Read only SQLite file with the definitions of a dictionary release.
+
+    Each definition is stored as JSON in a table indexed by its id. The
+    definitions are materialized on request and kept in a least recently used
+    (LRU) cache. Classes reference their properties by id.
+
+    The file is memory-mapped, so that multiple processes reading the same
+    store share its pages via the operating system page cache instead of each
+    holding a parsed copy of the dictionary.
+
+    Attributes:
+        path (Path): Path to the SQLite file.
+        max_cached (int): Maximum number of materialized classes and properties
+            kept in memory each. Defaults to 4096.
+        mmap_size (int): Maximum number of bytes of the file to memory-map.
+            Defaults to 256 MiB. 0 disables memory-mapping.
+        type (str | None): Name of the dictionary type, e.g. ECLASS.
+        release (str | None): Release of the dictionary.
+        license (str | None): License of the dictionary.
+
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        max_cached: int = 4096,
+        mmap_size: int = 256 * 1024**2,
+    ) -> None:
+        """Open the store, raising `sqlite3.Error` if it is no valid store."""
+        self.path = Path(path)
+        self.max_cached = max_cached
+        self.mmap_size = mmap_size
+        self._lock = threading.Lock()
+        self._cached: dict[DefinitionKind, OrderedDict] = {
+            "properties": OrderedDict(),
+            "classes": OrderedDict(),
+        }
+        self._connection = sqlite3.connect(
+            f"{self.path.resolve().as_uri()}?mode=ro",
+            uri=True,
+            check_same_thread=False,
+        )
+        try:
+            self._connection.execute(f"PRAGMA mmap_size = {int(mmap_size)}")
+            meta = dict(self._connection.execute("SELECT key, value FROM meta").fetchall())
+        except sqlite3.Error:
+            self._connection.close()
+            raise
+        self.type = meta.get("type")
+        self.release = meta.get("release")
+        self.license = meta.get("license")
+
+    @staticmethod
+    def write(
+        path: str | Path,
+        type_: str,
+        release: str,
+        license_: str | None,
+        *,
+        properties: Iterable[PropertyDefinition],
+        classes: Iterable[ClassDefinition],
+    ) -> None:
+        """Write the definitions to a new SQLite store, replacing existing files.
+
+        The store is written to a unique temporary file in the same directory,
+        which replaces the target at once, so that concurrent writers and
+        readers of the same path never see a partially written store.
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_name = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".", suffix=".tmp")
+        os.close(fd)
+        temp_path = Path(temp_name)
+        try:
+            connection = sqlite3.connect(temp_path)
+            try:
+                with connection:
+                    connection.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+                    connection.execute("CREATE TABLE properties (id TEXT PRIMARY KEY, data TEXT)")
+                    connection.execute("CREATE TABLE classes (id TEXT PRIMARY KEY, data TEXT)")
+                    connection.executemany(
+                        "INSERT INTO meta VALUES (?, ?)",
+                        [("type", type_), ("release", release), ("license", license_)],
+                    )
+                    connection.executemany(
+                        "INSERT OR REPLACE INTO properties VALUES (?, ?)",
+                        ((p.id, json.dumps(asdict(p))) for p in properties),
+                    )
+                    connection.executemany(
+                        "INSERT OR REPLACE INTO classes VALUES (?, ?)",
+                        ((c.id, _class_to_json(c)) for c in classes),
+                    )
+            finally:
+                connection.close()
+            temp_path.replace(path)
+        finally:
+            temp_path.unlink(missing_ok=True)
+
+    def get(self, kind: DefinitionKind, id_: str) -> PropertyDefinition | ClassDefinition | None:
+        """Get the class or property definition with the given id or None."""
+        with self._lock:
+            cached = self._cached[kind]
+            definition = cached.get(id_)
+            if definition is not None:
+                cached.move_to_end(id_)
+                return definition
+            row = self._connection.execute(
+                f"SELECT data FROM {kind} WHERE id = ?",  # noqa: S608
+                (id_,),
+            ).fetchone()
+        if row is None:
+            return None
+        data = json.loads(row[0])
+        if kind == "properties":
+            definition = PropertyDefinition(**data)
+        else:
+            definition = ClassDefinition(**data)
+            definition.properties = [
+                property_
+                for property_id in data["properties"]
+                if isinstance(property_ := self.get("properties", property_id), PropertyDefinition)
+            ]
+        with self._lock:
+            cached[id_] = definition
+            while len(cached) > self.max_cached:
+                cached.popitem(last=False)
+        return definition
+
+    def get_property(self, property_id: str) -> PropertyDefinition | None:
+        """Get the property definition with the given id or None."""
+        property_ = self.get("properties", property_id)
+        return property_ if isinstance(property_, PropertyDefinition) else None
+
+    def get_class(self, class_id: str) -> ClassDefinition | None:
+        """Get the class definition with the given id and its properties or None."""
+        class_ = self.get("classes", class_id)
+        return class_ if isinstance(class_, ClassDefinition) else None
+
+    def contains(self, kind: DefinitionKind, id_: str) -> bool:
+        """Check if the store contains a class or property with the id."""
+        with self._lock:
+            return (
+                self._connection.execute(
+                    f"SELECT 1 FROM {kind} WHERE id = ?",  # noqa: S608
+                    (id_,),
+                ).fetchone()
+                is not None
+            )
+
+    def ids(self, kind: DefinitionKind) -> list[str]:
+        """Get the ids of all classes or properties in the store."""
+        with self._lock:
+            return [row[0] for row in self._connection.execute(f"SELECT id FROM {kind}")]  # noqa: S608
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._connection.close()
+
+
+def _class_to_json(class_: ClassDefinition) -> str:
+    return json.dumps(
+        {
+            "id": class_.id,
+            "name": class_.name,
+            "description": class_.description,
+            "keywords": class_.keywords,
+            "properties": [property_.id for property_ in class_.properties],
+        },
+    )
+
+
+class DefinitionMapping(MutableMapping[str, DefinitionType]):
+    """Maps ids to definitions held in memory or loaded lazily from stores.
+
+    Definitions added to the mapping are kept in memory and take precedence
+    over the attached stores, which are searched in the order they were added.
+
+    Attributes:
+        kind (DefinitionKind): Whether "properties" or "classes" are mapped.
+        data (dict): Definitions held in memory.
+        stores (list[DictionaryStore]): Stores to load missing definitions from.
+
+    """
+
+    def __init__(self, kind: DefinitionKind) -> None:
+        """Initialize an empty mapping without stores."""
+        self.kind: DefinitionKind = kind
+        self.data: dict[str, DefinitionType] = {}
+        self.stores: list[DictionaryStore] = []
+
+    def __getitem__(self, key: str) -> DefinitionType:
+        """Get the definition from memory or the first store containing it."""
+        definition = self.data.get(key)
+        if definition is not None:
+            return definition
+        for store in self.stores:
+            definition = store.get(self.kind, key)  # type: ignore[assignment]
+            if definition is not None:
+                return definition
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: DefinitionType) -> None:
+        """Add the definition to the memory."""
+        self.data[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        """Delete the definition from memory. Stored definitions can't be deleted."""
+        del self.data[key]
+
+    def __contains__(self, key: object) -> bool:
+        """Check the memory and stores without materializing the definition."""
+        if key in self.data:
+            return True
+        return isinstance(key, str) and any(store.contains(self.kind, key) for store in self.stores)
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the ids in memory, followed by the ids of the stores."""
+        yield from self.data
+        seen = set(self.data)
+        for store in self.stores:
+            for id_ in store.ids(self.kind):
+                if id_ not in seen:
+                    seen.add(id_)
+                    yield id_
+
+    def __len__(self) -> int:
+        """Get the number of distinct ids in memory and stores."""
+        if not self.stores:
+            return len(self.data)
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        """Represent the mapping without materializing the stored definitions."""
+        return (
+            f"{self.__class__.__name__}({self.kind!r}, {len(self.data)} in memory, "
+            f"stores={[str(store.path) for store in self.stores]})"
+        )
@@ -4,7 +4,17 @@ from typing import ClassVar
 
 
 class EvaluationPrompt:
-    """Represent statistics of a single prompt."""
+    """Represent statistics of a single prompt.
+
+    Cached prompts were answered from a response cache of the extractor.
+    They are counted separately and cause no costs.
+
+    Cached input tokens were served from the prompt cache of the provider,
+    c.f. `usage.prompt_tokens_details.cached_tokens`. They are part of the
+    input tokens and charged with the input price times the factor in
+    `cached_input_price_factors`. Models without a known discount are charged
+    the full input price for cached tokens.
+    """
 
     token_prices: ClassVar[dict[str, tuple[float, float]]] = {
         "gpt-3.5-turbo-0125": (0.5, 1.5),
@@ -14,17 +24,27 @@ class EvaluationPrompt:
         "gpt-4o-mini": (0.15, 0.6),
         "gpt-4o-mini-2024-07-18": (0.15, 0.6),
     }
+    cached_input_price_factors: ClassVar[dict[str, float]] = {
+        "gpt-4o": 0.5,
+        "gpt-4o-mini": 0.5,
+        "gpt-4o-mini-2024-07-18": 0.5,
+    }
 
     def __init__(
         self,
         input_token: int = 0,
         output_token: int = 0,
         model: str | None = None,
+        *,
+        cached: bool = False,
+        cached_input_tokens: int = 0,
     ) -> None:
         """Initialize Evaluation prompt with zero values."""
         self.input_tokens: int = input_token
         self.output_tokens: int = output_token
         self.model: str | None = model
+        self.cached: bool = cached
+        self.cached_input_tokens: int = cached_input_tokens
 
     @staticmethod
     def from_raw_results(raw_results: list) -> list["EvaluationPrompt"]:
@@ -35,22 +55,29 @@ class EvaluationPrompt:
         for result in raw_results:
             if not isinstance(result, dict):
                 continue
+            usage = result.get("usage") or {}
+            prompt_tokens_details = usage.get("prompt_tokens_details") or {}
             prompts.append(
                 EvaluationPrompt(
-                    result.get("usage", {}).get("prompt_tokens", 0),
-                    result.get("usage", {}).get("completion_tokens", 0),
+                    usage.get("prompt_tokens", 0),
+                    usage.get("completion_tokens", 0),
                     result.get("model"),
+                    cached=result.get("cached", False),
+                    cached_input_tokens=prompt_tokens_details.get("cached_tokens") or 0,
                 ),
             )
         return prompts
 
     def calc_costs(self) -> float:
         """Calculate the total cost of the processed input and output tokens."""
-        if self.model is None or self.model not in self.token_prices:
+        if self.cached or self.model is None or self.model not in self.token_prices:
             return 0.0
+        input_price, output_price = self.token_prices[self.model]
+        cached_input_price_factor = self.cached_input_price_factors.get(self.model, 1.0)
         return (
-            (self.input_tokens * self.token_prices[self.model][0])
-            + (self.output_tokens * self.token_prices[self.model][1])
+            ((self.input_tokens - self.cached_input_tokens) * input_price)
+            + (self.cached_input_tokens * input_price * cached_input_price_factor)
+            + (self.output_tokens * output_price)
         ) * 1e-6
 
     @staticmethod
@@ -59,12 +86,19 @@ class EvaluationPrompt:
         if len(costs) == 0:
             return ""
         models = set()
+        cached = 0
         input_tokens = 0
+        cached_input_tokens = 0
         output_tokens = 0
         costs_sum: float = 0
         for cost in costs:
             models.add(cost.model)
+            if cost.cached:
+                cached += 1
+                continue
             input_tokens += cost.input_tokens
+            cached_input_tokens += cost.cached_input_tokens
             output_tokens += cost.output_tokens
             costs_sum += cost.calc_costs()
-        return f"models: {list(set(models))}\nprompts: {len(costs):3d}\ntokens: {input_tokens:,d} -> {output_tokens:,d}\ncosts: {costs_sum:.4f} $"  # noqa: E501
+        cache_rate = cached_input_tokens / input_tokens if input_tokens else 0
+        return f"models: {list(set(models))}\nprompts: {len(costs):3d} ({cached} cached)\ntokens: {input_tokens:,d} -> {output_tokens:,d}\nprompt cache: {cached_input_tokens:,d} input tokens ({cache_rate:.0%})\ncosts: {costs_sum:.4f} $"  # noqa: E501
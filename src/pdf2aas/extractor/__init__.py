@@ -2,13 +2,23 @@
 
 from .core import Extractor
 from .custom_llm_client import CustomLLMClient, CustomLLMClientHTTP
+from .mapping import DefinitionMatcher
+from .property_cascade import PropertyCascade
 from .property_llm import PropertyLLM
 from .property_llm_search import PropertyLLMSearch
+from .property_regex import PropertyRegex
+from .rate_limiter import RateLimiter
+from .retrieval import BM25Retriever
 
 __all__ = [
+    "BM25Retriever",
     "CustomLLMClient",
     "CustomLLMClientHTTP",
+    "DefinitionMatcher",
     "Extractor",
+    "PropertyCascade",
     "PropertyLLM",
     "PropertyLLMSearch",
+    "PropertyRegex",
+    "RateLimiter",
 ]
@@ -1,7 +1,10 @@
 """Abstract extractor class to search or extract property values from a document."""
 
+import asyncio
 from abc import ABC, abstractmethod
+from collections.abc import Iterator
 
+from pdf2aas.metrics import MetricsSink
 from pdf2aas.model.property import Property, PropertyDefinition
 
 
@@ -11,9 +14,51 @@ class Extractor(ABC):
     @abstractmethod
     def extract(
         self,
-        datasheet: str,
+        datasheet: list[str] | str,
         property_definition: PropertyDefinition | list[PropertyDefinition],
         raw_prompts: list | None = None,
         raw_results: list | None = None,
     ) -> list[Property]:
-        """Try to extract the defined properties from the given datasheet text."""
+        """Try to extract the defined properties from the given datasheet text or pages."""
+
+    async def aextract(
+        self,
+        datasheet: list[str] | str,
+        property_definition: PropertyDefinition | list[PropertyDefinition],
+        raw_prompts: list | None = None,
+        raw_results: list | None = None,
+    ) -> list[Property]:
+        """Extract the defined properties asynchronously.
+
+        Runs :meth:`extract` in a separate thread by default. Extractors with
+        native asyncio support overwrite this method.
+        """
+        return await asyncio.to_thread(
+            self.extract,
+            datasheet,
+            property_definition,
+            raw_prompts,
+            raw_results,
+        )
+
+    def extract_stream(
+        self,
+        datasheet: list[str] | str,
+        property_definition: PropertyDefinition | list[PropertyDefinition],
+        raw_prompts: list | None = None,
+        raw_results: list | None = None,
+    ) -> Iterator[Property]:
+        """Yield the extracted properties as soon as they are available.
+
+        Yields the result of :meth:`extract` by default. Extractors that can
+        stream their results overwrite this method.
+        """
+        yield from self.extract(datasheet, property_definition, raw_prompts, raw_results)
+
+    def set_metrics(self, metrics: MetricsSink | None, *, overwrite: bool = True) -> None:  # noqa: B027
+        """Set the sink for the metrics of the extractor and its inner extractors.
+
+        Extractors that record no metrics ignore the sink by default. Composed
+        extractors pass it on to the extractors they are composed of. Keeps
+        sinks that are already set, if `overwrite` is False.
+        """
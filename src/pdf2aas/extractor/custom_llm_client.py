@@ -1,11 +1,22 @@
 """Classes to dfeine custom clients to be used by the LLM extractors."""
 
+import asyncio
 import json
 import logging
+import random
+import threading
+import time
 from abc import ABC, abstractmethod
-from copy import deepcopy
+from collections.abc import AsyncGenerator, Mapping
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
+
+from .rate_limiter import RateLimiter
+from .tokens import estimate_message_tokens
 
 logger = logging.getLogger(__name__)
 
@@ -43,6 +54,28 @@ class CustomLLMClient(ABC):
 
         """
 
+    async def acreate_completions(
+        self,
+        messages: list[dict[str, str]],
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        response_format: dict,
+    ) -> tuple[str | None, str | None]:
+        """Create completions asynchronously.
+
+        Runs :meth:`create_completions` in a separate thread by default.
+        Clients with native asyncio support overwrite this method.
+        """
+        return await asyncio.to_thread(
+            self.create_completions,
+            messages,
+            model,
+            temperature,
+            max_tokens,
+            response_format,
+        )
+
 
 class CustomLLMClientHTTP(CustomLLMClient):
     """Custom LLM client that communicates with an HTTP endpoint.
@@ -65,9 +98,24 @@ class CustomLLMClientHTTP(CustomLLMClient):
         verify (bool, optional): False will skip request SSL verification.
             C.f. `requests.post` argument.
         timeout (float, optional): Seconds till the HTTP requests timeout is raised.
+        pool_size (int): Maximum number of connections kept open to the
+            endpoint. The connections are reused across calls.
+        backoff_factor (float): Base delay in seconds between retries. The
+            delay is drawn randomly between 0 and `backoff_factor * 2**attempt`
+            (exponential backoff with full jitter). A "Retry-After" header of
+            429 and 503 responses takes precedence.
+        backoff_max (float): Maximum delay in seconds between retries, if no
+            "Retry-After" header is given.
+        deadline (float | None): Maximum seconds for a completion including all
+            retries and delays. None means no deadline.
+        rate_limiter (RateLimiter | None): Paces every attempt to stay below
+            requests and tokens per minute limits of the endpoint. Don't set it
+            additionally on the extractor using this client.
 
     """
 
+    retryable_status_codes: tuple[int, ...] = (429, 503)
+
     def __init__(
         self,
         endpoint: str,
@@ -79,6 +127,11 @@ class CustomLLMClientHTTP(CustomLLMClient):
         timeout: float = 120,
         *,
         verify: bool | None = None,
+        pool_size: int = 10,
+        backoff_factor: float = 0.5,
+        backoff_max: float = 30,
+        deadline: float | None = None,
+        rate_limiter: RateLimiter | None = None,
     ) -> None:
         """Initialize a custom LLM client for HTTP connections with defaults.
 
@@ -102,6 +155,16 @@ class CustomLLMClientHTTP(CustomLLMClient):
         self.retries = retries
         self.verify = verify
         self.timeout = timeout
+        self.pool_size = pool_size
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.deadline = deadline
+        self.rate_limiter = rate_limiter
+        self._session: requests.Session | None = None
+        self._session_lock = threading.Lock()
+        self._async_client: httpx.AsyncClient | None = None
+        self._async_client_loop: asyncio.AbstractEventLoop | None = None
+        self._async_client_lifetime: AsyncGenerator[httpx.AsyncClient, None] | None = None
 
     def create_completions(
         self,
@@ -126,6 +189,245 @@ class CustomLLMClientHTTP(CustomLLMClient):
              and the raw result.
 
         """
+        request_payload = self._create_request_payload(
+            messages,
+            model,
+            temperature,
+            max_tokens,
+            response_format,
+        )
+        if request_payload is None:
+            return None, None
+        headers = self._create_headers()
+        session = self._get_session()
+        deadline = self._start_deadline()
+        estimated_tokens = estimate_message_tokens(messages, model) + max_tokens
+
+        result = None
+        for attempt in range(self.retries + 1):
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire(estimated_tokens)
+            timeout = self._remaining_timeout(deadline)
+            if timeout <= 0:
+                logger.error("Deadline for the custom LLM endpoint exceeded.")
+                break
+            try:
+                response = session.post(
+                    self.endpoint,
+                    headers=headers,
+                    data=request_payload,
+                    verify=self.verify,
+                    timeout=timeout,
+                )
+                response.raise_for_status()
+                result = response.json()
+                break
+            except requests.exceptions.RequestException as error:
+                logger.exception("Error requesting the custom LLM endpoint (attempt %s).", attempt)
+                delay = self._retry_delay(
+                    attempt,
+                    error.response.status_code if error.response is not None else None,
+                    error.response.headers if error.response is not None else None,
+                    deadline,
+                )
+            if delay is None:
+                break
+            time.sleep(delay)
+        if result is None:
+            return None, None
+        if self.rate_limiter is not None:
+            self.rate_limiter.reconcile_usage(estimated_tokens, result)
+        return self.evaluate_result_path(result), result
+
+    async def acreate_completions(
+        self,
+        messages: list[dict[str, str]],
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        response_format: dict,
+    ) -> tuple[str | None, str | None]:
+        """Create completions asynchronously using the specified HTTP endpoint.
+
+        Uses an `httpx.AsyncClient`, which is shared by all requests of the
+        running event loop. C.f. :meth:`create_completions` for details.
+        """
+        request_payload = self._create_request_payload(
+            messages,
+            model,
+            temperature,
+            max_tokens,
+            response_format,
+        )
+        if request_payload is None:
+            return None, None
+        headers = self._create_headers()
+        client = await self._get_async_client()
+        deadline = self._start_deadline()
+        estimated_tokens = estimate_message_tokens(messages, model) + max_tokens
+
+        result = None
+        for attempt in range(self.retries + 1):
+            if self.rate_limiter is not None:
+                await self.rate_limiter.aacquire(estimated_tokens)
+            timeout = self._remaining_timeout(deadline)
+            if timeout <= 0:
+                logger.error("Deadline for the custom LLM endpoint exceeded.")
+                break
+            try:
+                response = await client.post(
+                    self.endpoint,
+                    headers=headers,
+                    content=request_payload,
+                    timeout=timeout,
+                )
+                response.raise_for_status()
+                result = response.json()
+                break
+            except (httpx.HTTPError, json.JSONDecodeError) as error:
+                logger.exception("Error requesting the custom LLM endpoint (attempt %s).", attempt)
+                error_response = (
+                    error.response if isinstance(error, httpx.HTTPStatusError) else None
+                )
+                delay = self._retry_delay(
+                    attempt,
+                    error_response.status_code if error_response is not None else None,
+                    error_response.headers if error_response is not None else None,
+                    deadline,
+                )
+            if delay is None:
+                break
+            await asyncio.sleep(delay)
+        if result is None:
+            return None, None
+        if self.rate_limiter is not None:
+            self.rate_limiter.reconcile_usage(estimated_tokens, result)
+        return self.evaluate_result_path(result), result
+
+    def _get_session(self) -> requests.Session:
+        with self._session_lock:
+            if self._session is None:
+                self._session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=self.pool_size,
+                    pool_maxsize=self.pool_size,
+                )
+                self._session.mount("http://", adapter)
+                self._session.mount("https://", adapter)
+            return self._session
+
+    def close(self) -> None:
+        """Close the pooled connections of the synchronous requests session."""
+        with self._session_lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+    async def aclose(self) -> None:
+        """Close the pooled connections of the asynchronous client.
+
+        Done automatically, when `asyncio.run` shuts down the event loop the
+        client was used in. Call it to close the connections earlier.
+        """
+        lifetime = self._async_client_lifetime
+        self._async_client = None
+        self._async_client_loop = None
+        self._async_client_lifetime = None
+        if lifetime is not None:
+            await lifetime.aclose()
+
+    def _start_deadline(self) -> float | None:
+        return None if self.deadline is None else time.monotonic() + self.deadline
+
+    def _remaining_timeout(self, deadline: float | None) -> float:
+        if deadline is None:
+            return self.timeout
+        return min(self.timeout, deadline - time.monotonic())
+
+    def _retry_delay(
+        self,
+        attempt: int,
+        status_code: int | None,
+        headers: Mapping[str, str] | None,
+        deadline: float | None,
+    ) -> float | None:
+        """Get the seconds to wait before the next attempt or None to stop."""
+        if attempt >= self.retries:
+            return None
+        delay = self._retry_after(status_code, headers)
+        if delay is None:
+            delay = random.uniform(  # noqa: S311
+                0,
+                min(self.backoff_max, self.backoff_factor * 2**attempt),
+            )
+        if deadline is not None and time.monotonic() + delay >= deadline:
+            logger.error("Retry in %.1fs would exceed the deadline.", delay)
+            return None
+        logger.debug("Retry custom LLM endpoint in %.2fs.", delay)
+        return delay
+
+    def _retry_after(
+        self,
+        status_code: int | None,
+        headers: Mapping[str, str] | None,
+    ) -> float | None:
+        if status_code not in self.retryable_status_codes or headers is None:
+            return None
+        retry_after = headers.get("Retry-After")
+        if retry_after is None:
+            return None
+        try:
+            return max(float(retry_after), 0)
+        except ValueError:
+            pass
+        try:
+            retry_date = parsedate_to_datetime(retry_after)
+        except (TypeError, ValueError):
+            logger.warning("Couldn't parse Retry-After header: %s", retry_after)
+            return None
+        return max((retry_date - datetime.now(tz=timezone.utc)).total_seconds(), 0)
+
+    async def _get_async_client(self) -> httpx.AsyncClient:
+        # The connection pool of an AsyncClient is bound to its event loop.
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_client_loop is not loop:
+            lifetime = self._close_with_event_loop(
+                httpx.AsyncClient(
+                    verify=self.verify if self.verify is not None else True,
+                    limits=httpx.Limits(
+                        max_connections=self.pool_size,
+                        max_keepalive_connections=self.pool_size,
+                    ),
+                ),
+            )
+            self._async_client = await anext(lifetime)
+            self._async_client_loop = loop
+            self._async_client_lifetime = lifetime
+        return self._async_client
+
+    @staticmethod
+    async def _close_with_event_loop(
+        client: httpx.AsyncClient,
+    ) -> AsyncGenerator[httpx.AsyncClient, None]:
+        """Yield the client and close it, when the event loop finalizes its async generators.
+
+        The clients of previous event loops can't be closed later on, as their
+        connections need the loop. `asyncio.run` finalizes the async generators
+        before closing the loop, hence the client is closed in time.
+        """
+        try:
+            yield client
+        finally:
+            await client.aclose()
+
+    def _create_request_payload(
+        self,
+        messages: list[dict[str, str]],
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        response_format: dict,
+    ) -> str | None:
         request_payload = self.request_template.format(
             messages=json.dumps(messages),
             message_system=json.dumps(messages[0]["content"]),
@@ -140,33 +442,17 @@ class CustomLLMClientHTTP(CustomLLMClient):
             request_payload = json.dumps(json.loads(request_payload))
         except json.JSONDecodeError:
             logger.exception("Request payload is not JSON deserializeable.")
-            return None, None
+            return None
         logger.debug("Formated and normalized request payload: %s", request_payload)
+        return request_payload
 
-        headers = deepcopy(self.headers)
+    def _create_headers(self) -> dict[str, str]:
+        headers = dict(self.headers)
         if self.api_key:
             headers["Authorization"] = headers.get("Authorization", "Bearer {api_key}").format(
                 api_key=self.api_key,
             )
-
-        for attempt in range(self.retries + 1):
-            try:
-                response = requests.post(
-                    self.endpoint,
-                    headers=headers,
-                    data=request_payload,
-                    verify=self.verify,
-                    timeout=self.timeout,
-                )
-                response.raise_for_status()
-                result = response.json()
-                break
-            except requests.exceptions.RequestException:
-                logger.exception("Error requesting the custom LLM endpoint (attempt %s).", attempt)
-                result = None
-        if result is None:
-            return None, None
-        return self.evaluate_result_path(result), result
+        return headers
 
     def evaluate_result_path(self, raw_result: dict | list | None) -> str | None:
         """Get the answer as string from the raw_result using the `result_path`."""
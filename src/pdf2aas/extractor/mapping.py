@@ -0,0 +1,140 @@
+"""Fuzzy mapping of extracted property labels to property definitions."""
+
+import logging
+import re
+import unicodedata
+from collections import Counter
+
+from pdf2aas.model import PropertyDefinition
+
+logger = logging.getLogger(__name__)
+
+_NON_WORD = re.compile(r"[\W_]+")
+_LETTER_DIGIT = re.compile(r"(?<=[^\W\d_])(?=\d)|(?<=\d)(?=[^\W\d_])")
+
+
+def normalize_label(label: str) -> str:
+    """Lower the label and reduce it to its word tokens separated by single spaces.
+
+    Letters and digits are separated, e.g. "IP67" becomes "ip 67".
+    """
+    label = unicodedata.normalize("NFKC", label).lower()
+    label = _LETTER_DIGIT.sub(" ", _NON_WORD.sub(" ", label))
+    return " ".join(label.split())
+
+
+def trigrams(text: str) -> set[str]:
+    """Get the character trigrams of the normalized text, padded with spaces."""
+    padded = f" {text} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class DefinitionMatcher:
+    """Map extracted property labels to the best matching property definitions.
+
+    The names of the definitions in all languages and their synonyms are
+    indexed once. A label is matched exactly on its normalized form or its
+    sorted tokens first. Otherwise the definition with the highest Jaccard
+    similarity of character trigrams is chosen, using an inverted trigram index.
+    Hence only definitions sharing trigrams with the label are compared.
+
+    Attributes:
+        definitions (list[PropertyDefinition]): The indexed definitions.
+        threshold (float): Minimum trigram similarity between 0 and 1 for a
+            fuzzy match. Defaults to 0.5.
+
+    """
+
+    def __init__(
+        self,
+        definitions: list[PropertyDefinition],
+        threshold: float = 0.5,
+    ) -> None:
+        """Index the names and synonyms of the given definitions."""
+        self.definitions = definitions
+        self.threshold = threshold
+        self._exact: dict[str, int] = {}
+        self._entries: list[tuple[int, int]] = []
+        self._postings: dict[str, list[int]] = {}
+        for index, definition in enumerate(definitions):
+            names = [*definition.name.values(), *definition.synonyms]
+            if len(names) == 0:
+                names = [definition.id]
+            for name in names:
+                self._add(normalize_label(name), index)
+
+    def _add(self, name: str, index: int) -> None:
+        if len(name) == 0:
+            return
+        self._exact.setdefault(name, index)
+        self._exact.setdefault(" ".join(sorted(name.split())), index)
+        grams = trigrams(name)
+        entry = len(self._entries)
+        self._entries.append((index, len(grams)))
+        for gram in grams:
+            self._postings.setdefault(gram, []).append(entry)
+
+    def candidates(self, label: str) -> list[tuple[float, PropertyDefinition]]:
+        """Get the definitions with a score above the `threshold`, best first.
+
+        Exact matches of the normalized label or its sorted tokens score 1.
+        """
+        name = normalize_label(label)
+        if len(name) == 0:
+            return []
+        for key in (name, " ".join(sorted(name.split()))):
+            index = self._exact.get(key)
+            if index is not None:
+                return [(1.0, self.definitions[index])]
+        grams = trigrams(name)
+        shared: Counter[int] = Counter()
+        for gram in grams:
+            shared.update(self._postings.get(gram, ()))
+        scores: dict[int, float] = {}
+        for entry, count in shared.items():
+            index, entry_grams = self._entries[entry]
+            score = count / (len(grams) + entry_grams - count)
+            if score >= self.threshold and score > scores.get(index, 0):
+                scores[index] = score
+        return sorted(
+            ((score, self.definitions[index]) for index, score in scores.items()),
+            key=lambda candidate: candidate[0],
+            reverse=True,
+        )
+
+    def match(self, label: str | None) -> PropertyDefinition | None:
+        """Get the best matching definition for the label or None."""
+        if label is None:
+            return None
+        candidates = self.candidates(label)
+        if len(candidates) == 0:
+            return None
+        return candidates[0][1]
+
+    def match_many(self, labels: list[str | None]) -> list[PropertyDefinition | None]:
+        """Map the labels to definitions, assigning the best scores first.
+
+        Exact matches are kept, even if multiple labels match the same
+        definition. A fuzzy match is only assigned to a definition, that is not
+        matched by another label already.
+        """
+        scored = [
+            (score, position, id(definition), definition)
+            for position, label in enumerate(labels)
+            if label is not None
+            for score, definition in self.candidates(label)
+        ]
+        scored.sort(key=lambda candidate: (-candidate[0], candidate[1]))
+        matches: list[PropertyDefinition | None] = [None] * len(labels)
+        used = set()
+        for score, position, definition_id, definition in scored:
+            if matches[position] is not None or (score < 1 and definition_id in used):
+                continue
+            matches[position] = definition
+            used.add(definition_id)
+        logger.debug(
+            "Mapped %s of %s labels to definitions.",
+            sum(match is not None for match in matches),
+            len(labels),
+        )
+        return matches
@@ -0,0 +1,228 @@
+"""Extractor that escalates uncertain properties from a cheap to a strong extractor."""
+
+import logging
+import re
+from collections.abc import Iterator
+
+from pdf2aas.metrics import MetricsSink
+from pdf2aas.model import Property, PropertyDefinition
+from pdf2aas.model.property import try_cast_number
+
+from . import Extractor
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+_BOOL_VALUES = {"true", "false", "yes", "no", "1", "0"}
+
+
+def _normalize(text: str) -> str:
+    return _WHITESPACE.sub(" ", text).strip().lower()
+
+
+class PropertyCascade(Extractor):
+    """Extractor that re-queries only the uncertain properties with a second extractor.
+
+    The `first` extractor, e.g. a PropertyLLMSearch with a small and fast model
+    like "gpt-4o-mini", is asked for all definitions. A property is escalated
+    to the `second` extractor, e.g. with a larger model, if it
+
+    - was not returned or its value is null,
+    - fails the type check against the `type` or `values` of its definition,
+    - has a `reference` not found in the datasheet, c.f. `check_reference`.
+
+    The property of the `second` extractor replaces the escalated one, if it
+    has a value. Hence the average cost and latency stay close to the first
+    extractor, while the hard properties get the stronger model.
+
+    Attributes:
+        first (Extractor): Extractor asked for all definitions.
+        second (Extractor): Extractor asked for the escalated definitions.
+        check_reference (bool): Escalate properties, whose reference is not part
+            of the datasheet, ignoring case and whitespace. Defaults to True.
+
+    """
+
+    def __init__(
+        self,
+        first: Extractor,
+        second: Extractor,
+        *,
+        check_reference: bool = True,
+    ) -> None:
+        """Initialize the cascade of the two extractors."""
+        super().__init__()
+        self.first = first
+        self.second = second
+        self.check_reference = check_reference
+
+    def extract(
+        self,
+        datasheet: list[str] | str,
+        property_definition: PropertyDefinition | list[PropertyDefinition],
+        raw_prompts: list | None = None,
+        raw_results: list | None = None,
+    ) -> list[Property]:
+        """Extract with the `first` extractor and escalate the uncertain properties.
+
+        The prompts and results of both extractors are added to `raw_prompts`
+        and `raw_results`.
+        """
+        datasheet = self._text(datasheet)
+        definitions = self._definitions(property_definition)
+        properties = self.first.extract(datasheet, definitions, raw_prompts, raw_results)
+        escalate = self.escalations(datasheet, definitions, properties)
+        if len(escalate) == 0:
+            return properties
+        return self._merge(
+            definitions,
+            properties,
+            self.second.extract(datasheet, escalate, raw_prompts, raw_results),
+        )
+
+    async def aextract(
+        self,
+        datasheet: list[str] | str,
+        property_definition: PropertyDefinition | list[PropertyDefinition],
+        raw_prompts: list | None = None,
+        raw_results: list | None = None,
+    ) -> list[Property]:
+        """Extract the properties asynchronously, c.f. :meth:`extract`."""
+        datasheet = self._text(datasheet)
+        definitions = self._definitions(property_definition)
+        properties = await self.first.aextract(datasheet, definitions, raw_prompts, raw_results)
+        escalate = self.escalations(datasheet, definitions, properties)
+        if len(escalate) == 0:
+            return properties
+        return self._merge(
+            definitions,
+            properties,
+            await self.second.aextract(datasheet, escalate, raw_prompts, raw_results),
+        )
+
+    def extract_stream(
+        self,
+        datasheet: list[str] | str,
+        property_definition: PropertyDefinition | list[PropertyDefinition],
+        raw_prompts: list | None = None,
+        raw_results: list | None = None,
+    ) -> Iterator[Property]:
+        """Yield the certain properties of the `first` extractor, then the escalated ones.
+
+        Both extractors are streamed. Uncertain properties of the `first`
+        extractor are held back and yielded at the end, if the `second` one
+        finds no value for them.
+        """
+        datasheet = self._text(datasheet)
+        definitions = self._definitions(property_definition)
+        text = _normalize(datasheet)
+        held: dict[int, Property] = {}
+        certain = set()
+        stream = self.first.extract_stream(datasheet, definitions, raw_prompts, raw_results)
+        for property_ in stream:
+            if property_.definition is not None and not self._is_certain(property_, text):
+                held[id(property_.definition)] = property_
+                continue
+            if property_.definition is not None:
+                certain.add(id(property_.definition))
+            yield property_
+        escalate = [definition for definition in definitions if id(definition) not in certain]
+        if len(escalate) == 0:
+            return
+        stream = self.second.extract_stream(datasheet, escalate, raw_prompts, raw_results)
+        for property_ in stream:
+            if property_.value is None:
+                continue
+            if property_.definition is not None:
+                held.pop(id(property_.definition), None)
+            yield property_
+        yield from (held[id(d)] for d in escalate if id(d) in held)
+
+    def set_metrics(self, metrics: MetricsSink | None, *, overwrite: bool = True) -> None:
+        """Pass the metrics sink on to the `first` and `second` extractor."""
+        self.first.set_metrics(metrics, overwrite=overwrite)
+        self.second.set_metrics(metrics, overwrite=overwrite)
+
+    def escalations(
+        self,
+        datasheet: list[str] | str,
+        definitions: list[PropertyDefinition],
+        properties: list[Property],
+    ) -> list[PropertyDefinition]:
+        """Get the definitions, whose properties are missing or uncertain."""
+        text = _normalize(self._text(datasheet))
+        certain = {
+            id(property_.definition)
+            for property_ in properties
+            if property_.definition is not None and self._is_certain(property_, text)
+        }
+        escalate = [definition for definition in definitions if id(definition) not in certain]
+        logger.info(
+            "Escalating %s of %s properties to the second extractor.",
+            len(escalate),
+            len(definitions),
+        )
+        return escalate
+
+    def is_certain(self, property_: Property, datasheet: list[str] | str) -> bool:
+        """Check the value against the definition and the reference against the datasheet."""
+        return self._is_certain(property_, _normalize(self._text(datasheet)))
+
+    def _is_certain(self, property_: Property, normalized_datasheet: str) -> bool:
+        if property_.value is None or property_.value == "":
+            return False
+        definition = property_.definition
+        if definition is not None and not self._check_type(property_, definition):
+            logger.debug("Value of %s fails the type check: %s", definition.id, property_.value)
+            return False
+        if self.check_reference and (
+            not property_.reference
+            or _normalize(str(property_.reference)) not in normalized_datasheet
+        ):
+            logger.debug("Reference not found in datasheet: %s", property_.reference)
+            return False
+        return True
+
+    @staticmethod
+    def _check_type(property_: Property, definition: PropertyDefinition) -> bool:
+        if len(definition.values) > 0:
+            values = {value.lower() for value in definition.values_list}
+            return str(property_.value).lower() in values
+        if definition.type == "numeric":
+            return try_cast_number(property_.value) is not None
+        if definition.type == "range":
+            return None not in property_.parse_numeric_range()
+        if definition.type == "bool":
+            return isinstance(property_.value, bool) or str(property_.value).lower() in _BOOL_VALUES
+        return True
+
+    @staticmethod
+    def _merge(
+        definitions: list[PropertyDefinition],
+        properties: list[Property],
+        escalated: list[Property],
+    ) -> list[Property]:
+        """Replace the properties by the escalated ones with a value, in definition order."""
+        by_definition: dict[int, Property] = {}
+        unmapped = []
+        for property_ in [*properties, *(p for p in escalated if p.value is not None)]:
+            if property_.definition is None:
+                unmapped.append(property_)
+            else:
+                by_definition[id(property_.definition)] = property_
+        return [
+            *(by_definition[id(d)] for d in definitions if id(d) in by_definition),
+            *unmapped,
+        ]
+
+    @staticmethod
+    def _definitions(
+        property_definition: PropertyDefinition | list[PropertyDefinition],
+    ) -> list[PropertyDefinition]:
+        if isinstance(property_definition, PropertyDefinition):
+            return [property_definition]
+        return property_definition
+
+    @staticmethod
+    def _text(datasheet: list[str] | str) -> str:
+        return "\n".join(datasheet) if isinstance(datasheet, list) else datasheet
@@ -1,19 +1,164 @@
 """Extractor for technical properties using an LLM or similar backend."""
 
+import asyncio
 import json
 import logging
 import re
 import unicodedata
-from typing import Any
+from collections.abc import Iterator
+from functools import lru_cache
+from http import HTTPStatus
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
 
-from openai import AzureOpenAI, OpenAI, OpenAIError
+from openai import AsyncAzureOpenAI, AsyncOpenAI, AzureOpenAI, OpenAI, OpenAIError
 
+from pdf2aas.cache import Cache, hash_key
+from pdf2aas.metrics import MetricsSink, record_llm_usage, span
 from pdf2aas.model import Property, PropertyDefinition
 
 from . import CustomLLMClient, Extractor
+from .mapping import DefinitionMatcher
+from .tokens import estimate_message_tokens
+
+if TYPE_CHECKING:
+    from .rate_limiter import RateLimiter
 
 logger = logging.getLogger(__name__)
 
+_MARKDOWN_BLOCK = re.compile(r"```(?:json)?\s*(.*?)\s*```", re.DOTALL)
+_ARRAY_OF_OBJECTS = re.compile(r"\[\s*\{")
+_ASTRAL_CHAR = re.compile("[\U00010000-\U0010ffff]")
+_JSON_DECODER = json.JSONDecoder()
+
+
+@lru_cache(maxsize=1)
+def _control_chars_table() -> dict[int, None]:
+    """Map the basic multilingual plane chars of unicode category "C*" to None."""
+    return {
+        codepoint: None
+        for codepoint in range(0x10000)
+        if unicodedata.category(chr(codepoint))[0] == "C"
+    }
+
+
+def _strip_control_chars(text: str) -> str:
+    """Remove control, format, private use and unassigned chars from the text."""
+    text = text.translate(_control_chars_table())
+    if _ASTRAL_CHAR.search(text) is None:
+        return text
+    return "".join(ch for ch in text if ch < "\U00010000" or unicodedata.category(ch)[0] != "C")
+
+
+def _decode_result(result: str) -> Any:
+    """Decode the JSON of the LLM result, which might be wrapped in a markdown block."""
+    cleaned = _strip_control_chars(result)
+    try:
+        return json.loads(cleaned)
+    except json.decoder.JSONDecodeError:
+        md_block = _MARKDOWN_BLOCK.search(result)
+        if md_block is None:
+            properties = _recover_json_array(cleaned)
+            if properties is None:
+                logger.exception("Couldn't decode LLM result.")
+            return properties
+    try:
+        properties = json.loads(md_block.group(1))
+        logger.debug("Extracted json markdown block via regex from LLM result.")
+    except json.decoder.JSONDecodeError:
+        properties = _recover_json_array(md_block.group(1))
+        if properties is None:
+            logger.exception("Couldn't decode LLM markdown block: %s", md_block.group(1))
+    return properties
+
+
+def _recover_json_array(text: str) -> list | None:
+    """Decode the complete elements of a truncated JSON array of objects.
+
+    Returns None, if not even the first object is complete.
+    """
+    start = _ARRAY_OF_OBJECTS.search(text)
+    if start is None:
+        return None
+    elements = []
+    position = start.start() + 1
+    while True:
+        while position < len(text) and text[position] in " \t\n\r,":
+            position += 1
+        try:
+            element, position = _JSON_DECODER.raw_decode(text, position)
+        except json.decoder.JSONDecodeError:
+            break
+        elements.append(element)
+    if len(elements) == 0:
+        return None
+    logger.warning("Recovered %s elements of a truncated JSON array.", len(elements))
+    return elements
+
+
+class _JSONObjectStream:
+    """Decode the innermost JSON objects of a text, while it is streamed.
+
+    Property objects contain no nested objects, hence every object without
+    nested objects is decoded as soon as it is closed. This covers plain lists,
+    wrapping objects like {"result": [...]} and markdown blocks alike.
+    """
+
+    _SPECIAL = re.compile(r'["\\{}]')
+
+    def __init__(self) -> None:
+        self._text = ""
+        self._position = 0
+        self._in_string = False
+        self._skip_to = 0
+        self._starts: list[int] = []
+        self._nested: list[bool] = []
+
+    @property
+    def text(self) -> str:
+        """The complete text fed so far."""
+        return self._text
+
+    def feed(self, chunk: str) -> list[dict]:
+        """Add the chunk to the text and return the objects closed by it."""
+        self._text += chunk
+        objects: list[dict] = []
+        for match in self._SPECIAL.finditer(self._text, self._position):
+            if match.start() >= self._skip_to:
+                self._consume(match.start(), match.group(), objects)
+        self._position = len(self._text)
+        return objects
+
+    def _consume(self, position: int, char: str, objects: list[dict]) -> None:
+        if self._in_string:
+            if char == "\\":
+                self._skip_to = position + 2
+            elif char == '"':
+                self._in_string = False
+        elif char == "{":
+            if self._nested:
+                self._nested[-1] = True
+            self._starts.append(position)
+            self._nested.append(False)
+        elif len(self._starts) == 0:
+            return
+        elif char == '"':
+            self._in_string = True
+        elif char == "}":
+            start = self._starts.pop()
+            if not self._nested.pop():
+                self._decode(self._text[start : position + 1], objects)
+
+    @staticmethod
+    def _decode(text: str, objects: list[dict]) -> None:
+        try:
+            decoded = json.loads(_strip_control_chars(text))
+        except json.decoder.JSONDecodeError:
+            logger.debug("Couldn't decode streamed JSON object: %s", text)
+            return
+        if isinstance(decoded, dict) and len(decoded) > 0:
+            objects.append(decoded)
+
 
 class PropertyLLM(Extractor):
     """Extractor that prompts an LLM client to extract properties from a datasheet.
@@ -29,6 +174,11 @@ class PropertyLLM(Extractor):
             that contains instruction, e.g. which properties to extract.
         client (OpenAI | AzureOpenAI | CustomLLMClient): client which is used,
             to execute the prompts.
+        async_client (AsyncOpenAI | AsyncAzureOpenAI | None): client which is
+            used to execute the prompts in :meth:`aextract`, if `client` is no
+            CustomLLMClient. Created together with the default OpenAI client.
+            If None, the prompts of :meth:`aextract` are executed with the
+            `client` in a separate thread.
         model_identifier (str): String identifying the model to use, e.g. gpt-3.5.
         temperature (float): Temperature value for the LLM. Typically between 0
             and 2, where 0 indicates taking the most probable value to be more
@@ -37,6 +187,25 @@ class PropertyLLM(Extractor):
             one run. 0 corresponds to no limit.
         response_format (dict | None): Leverage structured output from the LLM,
             by specifing a response format, if the LLM supports it.
+        cache (Cache | None): Cache for the LLM responses, e.g. a MemoryCache or
+            SQLiteCache. The key is a hash of the model identifier, temperature,
+            max_tokens, response_format and the messages. Cache hits are added
+            to the raw results with an additional "cached" key, if the raw
+            result is a dictionary. Defaults to None, i.e. no caching.
+        rate_limiter (RateLimiter | None): Paces the LLM requests to stay below
+            requests and tokens per minute limits. The tokens are estimated
+            from the messages and `max_tokens` before sending and corrected by
+            the reported usage afterwards. Cache hits are not limited.
+            Defaults to None, i.e. no limit.
+        batch_endpoint (str): Endpoint of the requests sent via the OpenAI
+            Batch API, c.f. :meth:`submit_batch`.
+        mapping_threshold (float): Minimum trigram similarity between 0 and 1 to
+            map an extracted label to a definition with a different name,
+            c.f. :class:`DefinitionMatcher`. Defaults to 0.5.
+        metrics (MetricsSink | None): Sink for the "prompt_build",
+            "llm_request" and "parse" spans and the token counters of each LLM
+            request, labeled with the "model". Cache hits are counted as
+            "llm_cache_hits". Defaults to None, i.e. no metrics.
 
     """
 
@@ -61,6 +230,8 @@ Example result:
 ```
 {datasheet}
 ```"""
+    batch_endpoint = "/v1/chat/completions"
+    batch_terminal_states = ("completed", "expired", "cancelled", "failed")
 
     def __init__(
         self,
@@ -83,9 +254,16 @@ Example result:
         if response_format is None:
             response_format = {"type": "json_object"}
         self.response_format = response_format
+        self.cache: Cache | None = None
+        self.rate_limiter: RateLimiter | None = None
+        self.metrics: MetricsSink | None = None
+        self.mapping_threshold = 0.5
+        self._matcher: DefinitionMatcher | None = None
+        self.async_client: AsyncOpenAI | AsyncAzureOpenAI | None = None
         if client is None and api_endpoint != "input":
             try:
                 client = OpenAI(base_url=api_endpoint)
+                self.async_client = AsyncOpenAI(base_url=api_endpoint)
             except OpenAIError as error:
                 logger.warning("Couldn't init OpenAI client, falling back to 'input'. %s", error)
                 client = None
@@ -111,6 +289,227 @@ Example result:
         The `prompt_hint` can be used to add context or additional instructions
         to the prompt before it is sent to the LLM.
         """
+        messages = self._create_messages(datasheet, property_definition, prompt_hint)
+        if isinstance(raw_prompts, list):
+            raw_prompts.append(messages)
+        result = self._prompt_llm(messages, raw_results)
+        return self._process_result(result, property_definition)
+
+    async def aextract(
+        self,
+        datasheet: list[str] | str,
+        property_definition: PropertyDefinition | list[PropertyDefinition],
+        raw_prompts: list | None = None,
+        raw_results: list | None = None,
+        prompt_hint: str | None = None,
+    ) -> list[Property]:
+        """Extract the properties asynchronously, c.f. :meth:`extract`.
+
+        Awaits the `async_client` or the `acreate_completions` method of a
+        CustomLLMClient, so that many prompts can be processed concurrently
+        in one event loop.
+        """
+        messages = self._create_messages(datasheet, property_definition, prompt_hint)
+        if isinstance(raw_prompts, list):
+            raw_prompts.append(messages)
+        result = await self._aprompt_llm(messages, raw_results)
+        return self._process_result(result, property_definition)
+
+    def extract_stream(
+        self,
+        datasheet: list[str] | str,
+        property_definition: PropertyDefinition | list[PropertyDefinition],
+        raw_prompts: list | None = None,
+        raw_results: list | None = None,
+        prompt_hint: str | None = None,
+    ) -> Iterator[Property]:
+        """Yield the properties while the LLM generates its answer, c.f. :meth:`extract`.
+
+        Uses the streaming API of the OpenAI `client` and yields each property
+        as soon as its JSON object is closed. The complete answer is added to
+        the `raw_results` and the `cache` afterwards. Cache hits, the "input"
+        client and CustomLLMClients yield the properties of the whole answer.
+        """
+        messages = self._create_messages(datasheet, property_definition, prompt_hint)
+        if isinstance(raw_prompts, list):
+            raw_prompts.append(messages)
+        if self.client is None or isinstance(self.client, CustomLLMClient):
+            yield from self._process_result(
+                self._prompt_llm(messages, raw_results),
+                property_definition,
+            )
+            return
+        cache_key = self._cache_key(messages)
+        cached = self._load_cached(cache_key, raw_results)
+        if cached is not None:
+            yield from self._process_result(cached, property_definition)
+            return
+        rate_limiter = self.rate_limiter
+        estimated_tokens = 0
+        if rate_limiter is not None:
+            estimated_tokens = self._estimate_tokens(messages)
+            rate_limiter.acquire(estimated_tokens)
+        stream = _JSONObjectStream()
+        chunks: list[dict] = []
+        result: str | None = None
+        attributes = self._metrics_attributes()
+        # the span includes the time the consumer needs for the yielded properties
+        with span(self.metrics, "llm_request", stream=True, **attributes):
+            try:
+                for index, property_ in enumerate(
+                    self._stream_llm_openai(messages, stream, chunks),
+                ):
+                    yield self._add_stream_definition(property_, index, property_definition)
+                result = stream.text
+                raw_result: Any = self._stream_raw_result(result, chunks)
+            except OpenAIError as error:
+                logger.exception("Error calling openai endpoint.")
+                raw_result = str(error)
+        record_llm_usage(self.metrics, raw_result, attributes)
+        if rate_limiter is not None:
+            rate_limiter.reconcile_usage(estimated_tokens, raw_result)
+        self._handle_response(cache_key, result, raw_result, raw_results)
+
+    def set_metrics(self, metrics: MetricsSink | None, *, overwrite: bool = True) -> None:
+        """Set the sink for the LLM request metrics, c.f. `metrics`."""
+        if overwrite or self.metrics is None:
+            self.metrics = metrics
+
+    def create_batch_request(
+        self,
+        custom_id: str,
+        datasheet: list[str] | str,
+        property_definition: PropertyDefinition | list[PropertyDefinition],
+        prompt_hint: str | None = None,
+    ) -> dict:
+        """Create a request line of an OpenAI Batch API input file.
+
+        The prompt is the same as in :meth:`extract`. The `custom_id` assigns
+        the result to the request, c.f. :meth:`collect_batch`.
+        """
+        messages = self._create_messages(datasheet, property_definition, prompt_hint)
+        return {
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": self.batch_endpoint,
+            "body": self._create_openai_payload(messages),
+        }
+
+    def submit_batch(
+        self,
+        batch_requests: list[dict],
+        filepath: str | None = None,
+    ) -> str | None:
+        """Upload the requests as JSONL file and create a batch via the OpenAI Batch API.
+
+        Batches are processed asynchronously within 24 hours at reduced costs.
+        Needs an OpenAI or AzureOpenAI `client`. The cache and rate limiter
+        are not used.
+
+        Args:
+            batch_requests (list[dict]): Requests created via
+                :meth:`create_batch_request`.
+            filepath (str, optional): Path to keep a copy of the JSONL file.
+
+        Returns:
+            batch_id (str | None): The id of the created batch or None on error.
+
+        """
+        client = self._batch_client()
+        content = "".join(json.dumps(request) + "\n" for request in batch_requests).encode()
+        if filepath is not None:
+            Path(filepath).parent.mkdir(parents=True, exist_ok=True)
+            Path(filepath).write_bytes(content)
+        try:
+            input_file = client.files.create(file=("batch.jsonl", content), purpose="batch")
+            batch = client.batches.create(
+                input_file_id=input_file.id,
+                endpoint=self.batch_endpoint,  # type: ignore[arg-type]
+                completion_window="24h",
+            )
+        except OpenAIError:
+            logger.exception("Couldn't submit batch with %s requests.", len(batch_requests))
+            return None
+        logger.info("Submitted batch %s with %s requests.", batch.id, len(batch_requests))
+        return batch.id
+
+    def collect_batch(self, batch_id: str) -> dict[str, tuple[str | None, Any]] | None:
+        """Download the results of a finished batch.
+
+        Returns None, if the batch is still in progress or couldn't be
+        retrieved. Otherwise returns the result and raw result of each request
+        by its custom id. Expired or cancelled batches contain only the
+        finished requests. Raises a RuntimeError with the errors of the batch,
+        if the batch failed, e.g. because its input file was invalid.
+        Use :meth:`process_batch_result` to get the properties of a result.
+        """
+        client = self._batch_client()
+        try:
+            batch = client.batches.retrieve(batch_id)
+            if batch.status not in self.batch_terminal_states:
+                logger.info("Batch %s is %s.", batch_id, batch.status)
+                return None
+            if batch.status == "failed":
+                errors = batch.errors.data if batch.errors is not None and batch.errors.data else []
+                error = "Batch {} failed: {}".format(
+                    batch_id,
+                    "; ".join(f"{e.code}: {e.message}" for e in errors) or "unknown error",
+                )
+                raise RuntimeError(error)
+            lines = []
+            for file_id in (batch.output_file_id, batch.error_file_id):
+                if file_id:
+                    lines.extend(client.files.content(file_id).text.splitlines())
+        except OpenAIError:
+            logger.exception("Couldn't collect batch %s.", batch_id)
+            return None
+        results: dict[str, tuple[str | None, Any]] = {}
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                item = json.loads(line)
+            except json.decoder.JSONDecodeError:
+                logger.warning("Couldn't decode line of batch %s: %s", batch_id, line)
+                continue
+            results[item.get("custom_id")] = self._parse_batch_item(item)
+        logger.info("Collected %s results of batch %s.", len(results), batch_id)
+        return results
+
+    def process_batch_result(
+        self,
+        result: str | None,
+        property_definition: PropertyDefinition | list[PropertyDefinition],
+    ) -> list[Property]:
+        """Get the properties of a result from :meth:`collect_batch`, c.f. :meth:`extract`."""
+        return self._process_result(result, property_definition)
+
+    def _batch_client(self) -> OpenAI:
+        if not isinstance(self.client, OpenAI):
+            error = "The batch mode needs an OpenAI or AzureOpenAI client."
+            raise TypeError(error)
+        return self.client
+
+    @staticmethod
+    def _parse_batch_item(item: dict) -> tuple[str | None, Any]:
+        response = item.get("response") or {}
+        body = response.get("body")
+        if response.get("status_code") != HTTPStatus.OK or not isinstance(body, dict):
+            logger.warning(
+                "Batch request %s failed: %s",
+                item.get("custom_id"),
+                item.get("error") or body,
+            )
+            return None, item.get("error") or body
+        choices = body.get("choices") or [{}]
+        return (choices[0].get("message") or {}).get("content"), body
+
+    def _create_messages(
+        self,
+        datasheet: list[str] | str,
+        property_definition: PropertyDefinition | list[PropertyDefinition],
+        prompt_hint: str | None,
+    ) -> list[dict[str, str]]:
         if isinstance(property_definition, list):
             logger.info("Extracting %s properties.", len(property_definition))
         else:
@@ -124,20 +523,32 @@ Example result:
             datasheet = "\n".join(datasheet)
         else:
             logger.debug("Processing datasheet with %s chars.", len(datasheet))
+        with span(self.metrics, "prompt_build", **self._metrics_attributes()):
+            return self._create_chat_messages(datasheet, property_definition, prompt_hint)
 
-        messages = [
+    def _create_chat_messages(
+        self,
+        datasheet: str,
+        property_definition: PropertyDefinition | list[PropertyDefinition],
+        prompt_hint: str | None,
+    ) -> list[dict[str, str]]:
+        return [
             {"role": "system", "content": self.system_prompt_template},
             {
                 "role": "user",
                 "content": self.create_prompt(datasheet, property_definition, hint=prompt_hint),
             },
         ]
-        if isinstance(raw_prompts, list):
-            raw_prompts.append(messages)
-        result = self._prompt_llm(messages, raw_results)
-        properties = self._parse_result(result)
-        properties = self._parse_properties(properties)
-        return self._add_definitions(properties, property_definition)
+
+    def _process_result(
+        self,
+        result: str | None,
+        property_definition: PropertyDefinition | list[PropertyDefinition],
+    ) -> list[Property]:
+        with span(self.metrics, "parse", **self._metrics_attributes()):
+            properties = self._parse_result(result)
+            properties = self._parse_properties(properties)
+            return self._add_definitions(properties, property_definition)
 
     def create_prompt(
         self,
@@ -166,6 +577,46 @@ Example result:
         messages: list[dict[str, str]],
         raw_results: list | None,
     ) -> str | Any | None:
+        cache_key = self._cache_key(messages)
+        cached = self._load_cached(cache_key, raw_results)
+        if cached is not None:
+            return cached
+        rate_limiter = self.rate_limiter
+        estimated_tokens = 0
+        if rate_limiter is not None:
+            estimated_tokens = self._estimate_tokens(messages)
+            rate_limiter.acquire(estimated_tokens)
+        attributes = self._metrics_attributes()
+        with span(self.metrics, "llm_request", **attributes):
+            result, raw_result = self._request_llm(messages)
+        record_llm_usage(self.metrics, raw_result, attributes)
+        if rate_limiter is not None:
+            rate_limiter.reconcile_usage(estimated_tokens, raw_result)
+        return self._handle_response(cache_key, result, raw_result, raw_results)
+
+    async def _aprompt_llm(
+        self,
+        messages: list[dict[str, str]],
+        raw_results: list | None,
+    ) -> str | Any | None:
+        cache_key = self._cache_key(messages)
+        cached = self._load_cached(cache_key, raw_results)
+        if cached is not None:
+            return cached
+        rate_limiter = self.rate_limiter
+        estimated_tokens = 0
+        if rate_limiter is not None:
+            estimated_tokens = self._estimate_tokens(messages)
+            await rate_limiter.aacquire(estimated_tokens)
+        attributes = self._metrics_attributes()
+        with span(self.metrics, "llm_request", **attributes):
+            result, raw_result = await self._arequest_llm(messages)
+        record_llm_usage(self.metrics, raw_result, attributes)
+        if rate_limiter is not None:
+            rate_limiter.reconcile_usage(estimated_tokens, raw_result)
+        return self._handle_response(cache_key, result, raw_result, raw_results)
+
+    def _request_llm(self, messages: list[dict[str, str]]) -> tuple[str | Any | None, Any]:
         if self.client is None:
             logger.info("Systemprompt:\n%s", messages[0]["content"])
             logger.info("Prompt:\n%s", messages[1]["content"])
@@ -186,15 +637,87 @@ Example result:
                 logger.exception("Error calling openai endpoint.")
                 raw_result = str(error)
                 result = None
+        return result, raw_result
+
+    async def _arequest_llm(
+        self,
+        messages: list[dict[str, str]],
+    ) -> tuple[str | Any | None, Any]:
+        if self.client is None:
+            return await asyncio.to_thread(self._request_llm, messages)
+        result: str | Any | None
+        raw_result: Any
+        if isinstance(self.client, CustomLLMClient):
+            result, raw_result = await self.client.acreate_completions(
+                messages,
+                self.model_identifier,
+                self.temperature,
+                self.max_tokens or 0,
+                self.response_format,
+            )
+        else:
+            try:
+                if self.async_client is None:
+                    result, raw_result = await asyncio.to_thread(
+                        self._prompt_llm_openai,
+                        messages,
+                    )
+                else:
+                    result, raw_result = await self._aprompt_llm_openai(messages)
+            except OpenAIError as error:
+                logger.exception("Error calling openai endpoint.")
+                raw_result = str(error)
+                result = None
+        return result, raw_result
+
+    def _metrics_attributes(self) -> dict[str, Any]:
+        return {"model": self.model_identifier}
+
+    def _estimate_tokens(self, messages: list[dict[str, str]]) -> int:
+        return estimate_message_tokens(messages, self.model_identifier) + (self.max_tokens or 0)
+
+    def _cache_key(self, messages: list[dict[str, str]]) -> str | None:
+        if self.cache is None or self.client is None:
+            return None
+        return hash_key(
+            self.model_identifier,
+            self.temperature,
+            self.max_tokens,
+            self.response_format,
+            messages,
+        )
+
+    def _load_cached(self, cache_key: str | None, raw_results: list | None) -> str | Any | None:
+        if cache_key is None or self.cache is None:
+            return None
+        cached = self.cache.get(cache_key)
+        if cached is None:
+            return None
+        logger.debug("Response from cache: %s", cached["result"])
+        if self.metrics is not None:
+            self.metrics.record_count("llm_cache_hits", 1, self._metrics_attributes())
+        if isinstance(raw_results, list):
+            raw_result = cached["raw_result"]
+            if isinstance(raw_result, dict):
+                raw_result = {**raw_result, "cached": True}
+            raw_results.append(raw_result)
+        return cached["result"]
+
+    def _handle_response(
+        self,
+        cache_key: str | None,
+        result: str | Any | None,
+        raw_result: Any,
+        raw_results: list | None,
+    ) -> str | Any | None:
         logger.debug("Response from LLM: %s", result)
         if isinstance(raw_results, list):
             raw_results.append(raw_result)
+        if cache_key is not None and self.cache is not None and result is not None:
+            self.cache.set(cache_key, {"result": result, "raw_result": raw_result})
         return result
 
-    def _prompt_llm_openai(
-        self,
-        messages: list[dict[str, str]],
-    ) -> tuple[str | Any | None, dict]:
+    def _create_openai_payload(self, messages: list[dict[str, str]]) -> dict:
         payload = {
             "model": self.model_identifier,
             "temperature": self.temperature,
@@ -202,9 +725,81 @@ Example result:
             "max_tokens": self.max_tokens,
             "response_format": self.response_format,
         }
-        payload = {k: v for k, v in payload.items() if v is not None}
+        return {k: v for k, v in payload.items() if v is not None}
+
+    def _prompt_llm_openai(
+        self,
+        messages: list[dict[str, str]],
+    ) -> tuple[str | Any | None, dict]:
+        chat_completion = self.client.chat.completions.create(  # type: ignore[call-overload, union-attr]
+            **self._create_openai_payload(messages),
+        )
+        return self._process_chat_completion(chat_completion)
+
+    async def _aprompt_llm_openai(
+        self,
+        messages: list[dict[str, str]],
+    ) -> tuple[str | Any | None, dict]:
+        chat_completion = await self.async_client.chat.completions.create(  # type: ignore[call-overload, union-attr]
+            **self._create_openai_payload(messages),
+        )
+        return self._process_chat_completion(chat_completion)
 
-        chat_completion = self.client.chat.completions.create(**payload)  # type: ignore[call-overload, union-attr]
+    def _stream_llm_openai(
+        self,
+        messages: list[dict[str, str]],
+        stream: _JSONObjectStream,
+        chunks: list[dict],
+    ) -> Iterator[Property]:
+        """Request a streamed chat completion and parse the properties from its deltas.
+
+        The raw chunks are added to the `chunks` list.
+        """
+        response = self.client.chat.completions.create(  # type: ignore[call-overload, union-attr]
+            **self._create_openai_payload(messages),
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        for chunk in response:
+            chunks.append(chunk.to_dict(mode="json"))
+            if len(chunk.choices) == 0:
+                continue
+            for object_ in stream.feed(chunk.choices[0].delta.content or ""):
+                yield Property.from_dict(object_)
+
+    def _stream_raw_result(self, result: str, chunks: list[dict]) -> dict:
+        """Assemble a chat completion like raw result from the streamed chunks."""
+        finish_reason = next(
+            (
+                chunk["choices"][0].get("finish_reason")
+                for chunk in reversed(chunks)
+                if chunk.get("choices") and chunk["choices"][0].get("finish_reason")
+            ),
+            None,
+        )
+        if finish_reason != "stop":
+            logger.warning(
+                "Chat completion finished with reason '%s'. (max_tokens=%s)",
+                finish_reason,
+                self.max_tokens,
+            )
+        first = chunks[0] if chunks else {}
+        return {
+            "id": first.get("id"),
+            "object": "chat.completion",
+            "created": first.get("created"),
+            "model": first.get("model", self.model_identifier),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": result},
+                    "finish_reason": finish_reason,
+                },
+            ],
+            "usage": next((chunk["usage"] for chunk in chunks if chunk.get("usage")), None),
+        }
+
+    def _process_chat_completion(self, chat_completion: Any) -> tuple[str | Any | None, dict]:
         result = chat_completion.choices[0].message.content
         if chat_completion.choices[0].finish_reason not in ["stop", "None"]:
             logger.warning(
@@ -217,21 +812,7 @@ Example result:
     def _parse_result(self, result: str | None) -> Any | dict | None:
         if result is None:
             return None
-        try:
-            properties = json.loads(
-                "".join(ch for ch in result if unicodedata.category(ch)[0] != "C"),
-            )
-        except json.decoder.JSONDecodeError:
-            md_block = re.search(r"```(?:json)?\s*(.*?)\s*```", result, re.DOTALL)
-            if md_block is None:
-                logger.exception("Couldn't decode LLM result.")
-                return None
-            try:
-                properties = json.loads(md_block.group(1))
-                logger.debug("Extracted json markdown block via regex from LLM result.")
-            except json.decoder.JSONDecodeError:
-                logger.exception("Couldn't decode LLM markdown block: %s", md_block.group(1))
-                return None
+        properties = _decode_result(result)
         if isinstance(properties, dict):
             found_key = False
             for key in ["result", "results", "items", "data", "properties"]:
@@ -274,3 +855,25 @@ Example result:
         property_definition: list[PropertyDefinition] | PropertyDefinition,  # noqa: ARG002
     ) -> list[Property]:
         return properties
+
+    def _definition_matcher(self, definitions: list[PropertyDefinition]) -> DefinitionMatcher:
+        """Get the matcher for the definitions, reusing the index of the last call."""
+        matcher = self._matcher
+        if (
+            matcher is None
+            or matcher.threshold != self.mapping_threshold
+            or len(matcher.definitions) != len(definitions)
+            or any(a is not b for a, b in zip(matcher.definitions, definitions, strict=True))
+        ):
+            matcher = DefinitionMatcher(definitions, self.mapping_threshold)
+            self._matcher = matcher
+        return matcher
+
+    def _add_stream_definition(
+        self,
+        property_: Property,
+        index: int,  # noqa: ARG002
+        property_definition: list[PropertyDefinition] | PropertyDefinition,  # noqa: ARG002
+    ) -> Property:
+        """Add the definition to a streamed property, before the count of all is known."""
+        return property_
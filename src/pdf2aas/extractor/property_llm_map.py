@@ -12,8 +12,9 @@ logger = logging.getLogger(__name__)
 class PropertyLLMMap(PropertyLLM):
     """PropertyLLM that extracts all properties and maps them to given definitions.
 
-    The mapping is done verry naively based on the extracted property label and
-    the definition name.
+    The extracted labels are mapped to the names and synonyms of the
+    definitions with a :class:`DefinitionMatcher`, which allows slightly
+    different labels, c.f. `mapping_threshold`.
     """
 
     def _add_definitions(
@@ -26,10 +27,9 @@ class PropertyLLMMap(PropertyLLM):
         if isinstance(property_definition, PropertyDefinition):
             property_definition = [property_definition]
 
-        # Naive approach to map by name
-        property_definition_dict = {
-            next(iter(p.name.values()), p.id).lower(): p for p in property_definition
-        }
-        for property_ in properties:
-            property_.definition = property_definition_dict.get(property_.label.strip().lower())
+        matches = self._definition_matcher(property_definition).match_many(
+            [property_.label for property_ in properties],
+        )
+        for property_, definition in zip(properties, matches, strict=True):
+            property_.definition = definition
         return properties
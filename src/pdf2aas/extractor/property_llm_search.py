@@ -1,15 +1,19 @@
 """Extractors that search for property definitions directly."""
 
 import logging
-from typing import Literal
+from typing import TYPE_CHECKING, Literal
 
 from openai import AzureOpenAI, OpenAI
 from tabulate import tabulate
 
+from pdf2aas.metrics import span
 from pdf2aas.model import Property, PropertyDefinition
 
 from . import CustomLLMClient, PropertyLLM
 
+if TYPE_CHECKING:
+    from .retrieval import BM25Retriever
+
 logger = logging.getLogger(__name__)
 
 
@@ -38,6 +42,18 @@ class PropertyLLMSearch(PropertyLLM):
         property_table_format (str): output format for the property defintions.
             Defaults to "html". See `tabulate.tabulate_formats` for
             available options. Examples are: 'github', 'html', 'simple', 'tsv'.
+        retriever (BM25Retriever | None): Selects the chunks of the datasheet
+            that match the searched property definitions, so that only these
+            are added to the prompt. Defaults to None, i.e. the whole datasheet
+            is added.
+        stable_prompt_prefix (bool): Send the datasheet in a separate user
+            message directly after the system prompt, followed by a message
+            with the properties and hint in `prompt_order`. Thereby all
+            batches of a document share a byte-identical prefix, which
+            providers like OpenAI serve from their prompt cache. Has no effect
+            in combination with a `retriever`, which changes the datasheet per
+            batch. Hence PDF2AAS logs a warning and doesn't send the first
+            batch alone to warm up the cache in this case. Defaults to False.
 
     """
 
@@ -87,6 +103,42 @@ Represent ranges as json list of two values.
         if prompt_order is None:
             prompt_order = ["datasheet", "properties", "hint"]
         self.prompt_order = prompt_order
+        self.retriever: BM25Retriever | None = None
+        self.stable_prompt_prefix = False
+
+    def _create_messages(
+        self,
+        datasheet: list[str] | str,
+        property_definition: PropertyDefinition | list[PropertyDefinition],
+        prompt_hint: str | None,
+    ) -> list[dict[str, str]]:
+        if self.retriever is not None:
+            with span(self.metrics, "retrieve", **self._metrics_attributes()):
+                datasheet = self.retriever.retrieve(datasheet, property_definition)
+        return super()._create_messages(datasheet, property_definition, prompt_hint)
+
+    def _create_chat_messages(
+        self,
+        datasheet: str,
+        property_definition: PropertyDefinition | list[PropertyDefinition],
+        prompt_hint: str | None,
+    ) -> list[dict[str, str]]:
+        if not self.stable_prompt_prefix:
+            return super()._create_chat_messages(datasheet, property_definition, prompt_hint)
+        return [
+            {"role": "system", "content": self.system_prompt_template},
+            {"role": "user", "content": self.create_datasheet_prompt(datasheet)},
+            {
+                "role": "user",
+                "content": self._create_prompt(
+                    datasheet,
+                    property_definition,
+                    "en",
+                    prompt_hint,
+                    [part for part in self.prompt_order if part != "datasheet"],
+                ),
+            },
+        ]
 
     def create_prompt(
         self,
@@ -109,10 +161,24 @@ Represent ranges as json list of two values.
           provide context or additional instructions.
 
         """
+        return self._create_prompt(datasheet, properties, language, hint, self.prompt_order)
+
+    def create_datasheet_prompt(self, datasheet: str) -> str:
+        """Create the part of the prompt containing the datasheet text."""
+        return f"The following text enclosed in triple backticks is the datasheet of the technical device. It was converted from pdf.\n```\n{datasheet}\n```\n"  # noqa: E501
+
+    def _create_prompt(
+        self,
+        datasheet: str,
+        properties: PropertyDefinition | list[PropertyDefinition],
+        language: str,
+        hint: str | None,
+        prompt_order: list[Literal["datasheet", "properties", "hint"]],
+    ) -> str:
         prompt = ""
-        for part in self.prompt_order:
+        for part in prompt_order:
             if part == "datasheet":
-                prompt += f"The following text enclosed in triple backticks is the datasheet of the technical device. It was converted from pdf.\n```\n{datasheet}\n```\n"  # noqa: E501
+                prompt += self.create_datasheet_prompt(datasheet)
             elif part == "properties":
                 if isinstance(properties, list):
                     prompt += self.create_property_list_prompt(properties, language)
@@ -242,9 +308,27 @@ Represent ranges as json list of two values.
                 len(properties),
                 len(property_definition),
             )
-            property_definition_dict = {
-                next(iter(p.name.values()), p.id).lower(): p for p in property_definition
-            }
-            for property_ in properties:
-                property_.definition = property_definition_dict.get(property_.label.strip().lower())
+            matches = self._definition_matcher(property_definition).match_many(
+                [property_.label for property_ in properties],
+            )
+            for property_, definition in zip(properties, matches, strict=True):
+                property_.definition = definition
         return properties
+
+    def _add_stream_definition(
+        self,
+        property_: Property,
+        index: int,
+        property_definition: list[PropertyDefinition] | PropertyDefinition,
+    ) -> Property:
+        """Add the best matching definition or the one at the same position in the batch."""
+        if isinstance(property_definition, PropertyDefinition):
+            property_definition = [property_definition]
+        if len(property_definition) == 1:
+            property_.definition = property_definition[0]
+            return property_
+        definition = self._definition_matcher(property_definition).match(property_.label)
+        if definition is None and index < len(property_definition):
+            definition = property_definition[index]
+        property_.definition = definition
+        return property_
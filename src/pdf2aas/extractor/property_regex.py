@@ -0,0 +1,293 @@
+"""Extractor that finds property values with regular expressions and unit tables."""
+
+import logging
+import re
+from collections.abc import Iterator
+from typing import Any, ClassVar
+
+from pdf2aas.metrics import MetricsSink
+from pdf2aas.model import Property, PropertyDefinition
+from pdf2aas.model.property import try_cast_number
+
+from . import Extractor
+
+logger = logging.getLogger(__name__)
+
+_NUMBER = r"[-+]?\d+(?:[.,]\d+)?"
+_RANGE_SEPARATOR = r"\s*(?:\.\.\.?|…|-|\u2013|to|bis)\s*"
+_KEY_VALUE = r"\s*(?:\(.{0,20}?\))?\s*[:=\t]\s*(?P<value>\S.*?)\s*$"
+_BOOL_VALUES = {"yes": True, "true": True, "no": False, "false": False}
+
+
+def _parse_number(text: str) -> float | int | None:
+    return try_cast_number(text.replace(",", "."))
+
+
+class PropertyRegex(Extractor):
+    """Extractor that searches the definitions in the datasheet text with rules.
+
+    Every line containing the name or a synonym of a definition is searched
+    for a value after the name, depending on the definition:
+
+    - numeric: a number followed by the `unit` of the definition,
+    - range: two numbers separated by "...", "-" or "to" followed by the unit,
+    - string with `values`: exactly one of the values,
+    - bool: yes, no, true or false after a ":", "=" or tab separator.
+
+    Other definitions, e.g. free text like an order code, are never matched by
+    the rules, as any text after a separator would be accepted.
+
+    A property is only returned, if all lines of the datasheet agree on the
+    value. The remaining definitions are forwarded to the `fallback`
+    extractor, typically a PropertyLLMSearch. Hence the LLM is only prompted
+    for the properties the rules are not confident about.
+
+    Attributes:
+        fallback (Extractor | None): Extractor for the definitions not found by
+            the rules. Defaults to None, i.e. they are not extracted.
+        max_reference_chars (int): Maximum number of characters of the datasheet
+            line used as reference. Defaults to 100.
+        unit_aliases (dict[str, list[str]]): Alternative spellings of units in
+            datasheets, e.g. "degC" for "°C". The unit of the definition itself
+            is always searched.
+
+    """
+
+    unit_aliases: ClassVar[dict[str, list[str]]] = {
+        "°C": ["° C", "degC", "deg C"],
+        "°F": ["° F", "degF"],
+        "Ω": ["Ohm", "ohm", "Ω"],
+        "µm": ["μm", "um"],
+        "µs": ["μs", "us"],
+        "µF": ["μF", "uF"],
+        "m³": ["m3", "m^3"],
+        "m²": ["m2", "m^2"],
+        "mm²": ["mm2", "mm^2", "sq mm"],
+        "N·m": ["Nm", "N m", "N*m"],
+        "Nm": ["N·m", "N m", "N*m"],
+        "1/min": ["rpm", "min-1", "min⁻¹"],
+        "l": ["L", "ltr"],
+        "h": ["hrs", "hours"],
+    }
+
+    def __init__(
+        self,
+        fallback: Extractor | None = None,
+        max_reference_chars: int = 100,
+    ) -> None:
+        """Initialize the extractor without fallback."""
+        super().__init__()
+        self.fallback = fallback
+        self.max_reference_chars = max_reference_chars
+
+    def extract(
+        self,
+        datasheet: list[str] | str,
+        property_definition: PropertyDefinition | list[PropertyDefinition],
+        raw_prompts: list | None = None,
+        raw_results: list | None = None,
+    ) -> list[Property]:
+        """Extract the properties found by the rules and pass the others to the `fallback`.
+
+        The properties are returned in the order of the definitions. The
+        `raw_prompts` and `raw_results` are passed to the `fallback`.
+        """
+        properties, remaining = self.extract_rules(datasheet, property_definition)
+        if self.fallback is not None and len(remaining) > 0:
+            properties.extend(
+                self.fallback.extract(
+                    self._text(datasheet),
+                    remaining,
+                    raw_prompts,
+                    raw_results,
+                ),
+            )
+        return self._in_definition_order(properties, property_definition)
+
+    async def aextract(
+        self,
+        datasheet: list[str] | str,
+        property_definition: PropertyDefinition | list[PropertyDefinition],
+        raw_prompts: list | None = None,
+        raw_results: list | None = None,
+    ) -> list[Property]:
+        """Extract the properties asynchronously, c.f. :meth:`extract`."""
+        properties, remaining = self.extract_rules(datasheet, property_definition)
+        if self.fallback is not None and len(remaining) > 0:
+            properties.extend(
+                await self.fallback.aextract(
+                    self._text(datasheet),
+                    remaining,
+                    raw_prompts,
+                    raw_results,
+                ),
+            )
+        return self._in_definition_order(properties, property_definition)
+
+    def extract_stream(
+        self,
+        datasheet: list[str] | str,
+        property_definition: PropertyDefinition | list[PropertyDefinition],
+        raw_prompts: list | None = None,
+        raw_results: list | None = None,
+    ) -> Iterator[Property]:
+        """Yield the properties of the rules first, then stream the `fallback`."""
+        properties, remaining = self.extract_rules(datasheet, property_definition)
+        yield from properties
+        if self.fallback is not None and len(remaining) > 0:
+            yield from self.fallback.extract_stream(
+                self._text(datasheet),
+                remaining,
+                raw_prompts,
+                raw_results,
+            )
+
+    def set_metrics(self, metrics: MetricsSink | None, *, overwrite: bool = True) -> None:
+        """Pass the metrics sink on to the `fallback`."""
+        if self.fallback is not None:
+            self.fallback.set_metrics(metrics, overwrite=overwrite)
+
+    def extract_rules(
+        self,
+        datasheet: list[str] | str,
+        property_definition: PropertyDefinition | list[PropertyDefinition],
+    ) -> tuple[list[Property], list[PropertyDefinition]]:
+        """Apply the rules only.
+
+        Returns:
+            tuple: The properties found and the definitions, that were not found
+                or whose value is ambiguous.
+
+        """
+        if isinstance(property_definition, PropertyDefinition):
+            property_definition = [property_definition]
+        lines = [line for line in self._text(datasheet).splitlines() if line.strip()]
+        lower_lines = [line.lower() for line in lines]
+        properties = []
+        remaining = []
+        for definition in property_definition:
+            property_ = self._search(definition, lines, lower_lines)
+            if property_ is None:
+                remaining.append(definition)
+            else:
+                properties.append(property_)
+        logger.info(
+            "Found %s of %s properties with rules.",
+            len(properties),
+            len(property_definition),
+        )
+        return properties, remaining
+
+    def _search(
+        self,
+        definition: PropertyDefinition,
+        lines: list[str],
+        lower_lines: list[str],
+    ) -> Property | None:
+        names = [
+            name
+            for name in dict.fromkeys([*definition.name.values(), *definition.synonyms])
+            if name.strip()
+        ]
+        found: dict[Any, str] = {}
+        for name in names:
+            lower_name = name.lower()
+            for idx, lower_line in enumerate(lower_lines):
+                if lower_name not in lower_line:
+                    continue
+                match = self._name_pattern(name).search(lines[idx])
+                if match is None:
+                    continue
+                value = self._match_value(definition, lines[idx][match.end() :])
+                if value is not None:
+                    found.setdefault(self._hashable(value), lines[idx].strip())
+        if len(found) != 1:
+            if len(found) > 1:
+                logger.debug("Ambiguous values for %s: %s", definition.id, list(found))
+            return None
+        value, reference = next(iter(found.items()))
+        return Property(
+            label=definition.get_name("en", definition.id),
+            value=list(value) if isinstance(value, tuple) else value,
+            unit=definition.unit or None,
+            reference=reference[: self.max_reference_chars],
+            definition=definition,
+        )
+
+    def _match_value(self, definition: PropertyDefinition, text: str) -> Any:
+        if len(definition.values) > 0:
+            return self._match_values(definition, text)
+        if definition.type == "numeric":
+            return self._match_number(text, definition.unit)
+        if definition.type == "range":
+            return self._match_range(text, definition.unit)
+        if definition.type == "bool":
+            return self._match_bool(text)
+        return None
+
+    def _match_number(self, text: str, unit: str) -> float | int | None:
+        match = self._unit_pattern(rf"(?P<value>{_NUMBER})", unit).match(text)
+        return None if match is None else _parse_number(match.group("value"))
+
+    def _match_range(self, text: str, unit: str) -> tuple | None:
+        match = self._unit_pattern(
+            rf"(?P<min>{_NUMBER}){_RANGE_SEPARATOR}(?P<max>{_NUMBER})",
+            unit,
+        ).match(text)
+        if match is None:
+            return None
+        return (_parse_number(match.group("min")), _parse_number(match.group("max")))
+
+    @staticmethod
+    def _match_bool(text: str) -> bool | None:
+        match = re.match(_KEY_VALUE, text)
+        if match is None:
+            return None
+        return _BOOL_VALUES.get(match.group("value").lower())
+
+    @staticmethod
+    def _match_values(definition: PropertyDefinition, text: str) -> str | None:
+        matches = {
+            value
+            for value in definition.values_list
+            if value and re.search(rf"(?<!\w){re.escape(value)}(?!\w)", text, re.IGNORECASE)
+        }
+        return matches.pop() if len(matches) == 1 else None
+
+    @staticmethod
+    def _in_definition_order(
+        properties: list[Property],
+        property_definition: PropertyDefinition | list[PropertyDefinition],
+    ) -> list[Property]:
+        if isinstance(property_definition, PropertyDefinition):
+            return properties
+        order = {id(definition): idx for idx, definition in enumerate(property_definition)}
+        return sorted(
+            properties,
+            key=lambda property_: order.get(id(property_.definition), len(order)),
+        )
+
+    @staticmethod
+    def _hashable(value: Any) -> Any:
+        return tuple(value) if isinstance(value, list) else value
+
+    @staticmethod
+    def _text(datasheet: list[str] | str) -> str:
+        return "\n".join(datasheet) if isinstance(datasheet, list) else datasheet
+
+    @staticmethod
+    def _name_pattern(name: str) -> re.Pattern:
+        return re.compile(rf"(?<!\w){re.escape(name)}(?!\w)", re.IGNORECASE)
+
+    @classmethod
+    def _unit_pattern(cls, value_pattern: str, unit: str) -> re.Pattern:
+        """Match the value after the name, separated by up to 30 chars without digits."""
+        if unit:
+            units = "|".join(
+                re.escape(alias)
+                for alias in sorted({unit, *cls.unit_aliases.get(unit, [])}, key=len, reverse=True)
+            )
+            value_pattern = rf"{value_pattern}\s*(?:{units})(?!\w)"
+        else:
+            value_pattern = rf"{value_pattern}(?![\d.,]*\s*[^\W\d_])"
+        return re.compile(rf"[^\d\n]{{0,30}}?{value_pattern}")
@@ -0,0 +1,101 @@
+"""Client side rate limiter for LLM requests and tokens per minute."""
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """Pace LLM requests to stay below requests and tokens per minute limits.
+
+    Implements a token bucket per limit as generic cell rate algorithm: each
+    request reserves its share of the bucket and waits until the reservation
+    is due. Thereby the requests are spread evenly instead of being sent in
+    bursts, that are answered with "429 Too Many Requests".
+
+    The limiter is thread safe and can be shared by multiple extractors and
+    clients. Use it either on the extractor or on the client, otherwise the
+    requests are counted twice.
+
+    Attributes:
+        requests_per_minute (float | None): Maximum number of requests per
+            minute. None means no limit.
+        tokens_per_minute (float | None): Maximum number of tokens (prompt and
+            completion) per minute. None means no limit.
+        burst_seconds (float): Time span in seconds, whose share of the limits
+            can be sent at once. Defaults to 1 second.
+
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float | None = None,
+        tokens_per_minute: float | None = None,
+        burst_seconds: float = 1,
+    ) -> None:
+        """Initialize the rate limiter with the given limits."""
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.burst_seconds = burst_seconds
+        self._lock = threading.Lock()
+        # theoretical arrival times of the next request per bucket
+        self._requests_tat = 0.0
+        self._tokens_tat = 0.0
+
+    def acquire(self, tokens: int = 0) -> float:
+        """Block until a request with the estimated number of tokens may be sent.
+
+        Returns the seconds waited.
+        """
+        delay = self._reserve(tokens)
+        if delay > 0:
+            logger.debug("Rate limit reached, waiting %.2fs.", delay)
+            time.sleep(delay)
+        return delay
+
+    async def aacquire(self, tokens: int = 0) -> float:
+        """Wait asynchronously until the request may be sent, c.f. :meth:`acquire`."""
+        delay = self._reserve(tokens)
+        if delay > 0:
+            logger.debug("Rate limit reached, waiting %.2fs.", delay)
+            await asyncio.sleep(delay)
+        return delay
+
+    def reconcile(self, estimated_tokens: int, actual_tokens: int | None) -> None:
+        """Correct the reserved tokens of a request by the actual token usage."""
+        if actual_tokens is None or self.tokens_per_minute is None:
+            return
+        with self._lock:
+            self._tokens_tat += (actual_tokens - estimated_tokens) * 60 / self.tokens_per_minute
+
+    def reconcile_usage(self, estimated_tokens: int, raw_result: Any) -> None:
+        """Correct the reserved tokens by the "usage" of an OpenAI like raw result."""
+        if not isinstance(raw_result, dict):
+            return
+        usage = raw_result.get("usage")
+        if not isinstance(usage, dict):
+            return
+        self.reconcile(estimated_tokens, usage.get("total_tokens"))
+
+    def _reserve(self, tokens: int) -> float:
+        now = time.monotonic()
+        with self._lock:
+            delay = 0.0
+            if self.requests_per_minute:
+                tat = max(self._requests_tat, now)
+                delay = max(delay, tat - self.burst_seconds - now)
+            if self.tokens_per_minute:
+                tat = max(self._tokens_tat, now)
+                delay = max(delay, tat - self.burst_seconds - now)
+            start = now + delay
+            if self.requests_per_minute:
+                self._requests_tat = max(self._requests_tat, start) + 60 / self.requests_per_minute
+            if self.tokens_per_minute:
+                self._tokens_tat = (
+                    max(self._tokens_tat, start) + tokens * 60 / self.tokens_per_minute
+                )
+        return delay
@@ -0,0 +1,168 @@
+"""Lexical retrieval of the datasheet chunks relevant for property definitions."""
+
+import logging
+import math
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass
+
+from pdf2aas.model import PropertyDefinition
+
+logger = logging.getLogger(__name__)
+
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list[str]:
+    """Split the text into lower case word tokens."""
+    return _TOKEN.findall(text.lower())
+
+
+@dataclass
+class _BM25Index:
+    chunks: list[str]
+    term_frequencies: list[Counter[str]]
+    lengths: list[int]
+    average_length: float
+    document_frequencies: Counter[str]
+
+
+class BM25Retriever:
+    """Select the datasheet chunks that match the searched property definitions.
+
+    The datasheet (or each of its pages) is split into chunks of at most
+    `chunk_chars` characters along line breaks. The chunks are ranked with the
+    Okapi BM25 function against the names, synonyms and units of the
+    definitions. Only the `top_k` best chunks are kept in their original
+    order, which shrinks the prompt for long datasheets.
+
+    The index of the last datasheet is kept, because the same datasheet is
+    usually searched for multiple batches of definitions.
+
+    Attributes:
+        top_k (int): Maximum number of chunks to keep. Defaults to 5.
+        chunk_chars (int): Maximum number of characters per chunk. Pages are
+            only split, if they are longer. Defaults to 2000.
+        k1 (float): BM25 term frequency saturation. Defaults to 1.5.
+        b (float): BM25 document length normalization. Defaults to 0.75.
+
+    """
+
+    def __init__(
+        self,
+        top_k: int = 5,
+        chunk_chars: int = 2000,
+        k1: float = 1.5,
+        b: float = 0.75,
+    ) -> None:
+        """Initialize the retriever with the default BM25 parameters."""
+        self.top_k = top_k
+        self.chunk_chars = chunk_chars
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._last: tuple[list[str] | str, int, _BM25Index] | None = None
+
+    def retrieve(
+        self,
+        datasheet: list[str] | str,
+        property_definition: PropertyDefinition | list[PropertyDefinition],
+    ) -> list[str] | str:
+        """Get the most relevant chunks of the datasheet for the definitions.
+
+        Returns the datasheet unchanged, if it has no more than `top_k` chunks
+        or if no chunk matches the definitions.
+        """
+        index = self._index(datasheet)
+        if len(index.chunks) <= self.top_k:
+            return datasheet
+        if isinstance(property_definition, PropertyDefinition):
+            property_definition = [property_definition]
+        scores = self._score(index, self.query(property_definition))
+        ranked = sorted(
+            (idx for idx, score in enumerate(scores) if score > 0),
+            key=lambda idx: scores[idx],
+            reverse=True,
+        )[: self.top_k]
+        if len(ranked) == 0:
+            logger.debug("No datasheet chunk matches the definitions, keeping all.")
+            return datasheet
+        logger.debug("Retrieved %s of %s datasheet chunks.", len(ranked), len(index.chunks))
+        return [index.chunks[idx] for idx in sorted(ranked)]
+
+    @staticmethod
+    def query(property_definitions: list[PropertyDefinition]) -> list[str]:
+        """Get the query terms from the names, synonyms and units of the definitions."""
+        terms = []
+        for definition in property_definitions:
+            for name in [*definition.name.values(), *definition.synonyms]:
+                terms.extend(tokenize(name))
+            terms.extend(tokenize(definition.unit))
+        return terms
+
+    def split(self, datasheet: list[str] | str) -> list[str]:
+        """Split the pages into chunks of at most `chunk_chars` along line breaks."""
+        pages = [datasheet] if isinstance(datasheet, str) else datasheet
+        chunks = []
+        for page in pages:
+            if len(page) <= self.chunk_chars:
+                chunks.append(page)
+                continue
+            chunk: list[str] = []
+            chunk_length = 0
+            for line in page.split("\n"):
+                if chunk and chunk_length + len(line) > self.chunk_chars:
+                    chunks.append("\n".join(chunk))
+                    chunk = []
+                    chunk_length = 0
+                chunk.append(line)
+                chunk_length += len(line) + 1
+            if chunk:
+                chunks.append("\n".join(chunk))
+        return chunks
+
+    def _score(self, index: _BM25Index, query: list[str]) -> list[float]:
+        """Calculate the BM25 score of every chunk in the index for the query."""
+        count = len(index.chunks)
+        scores = [0.0] * count
+        for term in set(query):
+            frequency = index.document_frequencies.get(term)
+            if not frequency:
+                continue
+            idf = math.log((count - frequency + 0.5) / (frequency + 0.5) + 1)
+            for idx, term_frequencies in enumerate(index.term_frequencies):
+                term_frequency = term_frequencies.get(term)
+                if not term_frequency:
+                    continue
+                norm = 1 - self.b + self.b * index.lengths[idx] / (index.average_length or 1)
+                scores[idx] += (
+                    idf * term_frequency * (self.k1 + 1) / (term_frequency + self.k1 * norm)
+                )
+        return scores
+
+    def _index(self, datasheet: list[str] | str) -> _BM25Index:
+        with self._lock:
+            last = self._last
+        if last is not None and last[1] == self.chunk_chars and last[0] == datasheet:
+            return last[2]
+        chunks = self.split(datasheet)
+        term_frequencies = [Counter(tokenize(chunk)) for chunk in chunks]
+        lengths = [sum(frequencies.values()) for frequencies in term_frequencies]
+        document_frequencies: Counter[str] = Counter()
+        for frequencies in term_frequencies:
+            document_frequencies.update(frequencies.keys())
+        index = _BM25Index(
+            chunks,
+            term_frequencies,
+            lengths,
+            sum(lengths) / len(lengths) if lengths else 0,
+            document_frequencies,
+        )
+        with self._lock:
+            self._last = (
+                datasheet if isinstance(datasheet, str) else list(datasheet),
+                self.chunk_chars,
+                index,
+            )
+        return index
@@ -0,0 +1,63 @@
+"""Functions to estimate the number of tokens of prompts before sending them.
+
+Uses the tokenizer of the model via the optional `tiktoken` package, if it is
+installed and knows the model. Otherwise the tokens are estimated from the
+number of characters.
+"""
+
+import logging
+import math
+from functools import lru_cache
+from typing import Any
+
+try:
+    import tiktoken  # type: ignore[import-not-found, unused-ignore]
+except ImportError:
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4
+"""Average number of characters per token used for the estimation."""
+
+MESSAGE_OVERHEAD_TOKENS = 4
+"""Tokens added per chat message for role and separators."""
+
+OUTPUT_TOKENS_PER_PROPERTY = 50
+"""Completion tokens per extracted property, i.e. a JSON object with reference."""
+
+
+@lru_cache(maxsize=16)
+def _encoding(model: str) -> Any | None:
+    """Get the tokenizer of the model, caching failures as None.
+
+    Besides unknown models, tiktoken fails if the encoding files can't be
+    downloaded, which must not break the estimation.
+    """
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except Exception as error:  # noqa: BLE001
+        logger.debug(
+            "Couldn't get tokenizer for model %s, estimating tokens by chars: %s",
+            model,
+            error,
+        )
+        return None
+
+
+def estimate_tokens(text: str, model: str | None = None) -> int:
+    """Estimate the number of tokens of the text, using the model tokenizer if available."""
+    encoding = None if model is None else _encoding(model)
+    if encoding is None:
+        return math.ceil(len(text) / CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def estimate_message_tokens(messages: list[dict[str, str]], model: str | None = None) -> int:
+    """Estimate the number of prompt tokens of chat messages."""
+    return sum(
+        estimate_tokens(message.get("content", ""), model) + MESSAGE_OVERHEAD_TOKENS
+        for message in messages
+    )
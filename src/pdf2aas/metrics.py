@@ -0,0 +1,309 @@
+"""Timing spans and counters of the toolchain steps, reported to pluggable sinks."""
+
+import logging
+import re
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from contextlib import contextmanager
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+
+try:
+    from opentelemetry import metrics as otel_metrics  # type: ignore[import-not-found, unused-ignore]
+    from opentelemetry import trace as otel_trace  # type: ignore[import-not-found, unused-ignore]
+except ImportError:
+    otel_metrics = None
+    otel_trace = None
+
+logger = logging.getLogger(__name__)
+
+_INVALID_NAME_CHARS = re.compile(r"[^a-zA-Z0-9_]")
+
+
+class MetricsSink(ABC):
+    """Receiver of the timing spans and counters recorded by the toolchain.
+
+    Spans are named after the toolchain steps, e.g. "preprocess",
+    "definitions", "extract", "generate", "retrieve", "prompt_build",
+    "llm_request" and "parse". Counters are e.g. "llm_prompt_tokens", "llm_completion_tokens",
+    "llm_cached_tokens" and "llm_cache_hits". The attributes contain context
+    like the "model" or the "filepath".
+    """
+
+    @abstractmethod
+    def record_span(self, name: str, seconds: float, attributes: dict[str, Any]) -> None:
+        """Record the duration of a finished span in seconds."""
+
+    @abstractmethod
+    def record_count(self, name: str, value: float, attributes: dict[str, Any]) -> None:
+        """Add the value to the counter with the given name."""
+
+
+@contextmanager
+def span(sink: MetricsSink | None, name: str, **attributes: Any) -> Iterator[dict[str, Any]]:
+    """Measure the duration of the with block and record it as span at the sink.
+
+    Yields the attributes, so that they can be extended inside the block, e.g.
+    by the number of extracted properties. Does nothing, if the sink is None.
+    The span is recorded with an additional "error" attribute, if the block
+    raises an exception.
+    """
+    if sink is None:
+        yield attributes
+        return
+    start = time.perf_counter()
+    try:
+        yield attributes
+    except BaseException as error:
+        attributes["error"] = type(error).__name__
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        try:
+            sink.record_span(name, seconds, attributes)
+        except Exception:
+            logger.exception("Couldn't record span %s.", name)
+
+
+def record_llm_usage(sink: MetricsSink | None, raw_result: Any, attributes: dict[str, Any]) -> None:
+    """Count the prompt, completion and cached tokens of an OpenAI like raw result."""
+    if sink is None or not isinstance(raw_result, dict):
+        return
+    usage = raw_result.get("usage")
+    if not isinstance(usage, dict):
+        return
+    prompt_tokens_details = usage.get("prompt_tokens_details") or {}
+    for name, value in (
+        ("llm_prompt_tokens", usage.get("prompt_tokens")),
+        ("llm_completion_tokens", usage.get("completion_tokens")),
+        ("llm_cached_tokens", prompt_tokens_details.get("cached_tokens")),
+    ):
+        if isinstance(value, int | float):
+            sink.record_count(name, value, attributes)
+
+
+class LoggingSink(MetricsSink):
+    """Log the spans and counters via the python logging module.
+
+    Attributes:
+        level (int): The log level of the messages. Defaults to logging.INFO.
+
+    """
+
+    def __init__(self, level: int = logging.INFO) -> None:
+        """Initialize the sink with the log level."""
+        self.level = level
+
+    def record_span(self, name: str, seconds: float, attributes: dict[str, Any]) -> None:
+        """Log the duration of the span together with its attributes."""
+        logger.log(self.level, "Span %s took %.3fs %s", name, seconds, attributes)
+
+    def record_count(self, name: str, value: float, attributes: dict[str, Any]) -> None:
+        """Log the counted value together with its attributes."""
+        logger.log(self.level, "Counter %s +%s %s", name, value, attributes)
+
+
+class PrometheusSink(MetricsSink):
+    """Aggregate the spans and counters in memory and export them as Prometheus text.
+
+    Spans are exported as summaries `<prefix>_span_seconds_sum` and
+    `<prefix>_span_seconds_count` with a "span" label, counters as
+    `<prefix>_<name>_total`. Use :meth:`render` to get the text exposition,
+    :meth:`write` to update a file for the node exporter textfile collector,
+    or :meth:`serve` to scrape the metrics via HTTP.
+
+    Attributes:
+        prefix (str): Prefix of all metric names. Defaults to "pdf2aas".
+        labels (tuple[str, ...]): The attributes exported as labels. Other
+            attributes are dropped to keep the number of time series small.
+            Defaults to "model".
+
+    """
+
+    def __init__(
+        self,
+        prefix: str = "pdf2aas",
+        labels: tuple[str, ...] = ("model",),
+    ) -> None:
+        """Initialize the sink without any recorded metrics."""
+        self.prefix = prefix
+        self.labels = labels
+        self._spans: dict[tuple[str, tuple], list[float]] = {}
+        self._counters: dict[tuple[str, tuple], float] = {}
+        self._lock = threading.Lock()
+
+    def record_span(self, name: str, seconds: float, attributes: dict[str, Any]) -> None:
+        """Add the duration to the sum and count of the span."""
+        key = (name, self._label_values(attributes))
+        with self._lock:
+            summary = self._spans.setdefault(key, [0.0, 0])
+            summary[0] += seconds
+            summary[1] += 1
+
+    def record_count(self, name: str, value: float, attributes: dict[str, Any]) -> None:
+        """Add the value to the total of the counter."""
+        key = (name, self._label_values(attributes))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def clear(self) -> None:
+        """Reset all recorded metrics."""
+        with self._lock:
+            self._spans.clear()
+            self._counters.clear()
+
+    def render(self) -> str:
+        """Render the metrics in the Prometheus text exposition format."""
+        with self._lock:
+            spans = sorted(self._spans.items())
+            counters = sorted(self._counters.items())
+        lines = []
+        if len(spans) > 0:
+            metric = f"{self.prefix}_span_seconds"
+            lines.append(f"# HELP {metric} Duration of the toolchain steps in seconds.")
+            lines.append(f"# TYPE {metric} summary")
+            for (name, label_values), (total, count) in spans:
+                labels = self._format_labels(label_values, span=name)
+                lines.append(f"{metric}_sum{labels} {total}")
+                lines.append(f"{metric}_count{labels} {int(count)}")
+        previous = None
+        for (name, label_values), total in counters:
+            metric = f"{self.prefix}_{_INVALID_NAME_CHARS.sub('_', name)}_total"
+            if metric != previous:
+                lines.append(f"# TYPE {metric} counter")
+                previous = metric
+            lines.append(f"{metric}{self._format_labels(label_values)} {total}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def write(self, filepath: str) -> None:
+        """Write the rendered metrics atomically to the file.
+
+        Compatible with the textfile collector of the Prometheus node exporter,
+        which expects the ".prom" extension. The file is readable by all
+        users, as the node exporter usually runs as another user.
+        """
+        path = Path(filepath)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        rendered = self.render()
+        fd, temp_name = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".", suffix=".tmp")
+        temp_path = Path(temp_name)
+        try:
+            with open(fd, "w", encoding="utf-8") as file:
+                file.write(rendered)
+            temp_path.chmod(0o644)
+            temp_path.replace(path)
+        finally:
+            temp_path.unlink(missing_ok=True)
+
+    def serve(self, port: int = 9464, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """Serve the rendered metrics via HTTP in a daemon thread.
+
+        Returns the server, which can be stopped via its `shutdown` method.
+        """
+        sink = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                body = sink.render().encode("utf-8")
+                self.send_response(HTTPStatus.OK)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+                logger.debug(format, *args)
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        logger.info("Serving metrics on http://%s:%s/metrics", host, server.server_port)
+        return server
+
+    def _label_values(self, attributes: dict[str, Any]) -> tuple:
+        return tuple(
+            (label, str(attributes[label]))
+            for label in self.labels
+            if attributes.get(label) is not None
+        )
+
+    @staticmethod
+    def _format_labels(label_values: tuple, **extra: str) -> str:
+        pairs = [*extra.items(), *label_values]
+        if len(pairs) == 0:
+            return ""
+        escaped = (
+            (label, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+            for label, value in pairs
+        )
+        return "{" + ",".join(f'{label}="{value}"' for label, value in escaped) + "}"
+
+
+class OpenTelemetrySink(MetricsSink):
+    """Forward the spans and counters to the OpenTelemetry API.
+
+    Each span is reported as trace span, ending now and starting its duration
+    earlier, and as histogram `<prefix>.<name>.duration` in seconds. Counters
+    are reported as OpenTelemetry counters `<prefix>.<name>`. The configured
+    global tracer and meter providers are used, e.g. with an OTLP exporter.
+    Needs the optional `opentelemetry-api` package.
+
+    Attributes:
+        prefix (str): Prefix of all span and metric names. Defaults to "pdf2aas".
+
+    """
+
+    def __init__(self, prefix: str = "pdf2aas") -> None:
+        """Get the tracer and meter of the global OpenTelemetry providers."""
+        if otel_trace is None or otel_metrics is None:
+            error = "OpenTelemetrySink needs the opentelemetry-api package."
+            raise ImportError(error)
+        self.prefix = prefix
+        self._tracer = otel_trace.get_tracer(__name__)
+        self._meter = otel_metrics.get_meter(__name__)
+        self._instruments: dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def record_span(self, name: str, seconds: float, attributes: dict[str, Any]) -> None:
+        """Report the span to the tracer and its duration to a histogram."""
+        attributes = self._attributes(attributes)
+        end = time.time_ns()
+        otel_span = self._tracer.start_span(
+            f"{self.prefix}.{name}",
+            start_time=end - int(seconds * 1e9),
+            attributes=attributes,
+        )
+        otel_span.end(end_time=end)
+        self._instrument(f"{self.prefix}.{name}.duration", histogram=True).record(
+            seconds,
+            attributes,
+        )
+
+    def record_count(self, name: str, value: float, attributes: dict[str, Any]) -> None:
+        """Add the value to the OpenTelemetry counter."""
+        self._instrument(f"{self.prefix}.{name}").add(value, self._attributes(attributes))
+
+    def _instrument(self, name: str, *, histogram: bool = False) -> Any:
+        with self._lock:
+            instrument = self._instruments.get(name)
+            if instrument is None:
+                instrument = (
+                    self._meter.create_histogram(name, unit="s")
+                    if histogram
+                    else self._meter.create_counter(name)
+                )
+                self._instruments[name] = instrument
+            return instrument
+
+    @staticmethod
+    def _attributes(attributes: dict[str, Any]) -> dict[str, Any]:
+        """Keep the attributes with types supported by OpenTelemetry."""
+        return {
+            key: value
+            for key, value in attributes.items()
+            if isinstance(value, str | bool | int | float)
+        }
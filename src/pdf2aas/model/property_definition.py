@@ -26,6 +26,9 @@ class PropertyDefinition:
             strings or dictionarys that store possible values for the property.
             Defaults to an empty list.
             Well known keys in dictionary form are: value, defintition, id.
+        synonyms (list[str]): Alternative names or keywords of the property,
+            e.g. from the ECLASS keywords and synonyms. Defaults to an empty
+            list.
         values_list (list[str]): Get possible values as flat list of strings.
 
     """
@@ -38,6 +41,7 @@ class PropertyDefinition:
     values: list[str] | list[dict[ValueDefinitionKeyType, str]] = field(
         default_factory=list,
     )
+    synonyms: list[str] = field(default_factory=list)
 
     @property
     def values_list(self) -> list[str]:
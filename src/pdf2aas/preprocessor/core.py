@@ -1,6 +1,37 @@
 """Abstract definitions for preprocessors."""
 
+import logging
 from abc import ABC, abstractmethod
+from collections.abc import Iterable, Iterator
+from typing import Any, ClassVar
+
+logger = logging.getLogger(__name__)
+
+
+def page_indices(pages: Iterable[int] | None, page_count: int) -> list[int]:
+    """Convert page numbers starting at 1 to sorted page indices starting at 0.
+
+    Returns all page indices, if `pages` is None. Page numbers exceeding the
+    `page_count` are ignored.
+    """
+    if pages is None:
+        return list(range(page_count))
+    indices = sorted({page - 1 for page in pages})
+    if any(index < 0 or index >= page_count for index in indices):
+        logger.warning("Ignoring page numbers outside of 1 to %s: %s", page_count, pages)
+    return [index for index in indices if 0 <= index < page_count]
+
+
+def _serializable(value: Any) -> Any:
+    """Get a JSON serializable copy of the value or raise a TypeError."""
+    if value is None or isinstance(value, str | int | float):
+        return value
+    if isinstance(value, list | tuple | range):
+        return [_serializable(item) for item in value]
+    if isinstance(value, dict) and all(isinstance(key, str) for key in value):
+        return {key: _serializable(item) for key, item in value.items()}
+    error = f"{type(value).__name__} is not JSON serializable."
+    raise TypeError(error)
 
 
 class Preprocessor(ABC):
@@ -9,9 +40,20 @@ class Preprocessor(ABC):
     Methods:
         convert(filepath: str) -> list[str] | str:
             Convert the given PDF file into a preprocessed format.
+        iter_pages(filepath: str) -> Iterator[str]:
+            Yield the preprocessed content lazily, e.g. page by page.
+        settings() -> dict[str, Any]:
+            Get the configuration, e.g. to identify cached results.
+
+    Attributes:
+        execution_settings (tuple[str, ...]): Names of attributes, which only
+            control how the conversion is executed, e.g. the number of workers,
+            but not its result. They are excluded from :meth:`settings`.
 
     """
 
+    execution_settings: ClassVar[tuple[str, ...]] = ()
+
     @abstractmethod
     def convert(self, filepath: str) -> list[str] | str | None:
         """Convert the given PDF file into a preprocessed format.
@@ -26,3 +68,36 @@ class Preprocessor(ABC):
                 Returns None on error.
 
         """
+
+    def iter_pages(self, filepath: str) -> Iterator[str]:
+        """Yield the preprocessed content of the given file lazily.
+
+        Allows downstream stages to start before the whole document is
+        processed. PDF preprocessors yield page by page. Other preprocessors
+        yield the elements of the :meth:`convert` result by default, or the
+        result itself if it is a string. Yields nothing on error.
+        """
+        result = self.convert(filepath)
+        if isinstance(result, str):
+            yield result
+        elif result is not None:
+            yield from result
+
+    def settings(self) -> dict[str, Any]:
+        """Get the configuration of the preprocessor as JSON serializable dict.
+
+        Used as part of the key of cached preprocessing results. Contains the
+        public attributes by default, except the `execution_settings`.
+        Attributes without a JSON representation are skipped, as their string
+        representation is not stable across processes, e.g. if it contains a
+        memory address.
+        """
+        settings = {}
+        for name, value in vars(self).items():
+            if name.startswith("_") or name in self.execution_settings:
+                continue
+            try:
+                settings[name] = _serializable(value)
+            except TypeError as error:
+                logger.debug("Skipping setting %s of %s: %s", name, type(self).__name__, error)
+        return settings
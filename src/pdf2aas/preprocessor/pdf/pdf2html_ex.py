@@ -5,13 +5,25 @@ import os.path
 import re
 import shutil
 import subprocess
+import tempfile
+from collections.abc import Generator, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from enum import IntEnum
 from pathlib import Path
+from typing import TextIO
 
 from pdf2aas.preprocessor import Preprocessor
 
 logger = logging.getLogger(__name__)
 
+_BODY_START = "<body>\n"
+_BODY_END = "\n</body>"
+_PAGE = re.compile(r'<div id="pf.*')
+_SPAN_TAG = re.compile(r"<span .*?>|</span>")
+_SPAN_OR_DIV_START_TAG = re.compile(r"<span .*?>|</span>|<div.*?>")
+_SPAN_OR_DIV_TAG = re.compile(r"<span .*?>|</span>|<div.*?>|</div>")
+
 
 class ReductionLevel(IntEnum):
     """Level of HTML text reduction.
@@ -46,19 +58,38 @@ class PDF2HTMLEX(Preprocessor):
         reduction_level (ReductionLevel): The default level of HTML reduction to
             apply after conversion.
         temp_dir (str): The directory where temporary HTML files will be stored.
+            Every conversion uses a unique subdirectory, hence documents with the
+            same file name don't collide. Point it to a RAM-backed directory,
+            e.g. "/dev/shm/pdf2aas", to avoid disk writes.
+        pages (tuple[int, ...] | None): Numbers of the pages to convert, starting
+            at 1. pdf2htmlEX converts the range from the first to the last
+            selected page. Pages outside the selection are removed, if the
+            `reduction_level` is PAGES or higher. Defaults to None, i.e. all pages.
+        timeout (float | None): Seconds after which a pdf2htmlEX call is killed
+            and the conversion fails. Defaults to None, i.e. no timeout.
+        cleanup (bool): Remove the temporary HTML files after each conversion.
+            Defaults to True.
 
     """
 
+    execution_settings = ("temp_dir", "timeout", "cleanup")
+
     def __init__(
         self,
         reduction_level: ReductionLevel = ReductionLevel.NONE,
         temp_dir: str = "temp/html",
+        pages: Iterable[int] | None = None,
+        *,
+        timeout: float | None = None,
+        cleanup: bool = True,
     ) -> None:
         """Initiliaze preprocessor with no reduction and 'temp/html' temp directory."""
         self.reduction_level = reduction_level
         self.temp_dir = temp_dir
+        self.pages = None if pages is None else tuple(pages)
+        self.timeout = timeout
+        self.cleanup = cleanup
 
-    # TODO: add possibility to specify pages
     def convert(self, filepath: str) -> list[str] | str:
         """Convert a PDF file at the given filepath to HTML text.
 
@@ -73,8 +104,114 @@ class PDF2HTMLEX(Preprocessor):
 
         """
         logger.info("Converting to html from pdf: %s", filepath)
+        pages = None if self.pages is None else sorted(set(self.pages))
+        if pages is not None and len(pages) == 0:
+            return ""
+        reduced_datasheet = self._convert_range(
+            filepath,
+            pages[0] if pages else None,
+            pages[-1] if pages else None,
+        )
+        if reduced_datasheet is None:
+            return ""
+        if pages and isinstance(reduced_datasheet, list):
+            reduced_datasheet = [
+                reduced_datasheet[page - pages[0]]
+                for page in pages
+                if page - pages[0] < len(reduced_datasheet)
+            ]
+        return reduced_datasheet
+
+    def convert_many(
+        self,
+        filepaths: Iterable[str],
+        max_workers: int | None = None,
+    ) -> list[list[str] | str]:
+        """Convert multiple PDF files with a bounded pool of pdf2htmlEX processes.
+
+        Each worker thread waits for its own pdf2htmlEX subprocess, so that the
+        conversions run on multiple cores.
+
+        Args:
+            filepaths (Iterable[str]): The file paths to the PDF documents.
+            max_workers (int, optional): Maximum number of concurrent pdf2htmlEX
+                processes. Defaults to the number of CPUs.
+
+        Returns:
+            texts (list[list[str] | str]): The results of :meth:`convert` in
+                the order of the `filepaths`.
+
+        """
+        with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+            return list(executor.map(self.convert, filepaths))
+
+    def iter_pages(self, filepath: str) -> Iterator[str]:
+        """Convert the document and yield the reduced pages lazily, c.f. :meth:`convert`.
+
+        The selected pages are converted by a single pdf2htmlEX call. The pages
+        are reduced and yielded one by one while reading the HTML file. If the
+        `reduction_level` is lower than PAGES, the HTML is yielded as whole.
+        """
+        if self.reduction_level < ReductionLevel.PAGES:
+            result = self.convert(filepath)
+            if result:
+                yield from [result] if isinstance(result, str) else result
+            return
+        logger.info("Converting to html from pdf: %s", filepath)
+        pages = None if self.pages is None else sorted(set(self.pages))
+        if pages is not None and len(pages) == 0:
+            return
+        first_page, last_page = (pages[0], pages[-1]) if pages else (None, None)
+        with self._converted_html(filepath, first_page, last_page) as html_path:
+            if html_path is None:
+                return
+            with html_path.open() as html_file:
+                complete = yield from self._iter_reduced_lines(
+                    html_file,
+                    self.reduction_level,
+                    pages,
+                )
+        if not complete:
+            logger.warning("HTML body of %s is missing or incomplete.", filepath)
+
+    def _convert_range(
+        self,
+        filepath: str,
+        first_page: int | None,
+        last_page: int | None,
+    ) -> str | list[str] | None:
+        with self._converted_html(filepath, first_page, last_page) as html_path:
+            if html_path is None:
+                return None
+            return self._reduce_file(html_path)
+
+    @contextmanager
+    def _converted_html(
+        self,
+        filepath: str,
+        first_page: int | None,
+        last_page: int | None,
+    ) -> Iterator[Path | None]:
+        """Convert the pages to a unique temp dir and yield the HTML path or None on error."""
         filename = Path(filepath).stem
-        dest_dir = Path(self.temp_dir, filename)
+        Path(self.temp_dir).mkdir(parents=True, exist_ok=True)
+        dest_dir = Path(tempfile.mkdtemp(prefix=f"{filename}_", dir=self.temp_dir))
+        try:
+            if not self._run_pdf2htmlex(filepath, dest_dir, first_page, last_page):
+                yield None
+            else:
+                yield Path(dest_dir, filename + ".html")
+        finally:
+            if self.cleanup:
+                shutil.rmtree(dest_dir, ignore_errors=True)
+
+    def _run_pdf2htmlex(
+        self,
+        filepath: str,
+        dest_dir: Path,
+        first_page: int | None,
+        last_page: int | None,
+    ) -> bool:
         try:
             pdf2html = subprocess.run(  # noqa: S603
                 [  # noqa: S607
@@ -107,6 +244,8 @@ class PDF2HTMLEX(Preprocessor):
                     "0",
                     "--optimize-text",
                     "1",
+                    *(["--first-page", str(first_page)] if first_page is not None else []),
+                    *(["--last-page", str(last_page)] if last_page is not None else []),
                     "--dest-dir",
                     dest_dir,
                     filepath,
@@ -114,10 +253,14 @@ class PDF2HTMLEX(Preprocessor):
                 capture_output=True,
                 text=True,
                 check=False,
+                timeout=self.timeout,
             )
         except FileNotFoundError:
             logger.exception("pdf2htmlEX executable not found in path.")
-            return ""
+            return False
+        except subprocess.TimeoutExpired:
+            logger.warning("Call to pdf2htmlEX timed out after %ss: %s", self.timeout, filepath)
+            return False
 
         if pdf2html.stdout:
             logger.debug("pdf2htmlEX stdout:\n%s", pdf2html.stdout)
@@ -128,17 +271,20 @@ class PDF2HTMLEX(Preprocessor):
             logger.error("Call to pdf2htmlEX failed with returncode: %s", pdf2html.returncode)
             logger.debug("pdf2htmlEX arguments: %s", pdf2html.args)
             # TODO: raise custom PDF2HTML error instead
-            return ""
+            return False
 
-        return self.reduce_datasheet(Path(dest_dir, filename + ".html").read_text())
+        return True
 
-    def reduce_datasheet(  # noqa: C901
+    def reduce_datasheet(
         self,
         datasheet: str,
         level: ReductionLevel | None = None,
     ) -> str | list[str]:
         """Reduce the HTML content of a datasheet according to the specified reduction level.
 
+        The body and pages are located in a single scan without copying the
+        body. Each page is reduced by one substitution pass for all levels.
+
         Args:
             datasheet (str): The HTML content of the datasheet to be reduced.
             level (Optional[ReductionLevel]): The level of reduction to apply.
@@ -150,38 +296,92 @@ class PDF2HTMLEX(Preprocessor):
         """
         if level is None:
             level = self.reduction_level
-        reduced_datasheet = datasheet
+        result: str | list[str] = datasheet
         if level >= ReductionLevel.BODY:
-            logger.debug("Reducing datasheet to ReductionLevel.BODY")
-            reduced_datasheet_match = re.search(
-                r"<body>\n((?:.*\n)*.*)\n</body>",
-                reduced_datasheet,
-            )
-            if reduced_datasheet_match is None:
+            body_start = datasheet.find(_BODY_START)
+            body_end = datasheet.rfind(_BODY_END)
+            if body_start < 0 or body_end < body_start + len(_BODY_START):
                 return ""
-            reduced_datasheet = reduced_datasheet_match.group(1)
-
-        reduced_datasheet_list = []
-        if level >= ReductionLevel.PAGES:
-            logger.debug("Reducing datasheet to ReductionLevel.PAGES")
-            reduced_datasheet_list = re.findall(r'<div id="pf.*', reduced_datasheet)
-        if level >= ReductionLevel.DIVS:
-            logger.debug("Reducing datasheet to ReductionLevel.DIVS")
-            for idx, page in enumerate(reduced_datasheet_list):
-                reduced_datasheet_list[idx] = re.sub(r"<span .*?>|</span>", "", page)
-        if level >= ReductionLevel.STRUCTURE:
-            logger.debug("Reducing datasheet to ReductionLevel.STRUCTURE")
-            for idx, page in enumerate(reduced_datasheet_list):
-                reduced_datasheet_list[idx] = re.sub(r"<div.*?>", "<div>", page)
-        if level >= ReductionLevel.TEXT:
-            logger.debug("Reducing datasheet to ReductionLevel.TEXT")
-            for idx, page in enumerate(reduced_datasheet_list):
-                reduced_datasheet_list[idx] = re.sub(r"<div.*?>|</div>", "", page)
-        result = reduced_datasheet_list if level >= ReductionLevel.PAGES else reduced_datasheet
+            body_start += len(_BODY_START)
+            if level >= ReductionLevel.PAGES:
+                result = [
+                    self._reduce_page(match.group(), level)
+                    for match in _PAGE.finditer(datasheet, body_start, body_end)
+                ]
+            else:
+                result = datasheet[body_start:body_end]
         logger.info("Reduced datasheet to ReductionLevel %s", level.name)
-        logger.debug("Reduced datasheet text:\n%s", str(result))
+        logger.debug("Reduced datasheet text:\n%s", result)
         return result
 
+    def _reduce_file(self, html_path: Path) -> str | list[str]:
+        """Reduce the HTML file, streaming it line by line for PAGES or higher."""
+        level = self.reduction_level
+        if level < ReductionLevel.PAGES:
+            return self.reduce_datasheet(html_path.read_text(), level)
+        with html_path.open() as html_file:
+            pages = self._reduce_lines(html_file, level)
+        if pages is None:
+            return ""
+        logger.info("Reduced datasheet to ReductionLevel %s", level.name)
+        logger.debug("Reduced datasheet text:\n%s", pages)
+        return pages
+
+    def _reduce_lines(self, lines: TextIO, level: ReductionLevel) -> list[str] | None:
+        """Reduce the pages of the body, holding only the current line in memory.
+
+        pdf2htmlEX writes every page in a separate line. Returns None, if the
+        body is missing or incomplete.
+        """
+        pages: list[str] = []
+        reduced = self._iter_reduced_lines(lines, level)
+        try:
+            while True:
+                pages.append(next(reduced))
+        except StopIteration as stop:
+            return pages if stop.value else None
+
+    def _iter_reduced_lines(
+        self,
+        lines: TextIO,
+        level: ReductionLevel,
+        pages: list[int] | None = None,
+    ) -> Generator[str, None, bool]:
+        """Yield the reduced pages of the body and return False, if it is incomplete.
+
+        Yields only the selected `pages`, if given. The body is expected to
+        start with the first selected page, c.f. :meth:`convert`.
+        """
+        selected = None if pages is None else set(pages)
+        page = pages[0] if pages else 1
+        in_body = False
+        for line in lines:
+            if not in_body:
+                in_body = line.endswith(_BODY_START)
+                continue
+            if line.startswith(_BODY_END[1:]):
+                return True
+            match = _PAGE.search(line)
+            if match is None:
+                continue
+            if selected is None or page in selected:
+                yield self._reduce_page(match.group(), level)
+            page += 1
+        return False
+
+    @staticmethod
+    def _reduce_page(page: str, level: ReductionLevel) -> str:
+        if level >= ReductionLevel.TEXT:
+            return _SPAN_OR_DIV_TAG.sub("", page)
+        if level >= ReductionLevel.STRUCTURE:
+            return _SPAN_OR_DIV_START_TAG.sub(
+                lambda tag: "<div>" if tag.group().startswith("<div") else "",
+                page,
+            )
+        if level >= ReductionLevel.DIVS:
+            return _SPAN_TAG.sub("", page)
+        return page
+
     def clear_temp_dir(self) -> None:
         """Clear the temporary directory used for storing intermediate HTML files."""
         if not Path(self.temp_dir).is_dir():
@@ -1,25 +1,80 @@
 """Preprocessor using pypdfium2 library."""
 
 import logging
+import math
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 
 from pypdfium2 import PdfDocument, PdfiumError  # type: ignore[import-untyped]
 
 from pdf2aas.preprocessor import Preprocessor
+from pdf2aas.preprocessor.core import page_indices
 
 logger = logging.getLogger(__name__)
 
 
+def _extract_page_text(doc: PdfDocument, index: int) -> str:
+    """Extract the text of a page and close the page and textpage right away."""
+    page = doc[index]
+    try:
+        textpage = page.get_textpage()
+        try:
+            text = textpage.get_text_bounded()
+        finally:
+            textpage.close()
+    finally:
+        page.close()
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+
+def _extract_pages(filepath: str, indices: list[int]) -> list[str]:
+    """Extract the text of the pages in a worker process with its own document."""
+    doc = PdfDocument(filepath, autoclose=True)
+    try:
+        return [_extract_page_text(doc, index) for index in indices]
+    finally:
+        doc.close()
+
+
 class PDFium(Preprocessor):
     """PDFium Preprocessor class for extracting text from PDF files.
 
     This class is a simple preprocessor that uses the PDFium library to extract
     text from PDF documents without layout information.
 
+    Attributes:
+        max_workers (int): Number of worker processes to extract the pages in
+            parallel. PDFium is not thread safe, hence every process opens the
+            document itself and extracts a range of pages. Defaults to 1, i.e.
+            the pages are extracted sequentially in the calling process.
+        pages (tuple[int, ...] | None): Numbers of the pages to extract, starting
+            at 1. Defaults to None, i.e. all pages.
+        min_parallel_pages (int): Minimum number of selected pages to extract
+            them in parallel. Smaller documents are extracted sequentially, as
+            starting the worker processes takes longer than extracting a few
+            pages. Defaults to 32.
+
     Note:
         - Best text extraction quality based on simple benchmark: https://github.com/py-pdf/benchmarks
 
     """
 
+    execution_settings = ("max_workers", "min_parallel_pages")
+
+    def __init__(
+        self,
+        max_workers: int = 1,
+        pages: Iterable[int] | None = None,
+        *,
+        min_parallel_pages: int = 32,
+    ) -> None:
+        """Initialize the preprocessor with sequential extraction of all pages."""
+        super().__init__()
+        self.max_workers = max_workers
+        self.pages = None if pages is None else tuple(pages)
+        self.min_parallel_pages = min_parallel_pages
+
     def convert(self, filepath: str) -> list[str] | str | None:
         """Convert the content of a PDF file into a list of strings.
 
@@ -29,12 +84,56 @@ class PDFium(Preprocessor):
 
         """
         logger.debug("Converting to text from pdf: %s", {filepath})
+        doc = self._open(filepath)
+        if doc is None:
+            return None
         try:
-            doc = PdfDocument(filepath, autoclose=True)
+            return list(self._iter_pages(filepath, doc))
+        except PdfiumError:
+            logger.exception("Error reading filepath: %s.", filepath)
+            return None
+
+    def iter_pages(self, filepath: str) -> Iterator[str]:
+        """Yield the text of the pages lazily, c.f. :meth:`convert`."""
+        logger.debug("Iterating text of pdf pages: %s", filepath)
+        doc = self._open(filepath)
+        if doc is None:
+            return
+        try:
+            yield from self._iter_pages(filepath, doc)
+        except PdfiumError:
+            logger.exception("Error reading filepath: %s.", filepath)
+
+    @staticmethod
+    def _open(filepath: str) -> PdfDocument | None:
+        try:
+            return PdfDocument(filepath, autoclose=True)
         except (PdfiumError, FileNotFoundError):
             logger.exception("Error reading filepath: %s.", filepath)
             return None
-        return [
-            page.get_textpage().get_text_bounded().replace("\r\n", "\n").replace("\r", "\n")
-            for page in doc
+
+    def _iter_pages(self, filepath: str, doc: PdfDocument) -> Iterator[str]:
+        indices = page_indices(self.pages, len(doc))
+        if self.max_workers <= 1 or len(indices) < max(self.min_parallel_pages, 2):
+            try:
+                for index in indices:
+                    yield _extract_page_text(doc, index)
+            finally:
+                doc.close()
+            return
+        doc.close()
+
+        # Several chunks per worker balance pages with different amounts of text
+        chunk_size = math.ceil(len(indices) / (self.max_workers * 4))
+        chunks = [
+            indices[start : start + chunk_size] for start in range(0, len(indices), chunk_size)
         ]
+        logger.debug(
+            "Extracting %s pages in %s chunks with %s processes.",
+            len(indices),
+            len(chunks),
+            self.max_workers,
+        )
+        with ProcessPoolExecutor(min(self.max_workers, len(chunks))) as executor:
+            for texts in executor.map(_extract_pages, repeat(filepath), chunks):
+                yield from texts
@@ -1,23 +1,47 @@
 """Preprocessors using pdfplumber library."""
 
 import logging
+from collections.abc import Iterable, Iterator
 
 import pdfplumber
 from pdfminer.pdftypes import PDFException
+from pdfplumber.page import Page
 from tabulate import tabulate
 
 from pdf2aas.preprocessor import Preprocessor
+from pdf2aas.preprocessor.core import page_indices
 
 logger = logging.getLogger(__name__)
 
 
+def _iter_selected_pages(filepath: str, pages: Iterable[int] | None) -> Iterator[Page]:
+    """Open the PDF and yield the selected pages, closing each after its use."""
+    with pdfplumber.open(filepath) as pdf:
+        for index in page_indices(pages, len(pdf.pages)):
+            page = pdf.pages[index]
+            try:
+                yield page
+            finally:
+                page.close()
+
+
 class PDFPlumber(Preprocessor):
     """Extract text from PDF files using pdfplumber library.
 
     This class is a simple preprocessor that uses the pdfplumber library to extract
     text from PDF documents without layout information.
+
+    Attributes:
+        pages (tuple[int, ...] | None): Numbers of the pages to extract, starting
+            at 1. Defaults to None, i.e. all pages.
+
     """
 
+    def __init__(self, pages: Iterable[int] | None = None) -> None:
+        """Initialize preprocessor to extract all pages."""
+        super().__init__()
+        self.pages = None if pages is None else tuple(pages)
+
     def convert(self, filepath: str) -> list[str] | str | None:
         """Convert the content of a PDF file into a list of strings.
 
@@ -27,15 +51,23 @@ class PDFPlumber(Preprocessor):
         """
         logger.debug("Converting to text from pdf: %s", filepath)
         try:
-            with pdfplumber.open(filepath) as pdf:
-                return [
-                    page.extract_text().replace("\r\n", "\n").replace("\r", "\n")
-                    for page in pdf.pages
-                ]
+            return list(self._iter_pages(filepath))
         except (PDFException, FileNotFoundError):
             logger.exception("Error reading filepath: %s.", filepath)
             return None
 
+    def iter_pages(self, filepath: str) -> Iterator[str]:
+        """Yield the text of the pages lazily, c.f. :meth:`convert`."""
+        logger.debug("Iterating text of pdf pages: %s", filepath)
+        try:
+            yield from self._iter_pages(filepath)
+        except (PDFException, FileNotFoundError):
+            logger.exception("Error reading filepath: %s.", filepath)
+
+    def _iter_pages(self, filepath: str) -> Iterator[str]:
+        for page in _iter_selected_pages(filepath, self.pages):
+            yield page.extract_text().replace("\r\n", "\n").replace("\r", "\n")
+
 
 class PDFPlumberTable(Preprocessor):
     """Extract tables from PDF files using pdfplumber library.
@@ -45,6 +77,8 @@ class PDFPlumberTable(Preprocessor):
             Default is 'html'. Other possibilities are defined by tabulate, c.f.
             `tabulate.tabulate_formats". Examples are: 'github', 'html', 'simple', 'tsv'.
             None retuns a list (table) of list (row) of list (cell) of string.
+        pages (Iterable[int] | None, optional): Numbers of the pages to extract
+            the tables from, starting at 1. Defaults to None, i.e. all pages.
 
     Note:
         - Not so good extraction quality based on camelot benchmark:
@@ -57,9 +91,12 @@ class PDFPlumberTable(Preprocessor):
     def __init__(
         self,
         output_format: str | None = "html",
+        pages: Iterable[int] | None = None,
     ) -> None:
-        """Initialize preprocessor with html format."""
+        """Initialize preprocessor with html format for all pages."""
+        super().__init__()
         self.output_format = output_format
+        self.pages = None if pages is None else tuple(pages)
 
     def convert(self, filepath: str) -> list[str] | None:
         """Convert the content of a PDF file into a list of tables as strings.
@@ -70,14 +107,24 @@ class PDFPlumberTable(Preprocessor):
         """
         logger.debug("Extracting tables from PDF: %s", filepath)
         try:
-            pdf = pdfplumber.open(filepath)
+            return list(self._iter_tables(filepath))
         except FileNotFoundError:
             logger.exception("File not found: %s", filepath)
             return None
 
-        with pdf:
-            return [
-                tabulate(table, tablefmt=self.output_format) if self.output_format else str(table)
-                for page in pdf.pages
-                for table in page.extract_tables()
-            ]
+    def iter_pages(self, filepath: str) -> Iterator[str]:
+        """Yield the tables lazily page by page, c.f. :meth:`convert`."""
+        logger.debug("Iterating tables of pdf pages: %s", filepath)
+        try:
+            yield from self._iter_tables(filepath)
+        except FileNotFoundError:
+            logger.exception("File not found: %s", filepath)
+
+    def _iter_tables(self, filepath: str) -> Iterator[str]:
+        for page in _iter_selected_pages(filepath, self.pages):
+            for table in page.extract_tables():
+                yield (
+                    tabulate(table, tablefmt=self.output_format)
+                    if self.output_format
+                    else str(table)
+                )
@@ -0,0 +1,166 @@
+import ctypes
+import email.parser
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pypdfium2 as pdfium
+import pypdfium2.raw as pdfium_c
+import pytest
+
+
+class OpenAIBatchServer(ThreadingHTTPServer):
+    """Local stand-in for the file and batch endpoints of the OpenAI API.
+
+    Answers every request of a batch with `respond(custom_id, body)`, as soon
+    as the batch is retrieved with `status` "completed".
+    """
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), OpenAIBatchHandler)
+        self.files = {}
+        self.batches = {}
+        self.status = "completed"
+        self.respond = lambda custom_id, body: "[]"
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+    def add_file(self, content, purpose):
+        file_id = f"file-{len(self.files)}"
+        self.files[file_id] = content
+        return {
+            "id": file_id,
+            "object": "file",
+            "bytes": len(content),
+            "created_at": 0,
+            "filename": f"{file_id}.jsonl",
+            "purpose": purpose,
+            "status": "processed",
+        }
+
+    def batch(self, batch_id):
+        batch = self.batches[batch_id]
+        batch["status"] = self.status
+        if self.status == "completed" and batch["output_file_id"] is None:
+            lines = []
+            for line in self.files[batch["input_file_id"]].decode().splitlines():
+                request = json.loads(line)
+                content = self.respond(request["custom_id"], request["body"])
+                lines.append(json.dumps({
+                    "id": f"response-{request['custom_id']}",
+                    "custom_id": request["custom_id"],
+                    "response": {
+                        "status_code": 200,
+                        "body": {
+                            "object": "chat.completion",
+                            "model": request["body"]["model"],
+                            "choices": [{
+                                "index": 0,
+                                "message": {"role": "assistant", "content": content},
+                                "finish_reason": "stop",
+                            }],
+                            "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+                        },
+                    },
+                    "error": None,
+                }))
+            batch["output_file_id"] = self.add_file("\n".join(lines).encode(), "batch_output")["id"]
+        return batch
+
+
+class OpenAIBatchHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, data, status=200):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path == "/v1/files":
+            message = email.parser.BytesParser().parsebytes(
+                f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + body
+            )
+            parts = {
+                part.get_param("name", header="content-disposition"): part.get_payload(decode=True)
+                for part in message.get_payload()
+            }
+            self.send_json(self.server.add_file(parts["file"], parts["purpose"].decode()))
+        elif self.path == "/v1/batches":
+            request = json.loads(body)
+            if request["input_file_id"] not in self.server.files:
+                self.send_json({"error": {"message": "file not found"}}, 404)
+                return
+            batch_id = f"batch-{len(self.server.batches)}"
+            self.server.batches[batch_id] = {
+                "id": batch_id,
+                "object": "batch",
+                "endpoint": request["endpoint"],
+                "input_file_id": request["input_file_id"],
+                "completion_window": request["completion_window"],
+                "status": "validating",
+                "created_at": 0,
+                "output_file_id": None,
+                "error_file_id": None,
+            }
+            self.send_json(self.server.batches[batch_id])
+        else:
+            self.send_json({"error": {"message": "not found"}}, 404)
+
+    def do_GET(self):
+        if match := re.fullmatch(r"/v1/batches/([\w-]+)", self.path):
+            self.send_json(self.server.batch(match.group(1)))
+        elif match := re.fullmatch(r"/v1/files/([\w-]+)/content", self.path):
+            content = self.server.files[match.group(1)]
+            self.send_response(200)
+            self.send_header("Content-Type", "application/jsonl")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+        else:
+            self.send_json({"error": {"message": "not found"}}, 404)
+
+
+@pytest.fixture
+def openai_batch_server():
+    server = OpenAIBatchServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def create_text_pdf(filepath, pages):
+    """Write a PDF with one Helvetica text line per line of each page text."""
+    pdf = pdfium.PdfDocument.new()
+    for text in pages:
+        page = pdf.new_page(595, 842)
+        for idx, line in enumerate(text.splitlines()):
+            text_object = pdfium_c.FPDFPageObj_NewTextObj(pdf.raw, b"Helvetica", ctypes.c_float(10))
+            encoded = ctypes.create_string_buffer((line + "\x00").encode("utf-16-le"))
+            pdfium_c.FPDFText_SetText(
+                text_object,
+                ctypes.cast(encoded, ctypes.POINTER(pdfium_c.FPDF_WCHAR)),
+            )
+            pdfium_c.FPDFPageObj_Transform(text_object, 1, 0, 0, 1, 50, 800 - 14 * idx)
+            pdfium_c.FPDFPage_InsertObject(page.raw, text_object)
+        pdfium_c.FPDFPage_GenerateContent(page.raw)
+        page.close()
+    pdf.save(filepath)
+    pdf.close()
+    return filepath
+
+
+@pytest.fixture
+def text_pdf(tmp_path):
+    """Create a PDF from the page texts in the temporary directory."""
+    return lambda pages, name="datasheet.pdf": create_text_pdf(str(tmp_path / name), pages)
@@ -0,0 +1,42 @@
+import json
+
+from benchmarks import run
+from benchmarks.mock_llm_server import MockLLMServer
+from benchmarks.synthetic import LABEL_PATTERN, make_datasheet, make_definitions
+
+
+class TestBenchmarks:
+    @staticmethod
+    def test_mock_llm_server_answers_datasheet_values():
+        definitions = make_definitions(5)
+        datasheet = make_datasheet(definitions, 2, coverage=1.0)
+        server = MockLLMServer(LABEL_PATTERN)
+        answer = json.loads(server.respond([{"role": "user", "content": "\n".join(datasheet.pages)}]))
+        server.server_close()
+        assert {item["property"] for item in answer} == set(datasheet.values)
+
+    @staticmethod
+    def test_run_smoke(tmp_path, capsys):
+        output = tmp_path / "results.json"
+        argv = [
+            "--pages", "2",
+            "--class-sizes", "5",
+            "--documents", "1",
+            "--preprocessors", "text", "pdfium",
+            "--latency", "0",
+            "--output", str(output),
+        ]
+
+        assert run.main(argv) == 0
+
+        results = json.loads(output.read_text())
+        assert len(results) == 2 * len(run.EXTRACTORS)
+        assert all(result["recall"] == 1.0 for result in results)
+        assert "throughput" in capsys.readouterr().out
+
+    @staticmethod
+    def test_compare():
+        result = run.BenchmarkResult("text", "search", 1, 10, 1, 10.0, 0.1, 0.2, 1.0, 100, 10, 1, 1.0)
+        slower = run.BenchmarkResult("text", "search", 1, 10, 1, 5.0, 0.1, 0.2, 1.0, 100, 10, 1, 1.0)
+        assert run.compare([result], [result], 0.25) == []
+        assert len(run.compare([slower], [result], 0.25)) == 1
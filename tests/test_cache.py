@@ -0,0 +1,74 @@
+import time
+
+import pytest
+
+from pdf2aas.cache import MemoryCache, SQLiteCache, hash_key
+
+
+def test_hash_key_ignores_dict_order():
+    assert hash_key({"a": 1, "b": 2}, [1]) == hash_key({"b": 2, "a": 1}, [1])
+    assert hash_key({"a": 1}) != hash_key({"a": 2})
+
+
+class TestMemoryCache:
+    @staticmethod
+    def test_lru_eviction():
+        cache = MemoryCache(max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.get("a") == 1
+        cache.set("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert len(cache) == 2
+
+    @staticmethod
+    def test_max_age():
+        cache = MemoryCache(max_age=0)
+        cache.set("a", 1)
+        time.sleep(0.01)
+        assert cache.get("a") is None
+
+
+class TestSQLiteCache:
+    @staticmethod
+    def test_persistence(tmp_path):
+        path = str(tmp_path / "cache.sqlite")
+        cache = SQLiteCache(path)
+        cache.set("a", {"result": "text", "raw_result": {"usage": {}}})
+        cache.close()
+        cache = SQLiteCache(path)
+        assert cache.get("a") == {"result": "text", "raw_result": {"usage": {}}}
+        assert cache.get("b") is None
+
+    @staticmethod
+    def test_max_entries(tmp_path):
+        cache = SQLiteCache(str(tmp_path / "cache.sqlite"), max_entries=2)
+        cache.set("a", 1)
+        time.sleep(0.01)
+        cache.set("b", 2)
+        time.sleep(0.01)
+        cache.get("a")
+        time.sleep(0.01)
+        cache.set("c", 3)
+        assert len(cache) == 2
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+
+    @staticmethod
+    def test_max_size(tmp_path):
+        cache = SQLiteCache(str(tmp_path / "cache.sqlite"), max_size=20)
+        cache.set("a", "x" * 10)
+        time.sleep(0.01)
+        cache.set("b", "y" * 10)
+        assert len(cache) == 1
+        assert cache.get("b") == "y" * 10
+
+    @staticmethod
+    def test_max_age(tmp_path):
+        cache = SQLiteCache(str(tmp_path / "cache.sqlite"), max_age=0)
+        cache.set("a", 1)
+        time.sleep(0.01)
+        assert cache.get("a") is None
+        assert len(cache) == 0
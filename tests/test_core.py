@@ -0,0 +1,441 @@
+import asyncio
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+import json
+import re
+
+from openai import OpenAI
+
+from pdf2aas import PDF2AAS, BatchConversion
+from pdf2aas.cache import MemoryCache, SQLiteCache
+from pdf2aas.extractor import BM25Retriever, CustomLLMClient, Extractor, PropertyLLMSearch
+from pdf2aas.generator import CSV
+from pdf2aas.model import Property, PropertyDefinition
+from pdf2aas.preprocessor import PDFium, Preprocessor, Text
+
+test_definitions = [PropertyDefinition(f"p{i}", {"en": f"property{i}"}) for i in range(10)]
+
+
+class DummySlowExtractor(Extractor):
+    """Answers earlier batches slower, to provoke out of order completion."""
+
+    def extract(self, datasheet, property_definition, raw_prompts=None, raw_results=None):
+        if isinstance(property_definition, PropertyDefinition):
+            property_definition = [property_definition]
+        time.sleep(0.01 * (10 - int(property_definition[0].id[1:])))
+        if isinstance(raw_prompts, list):
+            raw_prompts.append([d.id for d in property_definition])
+        if isinstance(raw_results, list):
+            raw_results.append([d.id for d in property_definition])
+        return [Property(d.name["en"], definition=d) for d in property_definition]
+
+
+class TestPDF2AASExtract:
+    @staticmethod
+    @pytest.mark.parametrize("batch_size", [0, 1, 3, 20, "auto"])
+    @pytest.mark.parametrize("max_workers", [1, 4])
+    def test_extract_keeps_definition_order(batch_size, max_workers):
+        pdf2aas = PDF2AAS(
+            dictionary=None,
+            extractor=DummySlowExtractor(),
+            batch_size=batch_size,
+            max_workers=max_workers,
+        )
+        raw_prompts = []
+        raw_results = []
+        properties = pdf2aas.extract("datasheet", test_definitions, raw_prompts, raw_results)
+        assert [p.definition for p in properties] == test_definitions
+        assert raw_prompts == raw_results
+        assert [id_ for batch in raw_prompts for id_ in batch] == [d.id for d in test_definitions]
+
+    @staticmethod
+    @pytest.mark.parametrize("batch_size", [0, 1, 3])
+    def test_aextract_keeps_definition_order(batch_size):
+        pdf2aas = PDF2AAS(
+            dictionary=None,
+            extractor=DummySlowExtractor(),
+            batch_size=batch_size,
+            max_workers=4,
+        )
+        raw_prompts = []
+        raw_results = []
+        properties = asyncio.run(
+            pdf2aas.aextract("datasheet", test_definitions, raw_prompts, raw_results)
+        )
+        assert [p.definition for p in properties] == test_definitions
+        assert raw_prompts == raw_results
+        assert [id_ for batch in raw_prompts for id_ in batch] == [d.id for d in test_definitions]
+
+    @staticmethod
+    @pytest.mark.parametrize("batch_size", [0, 1, 3])
+    def test_extract_stream_keeps_definition_order(batch_size):
+        pdf2aas = PDF2AAS(dictionary=None, extractor=DummySlowExtractor(), batch_size=batch_size)
+        raw_prompts = []
+        stream = pdf2aas.extract_stream("datasheet", test_definitions, raw_prompts)
+        first = next(stream)
+        assert first.definition == test_definitions[0]
+        assert len(raw_prompts) == 1
+        assert [first, *stream] == pdf2aas.extract("datasheet", test_definitions)
+
+
+class TestPDF2AASAutoBatchSize:
+    @staticmethod
+    def batch_ids(pdf2aas, text="datasheet"):
+        return [[d.id for d in batch] for batch in pdf2aas._batches(test_definitions, text)]
+
+    def test_auto_batches_fill_token_budget(self):
+        extractor = PropertyLLMSearch("test", api_endpoint="input")
+        pdf2aas = PDF2AAS(dictionary=None, extractor=extractor, batch_size="auto")
+        assert self.batch_ids(pdf2aas) == [[d.id for d in test_definitions]]
+
+        assert pdf2aas._auto_batches([], "datasheet") == []
+        prompt_tokens = len(extractor.system_prompt_template + extractor.create_prompt("datasheet", [])) / 4
+        pdf2aas.batch_token_budget = int(prompt_tokens) + 40
+        batches = self.batch_ids(pdf2aas)
+        assert 1 < len(batches) < len(test_definitions)
+        assert [id_ for batch in batches for id_ in batch] == [d.id for d in test_definitions]
+        # a longer datasheet leaves less room for the properties
+        assert len(self.batch_ids(pdf2aas, "datasheet" * 10)) > len(batches)
+
+        pdf2aas.batch_token_budget = 0
+        assert self.batch_ids(pdf2aas) == [[d.id] for d in test_definitions]
+
+    def test_auto_batches_respect_max_tokens(self):
+        extractor = PropertyLLMSearch("test", api_endpoint="input", max_tokens=150)
+        pdf2aas = PDF2AAS(dictionary=None, extractor=extractor, batch_size="auto")
+        assert [len(batch) for batch in self.batch_ids(pdf2aas)] == [3, 3, 3, 1]
+
+    def test_auto_batches_other_extractor(self):
+        pdf2aas = PDF2AAS(dictionary=None, extractor=DummySlowExtractor(), batch_size="auto")
+        assert self.batch_ids(pdf2aas) == [[d.id for d in test_definitions]]
+
+
+class RecordingLLMClient(CustomLLMClient):
+    def __init__(self):
+        self.events = []
+
+    def create_completions(self, messages, model, temperature, max_tokens, response_format):
+        self.events.append(("start", messages[-1]["content"]))
+        time.sleep(0.05)
+        self.events.append(("end", messages[-1]["content"]))
+        return "[]", {}
+
+    async def acreate_completions(self, messages, model, temperature, max_tokens, response_format):
+        self.events.append(("start", messages[-1]["content"]))
+        await asyncio.sleep(0.05)
+        self.events.append(("end", messages[-1]["content"]))
+        return "[]", {}
+
+
+class TestPDF2AASPromptCacheWarmUp:
+    @staticmethod
+    @pytest.mark.parametrize("use_async", [False, True])
+    def test_first_batch_is_sent_alone(use_async):
+        client = RecordingLLMClient()
+        extractor = PropertyLLMSearch("test", client=client)
+        extractor.stable_prompt_prefix = True
+        pdf2aas = PDF2AAS(dictionary=None, extractor=extractor, batch_size=2, max_workers=4)
+        if use_async:
+            asyncio.run(pdf2aas.aextract("datasheet", test_definitions))
+        else:
+            pdf2aas.extract("datasheet", test_definitions)
+        assert len(client.events) == 10
+        assert [event for event, _ in client.events[:3]] == ["start", "end", "start"]
+        assert "property0" in client.events[0][1]
+        assert "start" in [event for event, _ in client.events[3:5]]
+
+
+    @staticmethod
+    def test_no_warm_up_with_retriever(caplog):
+        client = RecordingLLMClient()
+        extractor = PropertyLLMSearch("test", client=client)
+        extractor.stable_prompt_prefix = True
+        extractor.retriever = BM25Retriever()
+        pdf2aas = PDF2AAS(dictionary=None, extractor=extractor, batch_size=2, max_workers=4)
+        pdf2aas.extract("datasheet", test_definitions)
+        assert [event for event, _ in client.events[:2]] == ["start", "start"]
+        assert "Stable prompt prefix has no effect with a retriever" in caplog.text
+
+
+class DummyFailingExtractor(DummySlowExtractor):
+    def extract(self, datasheet, property_definition, raw_prompts=None, raw_results=None):
+        if "fail" in datasheet:
+            raise RuntimeError("Mocked extraction error")
+        return super().extract(datasheet, property_definition, raw_prompts, raw_results)
+
+
+class TestPDF2AASConvertMany:
+    @staticmethod
+    def test_convert_many(tmp_path):
+        datasheets = []
+        for name, text in [("a", "first"), ("b", "fail"), ("c", "third")]:
+            datasheet = tmp_path / f"{name}.txt"
+            datasheet.write_text(text)
+            datasheets.append(str(datasheet))
+        pdf2aas = PDF2AAS(dictionary=None, extractor=DummyFailingExtractor(), generator=CSV())
+        pdf2aas.definitions = lambda classification: test_definitions
+
+        results = pdf2aas.convert_many(datasheets, "class", str(tmp_path / "out"), max_processes=2)
+
+        assert [r.filepath for r in results] == datasheets
+        assert [r.classification for r in results] == ["class"] * 3
+        assert isinstance(results[1].error, RuntimeError)
+        assert results[1].output_filepath is None
+        assert not (tmp_path / "out" / "b.json").exists()
+        for result in (results[0], results[2]):
+            assert result.error is None
+            assert [p.definition for p in result.properties] == test_definitions
+            with open(result.output_filepath) as file:
+                assert file.read().count("\n") == len(test_definitions) + 1
+
+    @staticmethod
+    def test_convert_many_classification_count():
+        pdf2aas = PDF2AAS(dictionary=None, extractor=DummySlowExtractor())
+        with pytest.raises(ValueError):
+            pdf2aas.convert_many(["a.txt", "b.txt"], ["class"])
+
+
+class CountingPreprocessor(Preprocessor):
+    def __init__(self, suffix="") -> None:
+        self.suffix = suffix
+        # private attributes are not part of the cache key
+        self._calls = 0
+
+    @property
+    def calls(self):
+        return self._calls
+
+    def convert(self, filepath):
+        self._calls += 1
+        with open(filepath) as file:
+            return file.read() + self.suffix
+
+
+class DatasheetRecordingExtractor(Extractor):
+    def __init__(self):
+        self.datasheets = []
+
+    def extract(self, datasheet, property_definition, raw_prompts=None, raw_results=None):
+        self.datasheets.append(datasheet)
+        return []
+
+
+class TestPDF2AASPages:
+    pages = [
+        "General information\nThe device is designed for industrial use.",
+        "Electrical data\nRated voltage: 230 V\nRated current: 2 A",
+        "Mechanical data\nWeight: 3 kg\nHousing material: steel",
+    ]
+
+    def test_pdf_pages_are_passed_to_extractor(self, text_pdf):
+        extractor = DatasheetRecordingExtractor()
+        pdf2aas = PDF2AAS(
+            dictionary=None,
+            extractor=extractor,
+            preprocess_cache=MemoryCache(),
+        )
+        pdf2aas.definitions = lambda classification: test_definitions
+        filepath = text_pdf(self.pages)
+
+        pdf2aas.convert(filepath)
+        pdf2aas.convert_many([filepath], max_processes=1)
+
+        assert extractor.datasheets == [self.pages, self.pages]
+
+    def test_retrieve_pdf_page(self, text_pdf):
+        client = RecordingLLMClient()
+        extractor = PropertyLLMSearch("test", client=client)
+        extractor.retriever = BM25Retriever(top_k=1, chunk_chars=100)
+        pdf2aas = PDF2AAS(dictionary=None, extractor=extractor, batch_size=0)
+        pdf2aas.definitions = lambda classification: [
+            PropertyDefinition("voltage", {"en": "rated voltage"}, unit="V"),
+        ]
+
+        pdf2aas.convert(text_pdf(self.pages))
+
+        prompt = client.events[0][1]
+        assert self.pages[1] in prompt
+        assert "Weight" not in prompt
+        assert "General information" not in prompt
+
+
+class TestPDF2AASPreprocessCache:
+    @staticmethod
+    def test_preprocess_cache_hit(tmp_path):
+        datasheet = tmp_path / "a.txt"
+        datasheet.write_text("content")
+        preprocessor = CountingPreprocessor()
+        pdf2aas = PDF2AAS(preprocessor, dictionary=None, preprocess_cache=MemoryCache())
+
+        assert pdf2aas.preprocess(str(datasheet)) == "content"
+        assert pdf2aas.preprocess(str(datasheet)) == "content"
+        assert preprocessor.calls == 1
+
+    @staticmethod
+    def test_preprocess_cache_key(tmp_path):
+        datasheet = tmp_path / "a.txt"
+        datasheet.write_text("content")
+        preprocessor = CountingPreprocessor()
+        pdf2aas = PDF2AAS(preprocessor, dictionary=None, preprocess_cache=MemoryCache())
+        pdf2aas.preprocess(str(datasheet))
+
+        preprocessor.suffix = "!"
+        assert pdf2aas.preprocess(str(datasheet)) == "content!"
+        datasheet.write_text("changed")
+        assert pdf2aas.preprocess(str(datasheet)) == "changed!"
+        # same content under another name is a cache hit
+        copied = tmp_path / "b.txt"
+        copied.write_text("changed")
+        assert pdf2aas.preprocess(str(copied)) == "changed!"
+        assert preprocessor.calls == 3
+
+    @staticmethod
+    def test_preprocess_cache_key_is_stable(tmp_path):
+        datasheet = tmp_path / "a.txt"
+        datasheet.write_text("content")
+        keys = []
+        for _ in range(2):
+            preprocessor = CountingPreprocessor()
+            preprocessor.lock = threading.Lock()
+            pdf2aas = PDF2AAS(preprocessor, dictionary=None, preprocess_cache=MemoryCache())
+            keys.append(pdf2aas._preprocess_cache_key([preprocessor], str(datasheet)))
+        assert keys[0] == keys[1]
+
+    @staticmethod
+    def test_preprocess_cache_ignores_execution_settings(text_pdf):
+        filepath = text_pdf(["page"])
+        cache = MemoryCache()
+        PDF2AAS(PDFium(), dictionary=None, preprocess_cache=cache).preprocess(filepath)
+        with patch.object(PDFium, "convert") as convert:
+            pages = PDF2AAS(
+                PDFium(max_workers=4, min_parallel_pages=2),
+                dictionary=None,
+                preprocess_cache=cache,
+            ).preprocess(filepath)
+        convert.assert_not_called()
+        assert pages == ["page"]
+        assert len(cache) == 1
+
+    @staticmethod
+    def test_preprocess_cache_persistent(tmp_path):
+        datasheet = tmp_path / "a.txt"
+        datasheet.write_text("content")
+        cache_path = str(tmp_path / "preprocess.sqlite")
+        PDF2AAS(Text(), dictionary=None, preprocess_cache=SQLiteCache(cache_path)).preprocess(
+            str(datasheet),
+        )
+
+        preprocessor = CountingPreprocessor()
+        pdf2aas = PDF2AAS(Text(), dictionary=None, preprocess_cache=SQLiteCache(cache_path))
+        pdf2aas.preprocessor = preprocessor
+        assert pdf2aas.preprocess(str(datasheet)) == "content"
+        assert preprocessor.calls == 1
+
+        pdf2aas.preprocessor = Text()
+        datasheet.unlink()
+        assert pdf2aas.preprocess(str(datasheet)) == "None"
+
+    @staticmethod
+    def test_convert_many_uses_preprocess_cache(tmp_path):
+        datasheets = []
+        for name, text in [("a", "first"), ("c", "third")]:
+            datasheet = tmp_path / f"{name}.txt"
+            datasheet.write_text(text)
+            datasheets.append(str(datasheet))
+        cache = MemoryCache()
+        pdf2aas = PDF2AAS(
+            dictionary=None,
+            extractor=DummySlowExtractor(),
+            generator=CSV(),
+            preprocess_cache=cache,
+        )
+        pdf2aas.definitions = lambda classification: test_definitions
+        pdf2aas.preprocess(datasheets[0])
+        assert len(cache) == 1
+
+        results = pdf2aas.convert_many(datasheets, "class", max_processes=1)
+
+        assert [r.error for r in results] == [None, None]
+        assert len(cache) == 2
+
+
+class TestPDF2AASBatch:
+    @staticmethod
+    def answer(custom_id, body):
+        name = re.search(r'What is the "(.*)" of the device', body["messages"][1]["content"]).group(1)
+        return json.dumps({"property": name, "value": custom_id, "unit": None, "reference": None})
+
+    def test_submit_and_collect(self, openai_batch_server, tmp_path):
+        openai_batch_server.respond = self.answer
+        datasheets = []
+        for name in ("a", "b"):
+            datasheet = tmp_path / f"{name}.txt"
+            datasheet.write_text(f"datasheet {name}")
+            datasheets.append(str(datasheet))
+        client = OpenAI(api_key="test", base_url=openai_batch_server.base_url, max_retries=0)
+        pdf2aas = PDF2AAS(
+            dictionary=None,
+            extractor=PropertyLLMSearch("test", client=client),
+            generator=CSV(),
+            batch_size=1,
+        )
+        pdf2aas.definitions = lambda classification: test_definitions[:3]
+
+        openai_batch_server.status = "in_progress"
+        batch = pdf2aas.submit_batch(datasheets, "class", str(tmp_path / "out"))
+        assert len(batch.requests) == 6
+        assert pdf2aas.collect_batch(batch) is None
+
+        batch = BatchConversion.from_dict(json.loads(json.dumps(batch.to_dict())))
+        openai_batch_server.status = "completed"
+        results = pdf2aas.collect_batch(batch)
+
+        assert [r.filepath for r in results] == datasheets
+        for document, result in enumerate(results):
+            assert result.error is None
+            assert [p.definition for p in result.properties] == test_definitions[:3]
+            assert [p.value for p in result.properties] == [f"{document}-{idx}" for idx in range(3)]
+            with open(result.output_filepath) as file:
+                assert file.read().count("\n") == 4
+
+        results = pdf2aas.collect_batch(batch)
+        assert [len(result.properties) for result in results] == [3, 3]
+
+    def test_collect_missing_definition(self, openai_batch_server, tmp_path):
+        openai_batch_server.respond = self.answer
+        datasheet = tmp_path / "a.txt"
+        datasheet.write_text("datasheet a")
+        client = OpenAI(api_key="test", base_url=openai_batch_server.base_url, max_retries=0)
+        pdf2aas = PDF2AAS(dictionary=None, extractor=PropertyLLMSearch("test", client=client), batch_size=1)
+        pdf2aas.definitions = lambda classification: test_definitions[:2]
+        batch = pdf2aas.submit_batch([str(datasheet)], "class")
+
+        pdf2aas.definitions = lambda classification: test_definitions[:1]
+        results = pdf2aas.collect_batch(batch)
+
+        assert "Missing definition" in str(results[0].error)
+
+    @staticmethod
+    def test_collect_failed(openai_batch_server, tmp_path):
+        datasheet = tmp_path / "a.txt"
+        datasheet.write_text("datasheet a")
+        client = OpenAI(api_key="test", base_url=openai_batch_server.base_url, max_retries=0)
+        pdf2aas = PDF2AAS(dictionary=None, extractor=PropertyLLMSearch("test", client=client))
+        pdf2aas.definitions = lambda classification: test_definitions[:2]
+        batch = pdf2aas.submit_batch([str(datasheet)], "class", str(tmp_path / "out"))
+
+        openai_batch_server.status = "failed"
+        results = pdf2aas.collect_batch(batch)
+
+        assert isinstance(results[0].error, RuntimeError)
+        assert results[0].output_filepath is None
+
+    @staticmethod
+    def test_needs_property_llm():
+        pdf2aas = PDF2AAS(dictionary=None, extractor=DummySlowExtractor())
+        with pytest.raises(TypeError):
+            pdf2aas.submit_batch(["a.txt"])
@@ -1,6 +1,12 @@
+import json
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from unittest.mock import patch
+
 import pytest
-from pdf2aas.model import PropertyDefinition
-from pdf2aas.dictionary import CDD, ECLASS
+from pdf2aas.model import ClassDefinition, PropertyDefinition
+from pdf2aas.dictionary import CDD, ECLASS, Dictionary, DefinitionMapping, DictionaryStore
 
 class TestCDD:
     @staticmethod
@@ -88,3 +94,222 @@ class TestECLASS:
 
         d2 = ECLASS(release="13.0")
         assert "27274001" not in d2.classes.keys()
+
+class DummyDictionary(Dictionary):
+    releases = {}
+    properties = DefinitionMapping("properties")
+    supported_releases = ["1.0"]
+
+    def get_class_url(self, class_id):
+        return None
+
+    def get_property_url(self, property_id):
+        return None
+
+def create_dummy_dictionary(temp_dir):
+    d = DummyDictionary(release="1.0", temp_dir=str(temp_dir))
+    properties = [PropertyDefinition(f"p{i}", {"en": f"property{i}"}, unit="mm") for i in range(3)]
+    for property_ in properties:
+        d.properties[property_.id] = property_
+    d.classes["c1"] = ClassDefinition("c1", "class1", keywords=["k"], properties=properties[:2])
+    d.classes["c2"] = ClassDefinition("c2", "class2", properties=properties[1:])
+    return d, properties
+
+class TestDictionaryStore:
+    @staticmethod
+    @pytest.fixture(autouse=True)
+    def reset_dummy_dictionary():
+        yield
+        for store in DummyDictionary.properties.stores:
+            store.close()
+        DummyDictionary.releases = {}
+        DummyDictionary.properties = DefinitionMapping("properties")
+
+    @staticmethod
+    def test_save_and_load_lazily(tmp_path):
+        d, properties = create_dummy_dictionary(tmp_path)
+        d.save_to_file()
+        assert (tmp_path / "DummyDictionary-1.0.sqlite").exists()
+
+        DummyDictionary.releases = {}
+        DummyDictionary.properties = DefinitionMapping("properties")
+        d = DummyDictionary(release="1.0", temp_dir=str(tmp_path))
+        assert d.properties.data == {}
+        assert d.classes.data == {}
+        assert len(d.classes) == 2
+        assert "c1" in d.classes
+        assert "p2" in d.properties
+        assert "p3" not in d.properties
+        assert d.get_class_properties("c1") == properties[:2]
+        assert d.get_property("p2") == properties[2]
+        assert d.get_property("p3") is None
+        assert d.classes["c1"].keywords == ["k"]
+        assert set(d.classes.keys()) == {"c1", "c2"}
+
+    @staticmethod
+    def test_store_lru(tmp_path):
+        d, properties = create_dummy_dictionary(tmp_path)
+        path = tmp_path / "store.sqlite"
+        d.save_to_file(str(path))
+        store = DictionaryStore(path, max_cached=2)
+        assert store.release == "1.0"
+        assert store.type == "DummyDictionary"
+        first = store.get_property("p0")
+        assert store.get_property("p0") is first
+        store.get_property("p1")
+        store.get_property("p2")
+        assert store.get_property("p0") is not first
+        assert store.get_property("p0") == first
+        assert sorted(store.ids("classes")) == ["c1", "c2"]
+        store.close()
+
+    @staticmethod
+    def test_memory_overrides_store(tmp_path):
+        d, properties = create_dummy_dictionary(tmp_path)
+        d.save_to_file()
+        d.load_from_file()
+        assert len(d.properties.stores) == 1
+        new_property = PropertyDefinition("p0", {"en": "new"})
+        d.properties["p0"] = new_property
+        assert d.get_property("p0") is new_property
+        assert len(d.properties) == 3
+
+    @staticmethod
+    def test_save_legacy_json(tmp_path):
+        d, properties = create_dummy_dictionary(tmp_path)
+        path = tmp_path / "dict.json"
+        d.save_to_file(str(path))
+        with open(path) as file:
+            dict_ = json.load(file)
+        assert dict_["classes"]["c1"]["properties"] == ["p0", "p1"]
+
+        DummyDictionary.releases = {}
+        DummyDictionary.properties = DefinitionMapping("properties")
+        d = DummyDictionary(release="1.0", temp_dir=str(tmp_path))
+        assert d.load_from_file(str(path))
+        assert d.get_class_properties("c2") == properties[1:]
+
+    @staticmethod
+    def test_load_invalid_store(tmp_path):
+        path = tmp_path / "invalid.sqlite"
+        path.write_text("no sqlite")
+        d = DummyDictionary(release="1.0", temp_dir=str(tmp_path))
+        assert d.load_from_file(str(path)) is False
+
+def eclass_csv_row(length, **columns):
+    row = [""] * length
+    for idx, value in columns.items():
+        row[int(idx[1:])] = value
+    return ";".join(row)
+
+def create_eclass_release_zip(path):
+    csv_files = {
+        "UN": [eclass_csv_row(14, c1="mm", c12="UN1")],
+        "PR": [
+            eclass_csv_row(22, c6="switching distance", c8="def", c13="UN1", c14="en", c19="REAL_MEASURE", c20="P1"),
+            eclass_csv_row(22, c6="mounting", c14="en", c19="STRING", c20="P2"),
+        ],
+        "VA": [eclass_csv_row(14, c6="flush", c8="flush def", c12="V1")],
+        "CC_PR_VA_suggested_incl_constraints": ["C1;P2;V1;"],
+        "CC_PR": [eclass_csv_row(8, c2="27274001", c6="P1"), eclass_csv_row(8, c2="27274001", c6="P2")],
+        "KWSY": [
+            eclass_csv_row(12, c1="AKE779", c4="Inductive sensor", c8="CC"),
+            eclass_csv_row(12, c1="AAA001", c4="sensing range", c8="PR", c9="P1"),
+        ],
+        "CC": [
+            eclass_csv_row(17, c2="AKE779", c6="27274001", c7="Inductive proximity switch", c13="4"),
+            eclass_csv_row(17, c2="AKE000", c6="27270000", c7="Sensor", c13="2"),
+        ],
+    }
+    with zipfile.ZipFile(path, "w") as zip_file:
+        for name, rows in csv_files.items():
+            zip_file.writestr(f"ECLASS15_0_CSV/ECLASS15_0_{name}_en.csv", "\n".join(["header", *rows]))
+
+def compile_eclass_snapshot(temp_dir):
+    ECLASS.releases = {}
+    ECLASS.properties = DefinitionMapping("properties")
+    d = ECLASS(release="15.0", temp_dir=temp_dir)
+    return [d.compile_snapshot() for _ in range(5)]
+
+class TestECLASSReleaseZip:
+    @staticmethod
+    def test_load_from_release_csv_zip(tmp_path, monkeypatch):
+        monkeypatch.setattr(ECLASS, "releases", {})
+        monkeypatch.setattr(ECLASS, "properties", DefinitionMapping("properties"))
+        create_eclass_release_zip(tmp_path / "ECLASS-15.0-CSV-test.zip")
+
+        d = ECLASS(release="15.0", temp_dir=str(tmp_path))
+
+        assert sorted(tmp_path.iterdir()) == [
+            tmp_path / "ECLASS-15.0-CSV-test.zip",
+            tmp_path / "ECLASS-15.0.snapshot.sqlite",
+        ]
+        expected_properties = [
+            PropertyDefinition("P1", {"en": "switching distance"}, "numeric", {"en": "def"}, "mm", synonyms=["sensing range"]),
+            PropertyDefinition("P2", {"en": "mounting"}, "string", {"en": ""}, values=[
+                {"value": "flush", "id": "V1", "definition": "flush def"},
+            ]),
+        ]
+        assert list(d.classes.keys()) == ["27274001"]
+        class_ = d.classes["27274001"]
+        assert class_.name == "Inductive proximity switch"
+        assert class_.keywords == ["Inductive sensor"]
+        assert d.get_class_properties("27274001") == expected_properties
+
+        # A new process loads the compiled snapshot lazily instead of the zip
+        monkeypatch.setattr(ECLASS, "releases", {})
+        monkeypatch.setattr(ECLASS, "properties", DefinitionMapping("properties"))
+        with patch.object(ECLASS, "_load_from_release_csv_zip") as load_zip:
+            d = ECLASS(release="15.0", temp_dir=str(tmp_path))
+        load_zip.assert_not_called()
+        assert d.classes.data == {}
+        assert d.get_class_properties("27274001") == expected_properties
+        for store in ECLASS.properties.stores:
+            store.close()
+
+    @staticmethod
+    def test_saved_dictionary_is_no_snapshot(tmp_path, monkeypatch):
+        monkeypatch.setattr(ECLASS, "releases", {})
+        monkeypatch.setattr(ECLASS, "properties", DefinitionMapping("properties"))
+        zip_path = tmp_path / "ECLASS-15.0-CSV-test.zip"
+        create_eclass_release_zip(zip_path)
+        os.utime(zip_path, (0, 0))
+        # e.g. a partially scraped dictionary, that is newer than the zip
+        with patch.object(ECLASS, "load_from_file", return_value=False):
+            d = ECLASS(release="15.0", temp_dir=str(tmp_path))
+        d.properties["P9"] = PropertyDefinition("P9", {"en": "scraped"})
+        d.save_to_file()
+        for store in ECLASS.properties.stores:
+            store.close()
+
+        monkeypatch.setattr(ECLASS, "releases", {})
+        monkeypatch.setattr(ECLASS, "properties", DefinitionMapping("properties"))
+        d = ECLASS(release="15.0", temp_dir=str(tmp_path))
+
+        assert list(d.classes.keys()) == ["27274001"]
+        assert (tmp_path / "ECLASS-15.0.snapshot.sqlite").exists()
+        for store in ECLASS.properties.stores:
+            store.close()
+
+    @staticmethod
+    def test_compile_snapshot_concurrently(tmp_path, monkeypatch):
+        monkeypatch.setattr(ECLASS, "releases", {})
+        monkeypatch.setattr(ECLASS, "properties", DefinitionMapping("properties"))
+        create_eclass_release_zip(tmp_path / "ECLASS-15.0-CSV-test.zip")
+        snapshot = tmp_path / "ECLASS-15.0.snapshot.sqlite"
+
+        with ProcessPoolExecutor(max_workers=6) as executor:
+            results = list(executor.map(compile_eclass_snapshot, [str(tmp_path)] * 6))
+
+        assert results == [[snapshot] * 5] * 6
+        assert sorted(tmp_path.iterdir()) == [tmp_path / "ECLASS-15.0-CSV-test.zip", snapshot]
+        store = DictionaryStore(snapshot)
+        assert store.ids("classes") == ["27274001"]
+        store.close()
+
+    @staticmethod
+    def test_load_from_invalid_zip(tmp_path, monkeypatch):
+        monkeypatch.setattr(ECLASS, "releases", {})
+        (tmp_path / "ECLASS-15.0-CSV-test.zip").write_text("no zip")
+        d = ECLASS(release="15.0", temp_dir=str(tmp_path))
+        assert len(d.classes) == 0
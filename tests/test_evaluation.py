@@ -2,7 +2,7 @@ import pytest
 from pathlib import Path
 from unittest.mock import patch
 
-from  pdf2aas.evaluation import EvaluationAAS, EvaluationArticle
+from  pdf2aas.evaluation import EvaluationAAS, EvaluationArticle, EvaluationPrompt
 
 from test_generator import test_property_list2
 
@@ -111,3 +111,43 @@ ETIM       9.0:    EC002714
         evaluation.datasheet_cutoff_pattern = "# Heading 2"
         text = evaluation._cut_datasheet(["# Heading 1\ntext", "# Heading 2\ntext"])
         assert len(text) == 17
+
+
+class TestEvaluationPrompt:
+    @staticmethod
+    def test_from_raw_results_cached():
+        raw_results = [
+            {"model": "gpt-4o-mini", "usage": {"prompt_tokens": 1000, "completion_tokens": 100}},
+            {"model": "gpt-4o-mini", "usage": {"prompt_tokens": 1000, "completion_tokens": 100}, "cached": True},
+            "no dict",
+        ]
+        prompts = EvaluationPrompt.from_raw_results(raw_results)
+        assert [p.cached for p in prompts] == [False, True]
+        assert prompts[1].calc_costs() == 0
+        summary = EvaluationPrompt.summarize(prompts)
+        assert "prompts:   2 (1 cached)" in summary
+        assert "tokens: 1,000 -> 100" in summary
+
+    @staticmethod
+    def test_from_raw_results_cached_input_tokens():
+        raw_results = [
+            {
+                "model": "gpt-4o-mini",
+                "usage": {
+                    "prompt_tokens": 1000,
+                    "completion_tokens": 100,
+                    "prompt_tokens_details": {"cached_tokens": 800},
+                },
+            },
+            {"model": "gpt-4o-mini", "usage": {"prompt_tokens": 1000, "completion_tokens": 100, "prompt_tokens_details": None}},
+        ]
+        prompts = EvaluationPrompt.from_raw_results(raw_results)
+        assert [p.cached_input_tokens for p in prompts] == [800, 0]
+        assert prompts[0].calc_costs() == pytest.approx((200 * 0.15 + 800 * 0.075 + 100 * 0.6) * 1e-6)
+        # no discount known for the model
+        prompts[0].model = "gpt-4-turbo"
+        assert prompts[0].calc_costs() == pytest.approx((1000 * 10 + 100 * 30) * 1e-6)
+        prompts[0].model = "gpt-4o-mini"
+        summary = EvaluationPrompt.summarize(prompts)
+        assert "tokens: 2,000 -> 200" in summary
+        assert "prompt cache: 800 input tokens (40%)" in summary
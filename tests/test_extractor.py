@@ -1,10 +1,18 @@
+import asyncio
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import ANY, patch, MagicMock, AsyncMock
+from openai import OpenAI
+from openai.types.chat import ChatCompletionChunk
 import json
 import requests
 
+from pdf2aas import PDF2AAS
+from pdf2aas.cache import MemoryCache
 from pdf2aas.model import PropertyDefinition, Property
-from pdf2aas.extractor import CustomLLMClient, CustomLLMClientHTTP, PropertyLLMSearch
+from pdf2aas.extractor import tokens
+from pdf2aas.extractor.tokens import MESSAGE_OVERHEAD_TOKENS, estimate_message_tokens, estimate_tokens
+from pdf2aas.extractor import BM25Retriever, CustomLLMClient, CustomLLMClientHTTP, DefinitionMatcher, Extractor, PropertyCascade, PropertyLLMSearch, PropertyRegex, RateLimiter
+from pdf2aas.extractor.property_llm_map import PropertyLLMMap
 
 example_property_definition_numeric = PropertyDefinition("p1", {'en': 'property1'}, 'numeric', {'en': 'definition of p1'}, 'T')
 example_property_definition_string = PropertyDefinition("p2", {'en': 'property2'}, 'string', {'en': 'definition of p2'}, values=['a', 'b'])
@@ -73,6 +81,231 @@ class TestPropertyLLMSearch():
         properties = self.llm.extract("datasheet", [example_property_definition_string, example_property_definition_numeric])
         assert properties == [example_property_numeric]
 
+    @pytest.mark.parametrize("response", [
+        example_accepted_llm_response_multiple[0][:-40],
+        '```json\n' + example_accepted_llm_response_multiple[0][:-40] + '\n```',
+        '[{"property": "property1", "value": 1, "unit": "kT", "reference": "p1 is 1Nm"}, {"property": "prop',
+    ])
+    def test_parse_truncated_llm_response(self, response):
+        self.llm.client.response = response
+        properties = self.llm.extract("datasheet", [example_property_definition_numeric, example_property_definition_string])
+        assert properties == [example_property_numeric]
+
+    def test_parse_truncated_llm_response_without_object(self):
+        self.llm.client.response = '[{"property": "property1", "val'
+        assert self.llm.extract("datasheet", [example_property_definition_numeric]) == []
+
+    @pytest.mark.parametrize("control", ["\x00", "\x1b", "​", "﻿", "\U000e0001"])
+    def test_parse_llm_response_with_control_chars(self, control):
+        self.llm.client.response = example_accepted_llm_response[0].replace('"kT"', f'"k{control}T"') + control
+        properties = self.llm.extract("datasheet", [example_property_definition_numeric])
+        assert properties == [example_property_numeric]
+
+    def test_parse_llm_response_keeps_astral_chars(self):
+        self.llm.client.response = example_accepted_llm_response[0].replace('p1 is 1Nm', 'p1 is 1Nm \U0001f600')
+        properties = self.llm.extract("datasheet", [example_property_definition_numeric])
+        assert properties[0].reference == 'p1 is 1Nm \U0001f600'
+
+    def test_aextract(self):
+        self.llm.client.response = example_accepted_llm_response_multiple[0]
+        self.llm.client.raw_response = example_accepted_llm_response_multiple[0]
+        raw_prompts = []
+        raw_results = []
+        properties = asyncio.run(self.llm.aextract(
+            "datasheet",
+            [example_property_definition_numeric, example_property_definition_string],
+            raw_prompts,
+            raw_results,
+        ))
+        assert properties == [example_property_numeric, example_property_string]
+        assert len(raw_prompts) == 1
+        assert raw_results == [example_accepted_llm_response_multiple[0]]
+
+    def test_aextract_async_openai_client(self):
+        llm = PropertyLLMSearch('test', client=MagicMock())
+        chat_completion = MagicMock()
+        chat_completion.choices[0].message.content = example_accepted_llm_response[0]
+        chat_completion.choices[0].finish_reason = "stop"
+        chat_completion.to_dict.return_value = {"model": "test"}
+        llm.async_client = MagicMock()
+        llm.async_client.chat.completions.create = AsyncMock(return_value=chat_completion)
+        raw_results = []
+        properties = asyncio.run(llm.aextract("datasheet", [example_property_definition_numeric], raw_results=raw_results))
+        assert properties == [example_property_numeric]
+        assert raw_results == [{"model": "test"}]
+        llm.async_client.chat.completions.create.assert_awaited_once()
+        llm.client.chat.completions.create.assert_not_called()
+
+    def test_cache(self):
+        client = DummyLLMClient()
+        client.response = example_accepted_llm_response[0]
+        client.raw_response = {"usage": {"prompt_tokens": 10}}
+        client.create_completions = MagicMock(wraps=client.create_completions)
+        llm = PropertyLLMSearch('test', client=client)
+        llm.cache = MemoryCache()
+        raw_results = []
+        for _ in range(2):
+            properties = llm.extract("datasheet", [example_property_definition_numeric], raw_results=raw_results)
+            assert properties == [example_property_numeric]
+        client.create_completions.assert_called_once()
+        assert raw_results == [
+            {"usage": {"prompt_tokens": 10}},
+            {"usage": {"prompt_tokens": 10}, "cached": True},
+        ]
+        llm.temperature = 1
+        llm.extract("datasheet", [example_property_definition_numeric])
+        assert client.create_completions.call_count == 2
+
+class TestStablePromptPrefix():
+    @staticmethod
+    def test_messages_share_prefix():
+        llm = PropertyLLMSearch('test', client=DummyLLMClient(), prompt_order=["hint", "properties", "datasheet"])
+        llm.stable_prompt_prefix = True
+        raw_prompts = []
+        llm.extract(["page 1", "page 2"], [example_property_definition_numeric], raw_prompts, prompt_hint="hint")
+        llm.extract(["page 1", "page 2"], [example_property_definition_string], raw_prompts, prompt_hint="hint")
+        first, second = raw_prompts
+        assert len(first) == 3
+        assert first[:2] == second[:2]
+        assert first[1]["content"] == llm.create_datasheet_prompt("page 1\npage 2")
+        assert "page 1" not in first[2]["content"]
+        assert first[2]["content"].startswith("hint\n")
+        assert "property1" in first[2]["content"]
+        assert "property2" in second[2]["content"]
+
+    @staticmethod
+    def test_default_messages():
+        llm = PropertyLLMSearch('test', client=DummyLLMClient())
+        raw_prompts = []
+        llm.extract("datasheet", [example_property_definition_numeric], raw_prompts)
+        assert len(raw_prompts[0]) == 2
+        assert raw_prompts[0][1]["content"].startswith(llm.create_datasheet_prompt("datasheet"))
+
+
+def chat_completion_chunks(text, size):
+    chunk = {"id": "chatcmpl-1", "object": "chat.completion.chunk", "created": 0, "model": "test"}
+    for start in range(0, len(text), size):
+        yield ChatCompletionChunk.model_validate(
+            {**chunk, "choices": [{"index": 0, "delta": {"content": text[start:start + size]}}]})
+    yield ChatCompletionChunk.model_validate(
+        {**chunk, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+    yield ChatCompletionChunk.model_validate(
+        {**chunk, "choices": [], "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15}})
+
+
+class TestPropertyLLMStream():
+    @staticmethod
+    def llm(response, size=5):
+        llm = PropertyLLMSearch('test', client=MagicMock())
+        llm.client.chat.completions.create.side_effect = lambda **kwargs: chat_completion_chunks(response, size)
+        return llm
+
+    @pytest.mark.parametrize("size", [1, 7, 1000])
+    @pytest.mark.parametrize("response", [*example_accepted_llm_response_multiple, '```json\n{"result": ' + example_accepted_llm_response_multiple[0] + '}\n```'])
+    def test_extract_stream(self, response, size):
+        llm = self.llm(response, size)
+        raw_results = []
+        properties = list(llm.extract_stream("datasheet", [example_property_definition_numeric, example_property_definition_string], raw_results=raw_results))
+        assert properties == [example_property_numeric, example_property_string]
+        assert llm.client.chat.completions.create.call_args.kwargs["stream"] is True
+        assert raw_results[0]["choices"][0]["message"]["content"] == response
+        assert raw_results[0]["choices"][0]["finish_reason"] == "stop"
+        assert raw_results[0]["usage"]["total_tokens"] == 15
+
+    def test_yields_before_answer_is_complete(self):
+        chunks = chat_completion_chunks(example_accepted_llm_response_multiple[0], 10)
+        llm = PropertyLLMSearch('test', client=MagicMock())
+        llm.client.chat.completions.create.return_value = chunks
+        stream = llm.extract_stream("datasheet", [example_property_definition_numeric, example_property_definition_string])
+        assert next(stream) == example_property_numeric
+        assert len(list(chunks)) > 5
+        assert list(stream) == []
+
+    def test_braces_and_quotes_in_strings(self):
+        response = '[{"property": "property2", "value": "a", "unit": null, "reference": "p2 {is} \\"a\\\\"}]'
+        llm = self.llm(response, 1)
+        properties = list(llm.extract_stream("datasheet", [example_property_definition_numeric, example_property_definition_string]))
+        assert len(properties) == 1
+        assert properties[0].reference == 'p2 {is} "a\\'
+        assert properties[0].definition == example_property_definition_string
+
+    def test_cache(self):
+        llm = self.llm(example_accepted_llm_response_multiple[0])
+        llm.cache = MemoryCache()
+        definitions = [example_property_definition_numeric, example_property_definition_string]
+        raw_results = []
+        for _ in range(2):
+            assert list(llm.extract_stream("datasheet", definitions, raw_results=raw_results)) == [example_property_numeric, example_property_string]
+        llm.client.chat.completions.create.assert_called_once()
+        assert raw_results[1]["cached"] is True
+
+    @staticmethod
+    def test_custom_llm_client():
+        client = DummyLLMClient()
+        client.response = example_accepted_llm_response[0]
+        llm = PropertyLLMSearch('test', client=client)
+        raw_prompts = []
+        assert list(llm.extract_stream("datasheet", [example_property_definition_numeric], raw_prompts)) == [example_property_numeric]
+        assert len(raw_prompts) == 1
+
+
+class TestPropertyLLMBatch():
+    @staticmethod
+    def llm(server):
+        return PropertyLLMSearch('test', client=OpenAI(api_key="test", base_url=server.base_url, max_retries=0))
+
+    def test_submit_and_collect(self, openai_batch_server, tmp_path):
+        openai_batch_server.respond = lambda custom_id, body: example_accepted_llm_response[0]
+        llm = self.llm(openai_batch_server)
+        requests = [
+            llm.create_batch_request("a", "datasheet", [example_property_definition_numeric]),
+            llm.create_batch_request("b", "datasheet", example_property_definition_numeric),
+        ]
+        assert requests[0]["body"]["messages"][1]["content"] == llm.create_prompt("datasheet", [example_property_definition_numeric])
+
+        batch_id = llm.submit_batch(requests, str(tmp_path / "batch.jsonl"))
+        assert [json.loads(line) for line in (tmp_path / "batch.jsonl").read_text().splitlines()] == requests
+
+        results = llm.collect_batch(batch_id)
+        assert list(results) == ["a", "b"]
+        result, raw_result = results["a"]
+        assert raw_result["usage"]["total_tokens"] == 15
+        assert llm.process_batch_result(result, [example_property_definition_numeric]) == [example_property_numeric]
+
+    def test_collect_in_progress(self, openai_batch_server):
+        llm = self.llm(openai_batch_server)
+        batch_id = llm.submit_batch([llm.create_batch_request("a", "datasheet", [])])
+        openai_batch_server.status = "in_progress"
+        assert llm.collect_batch(batch_id) is None
+        openai_batch_server.status = "completed"
+        assert llm.collect_batch(batch_id) == {"a": ("[]", ANY)}
+
+    def test_failed_request(self, openai_batch_server):
+        llm = self.llm(openai_batch_server)
+        openai_batch_server.files["file-error"] = json.dumps({
+            "custom_id": "a", "response": None, "error": {"code": "invalid", "message": "bad request"},
+        }).encode()
+        batch_id = llm.submit_batch([llm.create_batch_request("a", "datasheet", [])])
+        openai_batch_server.batches[batch_id].update(status="completed", output_file_id="", error_file_id="file-error")
+        assert llm.collect_batch(batch_id) == {"a": (None, {"code": "invalid", "message": "bad request"})}
+
+    def test_collect_failed(self, openai_batch_server):
+        llm = self.llm(openai_batch_server)
+        batch_id = llm.submit_batch([llm.create_batch_request("a", "datasheet", [])])
+        openai_batch_server.status = "failed"
+        openai_batch_server.batches[batch_id]["errors"] = {
+            "object": "list", "data": [{"code": "invalid_json_line", "message": "bad line", "line": 1}],
+        }
+        with pytest.raises(RuntimeError, match="invalid_json_line: bad line"):
+            llm.collect_batch(batch_id)
+
+    @staticmethod
+    def test_needs_openai_client():
+        llm = PropertyLLMSearch('test', client=DummyLLMClient())
+        with pytest.raises(TypeError):
+            llm.submit_batch([])
+
+
 class TestCustomLLMClientHttp():
     mock_result = {"result": {"value": 42}, "status": 200}
     endpoint = "http://localhost:12345"
@@ -100,7 +333,7 @@ class TestCustomLLMClientHttp():
     def test_create_completions_post(self):
         client=CustomLLMClientHTTP(self.endpoint)
         client.result_path = None
-        with patch('requests.post') as mock_post:
+        with patch('requests.Session.post') as mock_post:
             mock_post.return_value = MagicMock(status_code=200, json=lambda: self.mock_result)
             result_content, result = client.create_completions(
                 self.messages,
@@ -128,7 +361,7 @@ class TestCustomLLMClientHttp():
             "texts": [self.messages[0]['content'], self.messages[1]['content']],
             "t" : self.temperature,
         })
-        with patch('requests.post') as mock_post:
+        with patch('requests.Session.post') as mock_post:
             mock_post.return_value = MagicMock(status_code=200, json=lambda: self.mock_result)
             client.create_completions(
                 self.messages,
@@ -146,7 +379,7 @@ class TestCustomLLMClientHttp():
     def test_result_path(self):
         client=CustomLLMClientHTTP(self.endpoint)
         client.result_path = "result.value"
-        with patch('requests.post') as mock_post:
+        with patch('requests.Session.post') as mock_post:
             mock_post.return_value = MagicMock(status_code=200, json=lambda: self.mock_result)
             result_content, result = client.create_completions(
                 self.messages,
@@ -163,7 +396,7 @@ class TestCustomLLMClientHttp():
     def test_api_key_is_added_as_bearer(self):
         client=CustomLLMClientHTTP(self.endpoint)
         client.api_key = "my_api_key"
-        with patch('requests.post') as mock_post:
+        with patch('requests.Session.post') as mock_post:
             mock_post.return_value = MagicMock(status_code=200, json=lambda: self.mock_result)
             client.create_completions(
                 self.messages,
@@ -183,7 +416,7 @@ class TestCustomLLMClientHttp():
         client=CustomLLMClientHTTP(self.endpoint)
         client.api_key = "my_api_key"
         client.headers = {'Authorization': 'here is {api_key}'}
-        with patch('requests.post') as mock_post:
+        with patch('requests.Session.post') as mock_post:
             mock_post.return_value = MagicMock(status_code=200, json=lambda: self.mock_result)
             client.create_completions(
                 self.messages,
@@ -202,7 +435,8 @@ class TestCustomLLMClientHttp():
     def test_retries(self):
         client=CustomLLMClientHTTP(self.endpoint)
         client.retries = 2
-        with patch('requests.post') as mock_post:
+        client.backoff_factor = 0
+        with patch('requests.Session.post') as mock_post:
             mock_post.return_value = MagicMock(status_code=400, json=lambda: self.mock_result)
             mock_post.side_effect = requests.exceptions.RequestException("Mocked exception")
             client.create_completions(
@@ -212,4 +446,460 @@ class TestCustomLLMClientHttp():
                 self.max_tokens,
                 self.response_format
             )
-            assert mock_post.call_count == 3
\ No newline at end of file
+            assert mock_post.call_count == 3
+
+    def test_session_is_reused(self):
+        client=CustomLLMClientHTTP(self.endpoint)
+        with patch('requests.Session') as mock_session:
+            mock_post = mock_session.return_value.post
+            mock_post.return_value = MagicMock(status_code=200, json=lambda: self.mock_result)
+            for _ in range(3):
+                client.create_completions(
+                    self.messages,
+                    self.model_identifier,
+                    self.temperature,
+                    self.max_tokens,
+                    self.response_format
+                )
+            assert mock_post.call_count == 3
+            mock_session.assert_called_once()
+
+    @pytest.mark.parametrize("retry_after", ["2", "Wed, 21 Oct 2015 07:28:00 GMT"])
+    def test_retry_after(self, retry_after):
+        client=CustomLLMClientHTTP(self.endpoint, retries=1)
+        response = requests.Response()
+        response.status_code = 429
+        response.headers["Retry-After"] = retry_after
+        with patch('requests.Session.post') as mock_post, patch('time.sleep') as mock_sleep:
+            mock_post.side_effect = [
+                requests.exceptions.HTTPError("Too many requests", response=response),
+                MagicMock(status_code=200, json=lambda: self.mock_result),
+            ]
+            _, result = client.create_completions(
+                self.messages,
+                self.model_identifier,
+                self.temperature,
+                self.max_tokens,
+                self.response_format
+            )
+            assert mock_post.call_count == 2
+            mock_sleep.assert_called_once_with(2 if retry_after == "2" else 0)
+            assert result == self.mock_result
+
+    def test_deadline_stops_retries(self):
+        client=CustomLLMClientHTTP(self.endpoint, retries=5, deadline=1, backoff_factor=10, backoff_max=10)
+        with patch('requests.Session.post') as mock_post, patch('random.uniform', return_value=5), patch('time.sleep') as mock_sleep:
+            mock_post.side_effect = requests.exceptions.RequestException("Mocked exception")
+            result = client.create_completions(
+                self.messages,
+                self.model_identifier,
+                self.temperature,
+                self.max_tokens,
+                self.response_format
+            )
+            assert result == (None, None)
+            mock_post.assert_called_once()
+            assert mock_post.call_args.kwargs["timeout"] <= 1
+            mock_sleep.assert_not_called()
+
+    def test_acreate_completions(self):
+        client=CustomLLMClientHTTP(self.endpoint)
+        client.result_path = "result.value"
+        client.api_key = "my_api_key"
+        with patch('httpx.AsyncClient.post', new_callable=AsyncMock) as mock_post:
+            mock_post.return_value = MagicMock(status_code=200, json=lambda: self.mock_result)
+            result_content, result = asyncio.run(client.acreate_completions(
+                self.messages,
+                self.model_identifier,
+                self.temperature,
+                self.max_tokens,
+                self.response_format
+            ))
+
+            mock_post.assert_called_once_with(
+                self.endpoint,
+                headers={**self.default_headers, "Authorization": "Bearer my_api_key"},
+                content=self.default_payload,
+                timeout=client.timeout,
+            )
+            assert result_content == str(self.mock_result['result']['value'])
+            assert result == self.mock_result
+
+    def test_async_client_closed_with_event_loop(self):
+        client = CustomLLMClientHTTP(self.endpoint)
+
+        async def get_client():
+            return await client._get_async_client()
+
+        first = asyncio.run(get_client())
+        assert first.is_closed
+        second = asyncio.run(get_client())
+        assert second is not first
+        assert second.is_closed
+
+        async def get_and_close():
+            async_client = await client._get_async_client()
+            await client.aclose()
+            return async_client
+
+        assert asyncio.run(get_and_close()).is_closed
+        assert client._async_client is None
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+class TestRateLimiter():
+    @staticmethod
+    @pytest.fixture
+    def clock():
+        clock = FakeClock()
+        with patch("pdf2aas.extractor.rate_limiter.time", clock):
+            yield clock
+
+    @staticmethod
+    def test_requests_per_minute(clock):
+        limiter = RateLimiter(requests_per_minute=60, burst_seconds=2)
+        delays = [limiter.acquire() for _ in range(5)]
+        assert delays == pytest.approx([0, 0, 0, 1, 1])
+
+    @staticmethod
+    def test_tokens_per_minute(clock):
+        limiter = RateLimiter(tokens_per_minute=600, burst_seconds=0)
+        assert limiter.acquire(100) == 0
+        assert limiter.acquire(50) == pytest.approx(10)
+        assert limiter.acquire(10) == pytest.approx(5)
+
+    @staticmethod
+    def test_reconcile_usage(clock):
+        limiter = RateLimiter(tokens_per_minute=600, burst_seconds=0)
+        limiter.acquire(100)
+        limiter.reconcile_usage(100, {"usage": {"total_tokens": 20}})
+        assert limiter.acquire(10) == pytest.approx(2)
+        limiter.reconcile_usage(10, "no usage")
+        assert limiter.acquire() == pytest.approx(1)
+
+    @staticmethod
+    def test_aacquire(clock):
+        limiter = RateLimiter(requests_per_minute=60, burst_seconds=0)
+        async def acquire_all():
+            return await asyncio.gather(*(limiter.aacquire() for _ in range(3)))
+        with patch("pdf2aas.extractor.rate_limiter.asyncio.sleep", AsyncMock()) as sleep:
+            delays = asyncio.run(acquire_all())
+        assert sorted(delays) == pytest.approx([0, 1, 2])
+        assert sleep.await_count == 2
+
+    @staticmethod
+    def test_property_llm(clock):
+        client = DummyLLMClient()
+        client.response = example_accepted_llm_response[0]
+        client.raw_response = {"usage": {"total_tokens": 60}}
+        llm = PropertyLLMSearch('test', client=client)
+        llm.rate_limiter = RateLimiter(tokens_per_minute=60, burst_seconds=0)
+        llm.extract("datasheet", [example_property_definition_numeric])
+        llm.extract("datasheet", [example_property_definition_numeric])
+        assert clock.sleeps == pytest.approx([60])
+
+    @staticmethod
+    def test_no_estimate_without_rate_limiter():
+        client = DummyLLMClient()
+        client.response = example_accepted_llm_response[0]
+        llm = PropertyLLMSearch('test', client=client)
+        with patch.object(llm, "_estimate_tokens") as estimate:
+            llm.extract("datasheet", [example_property_definition_numeric])
+        estimate.assert_not_called()
+
+
+class TestBM25Retriever():
+    pages = [
+        "General information\nManufacturer: ACME",
+        "Mechanical data\nproperty1: 1 Nm",
+        "Ordering information\nArticle number 4711",
+        "Electrical data\nproperty2 is a\nsupply voltage 24 V",
+        "Notes\nproperty1 depends on the temperature",
+    ]
+
+    def test_retrieve_top_k(self):
+        retriever = BM25Retriever(top_k=2)
+        chunks = retriever.retrieve(self.pages, [example_property_definition_numeric])
+        assert chunks == [self.pages[1], self.pages[4]]
+        chunks = retriever.retrieve(self.pages, example_property_definition_string)
+        assert chunks == [self.pages[3]]
+
+    def test_retrieve_unit(self):
+        retriever = BM25Retriever(top_k=1)
+        definition = PropertyDefinition("p4", {"en": "rated voltage"}, "numeric", unit="V")
+        assert retriever.retrieve(self.pages, definition) == [self.pages[3]]
+
+    def test_retrieve_synonyms(self):
+        retriever = BM25Retriever(top_k=1)
+        definition = PropertyDefinition("p6", {"en": "producer"}, synonyms=["manufacturer"])
+        assert retriever.retrieve(self.pages, definition) == [self.pages[0]]
+
+    def test_retrieve_keeps_datasheet(self):
+        retriever = BM25Retriever(top_k=5)
+        assert retriever.retrieve(self.pages, example_property_definition_numeric) is self.pages
+        retriever.top_k = 2
+        definition = PropertyDefinition("p5", {"en": "color"})
+        assert retriever.retrieve(self.pages, definition) is self.pages
+
+    @staticmethod
+    def test_split():
+        retriever = BM25Retriever(chunk_chars=10)
+        assert retriever.split(["short", "line one\nline two\nline three"]) == [
+            "short",
+            "line one",
+            "line two",
+            "line three",
+        ]
+        assert retriever.split("a\nb\nc") == ["a\nb\nc"]
+
+    def test_property_llm_search(self):
+        client = DummyLLMClient()
+        client.response = example_accepted_llm_response[0]
+        llm = PropertyLLMSearch('test', client=client)
+        llm.retriever = BM25Retriever(top_k=1)
+        raw_prompts = []
+        properties = llm.extract(self.pages, [example_property_definition_numeric], raw_prompts)
+        assert properties == [example_property_numeric]
+        prompt = raw_prompts[0][1]["content"]
+        assert self.pages[1] in prompt
+        assert self.pages[0] not in prompt
+
+
+class TestDefinitionMatcher():
+    definitions = [
+        PropertyDefinition("v", {"en": "rated voltage", "de": "Bemessungsspannung"}, "numeric", unit="V"),
+        PropertyDefinition("c", {"en": "rated current"}, "numeric", unit="A"),
+        PropertyDefinition("w", {"en": "weight"}, "numeric", unit="kg", synonyms=["mass", "net weight"]),
+        PropertyDefinition("ip", {"en": "degree of protection (IP)"}),
+    ]
+
+    @pytest.mark.parametrize(("label", "expected"), [
+        ("Rated Voltage", "v"),
+        ("voltage, rated", "v"),
+        ("bemessungsspannung", "v"),
+        ("rated  voltage:", "v"),
+        ("rated voltag", "v"),
+        ("Mass", "w"),
+        ("net-weight", "w"),
+        ("degree of protection", "ip"),
+        ("rated currents", "c"),
+        ("color", None),
+        ("", None),
+        (None, None),
+    ])
+    def test_match(self, label, expected):
+        definition = DefinitionMatcher(self.definitions).match(label)
+        assert (definition.id if definition else None) == expected
+
+    def test_match_many(self):
+        matcher = DefinitionMatcher(self.definitions)
+        matches = matcher.match_many(["rated voltage", "rated voltag", "voltage rated", "weights", None])
+        assert [m.id if m else None for m in matches] == ["v", None, "v", "w", None]
+
+    def test_threshold(self):
+        assert DefinitionMatcher(self.definitions, threshold=0.99).match("rated voltag") is None
+
+    @staticmethod
+    def test_property_llm_map():
+        client = DummyLLMClient()
+        client.response = '[{"property": "Property-1", "value": 1, "unit": "kT", "reference": "p1 is 1Nm"}, {"property": "property 2", "value": "a"}, {"property": "color", "value": "red"}]'
+        llm = PropertyLLMMap('test', client=client)
+        definitions = [example_property_definition_numeric, example_property_definition_string]
+        properties = llm.extract("datasheet", definitions)
+        assert [p.definition for p in properties] == [*definitions, None]
+        assert llm._definition_matcher(definitions) is llm._definition_matcher(definitions)
+
+    @staticmethod
+    def test_property_llm_search_fallback():
+        client = DummyLLMClient()
+        client.response = '[{"property": "Property 2", "value": "a", "unit": null, "reference": "p2 is a"}]'
+        llm = PropertyLLMSearch('test', client=client)
+        properties = llm.extract("datasheet", [example_property_definition_numeric, example_property_definition_string])
+        assert [p.definition for p in properties] == [example_property_definition_string]
+
+
+class TestPropertyRegex():
+    datasheet = [
+        "Technical data\nRated voltage: 24 V DC\nThe rated voltage of the coil is listed below.\nOperating temperature -25 ... 70 °C",
+        "Weight 1,5 kg\nDegree of protection: IP67\nArticle number: 6ES7 214-1AG40\nRated current 2 A\nRated current (max.) 3 A\nShort-circuit protection: yes",
+    ]
+    voltage = PropertyDefinition("v", {"en": "rated voltage"}, "numeric", unit="V")
+    temperature = PropertyDefinition("t", {"en": "ambient temperature"}, "range", unit="°C", synonyms=["operating temperature"])
+    weight = PropertyDefinition("w", {"en": "weight"}, "numeric", unit="kg")
+    protection = PropertyDefinition("ip", {"en": "degree of protection"}, values=["IP65", "IP67"])
+    article = PropertyDefinition("a", {"en": "article number"})
+    short_circuit = PropertyDefinition("sc", {"en": "short-circuit protection"}, "bool")
+    current = PropertyDefinition("c", {"en": "rated current"}, "numeric", unit="A")
+    color = PropertyDefinition("col", {"en": "color"})
+
+    def test_extract_rules(self):
+        properties, remaining = PropertyRegex().extract_rules(self.datasheet, [
+            self.voltage, self.temperature, self.weight, self.protection,
+            self.article, self.short_circuit, self.current, self.color,
+        ])
+        assert [(p.definition.id, p.value, p.unit) for p in properties] == [
+            ("v", 24, "V"),
+            ("t", [-25, 70], "°C"),
+            ("w", 1.5, "kg"),
+            ("ip", "IP67", None),
+            ("sc", True, None),
+        ]
+        assert properties[0].label == "rated voltage"
+        assert properties[0].reference == "Rated voltage: 24 V DC"
+        # free text after a separator is left to the fallback
+        assert remaining == [self.article, self.current, self.color]
+
+    @pytest.mark.parametrize(("line", "value"), [
+        ("Rated voltage 230 V", 230),
+        ("Rated voltage (Ue) = 400 V AC", 400),
+        ("Rated voltage 24 VA", None),
+        ("Rated voltage 10-30 V", None),
+        ("rated voltage", None),
+    ])
+    def test_numeric(self, line, value):
+        properties, _ = PropertyRegex().extract_rules(line, self.voltage)
+        assert [p.value for p in properties] == ([] if value is None else [value])
+
+    def test_unit_alias(self):
+        properties, _ = PropertyRegex().extract_rules("Operating temperature -25 to +70 degC", self.temperature)
+        assert properties[0].value == [-25, 70]
+
+    def test_fallback(self):
+        client = DummyLLMClient()
+        client.response = '[{"property": "rated current", "value": 2, "unit": "A", "reference": "Rated current 2 A"}]'
+        fallback = PropertyLLMSearch('test', client=client)
+        fallback.extract = MagicMock(wraps=fallback.extract)
+        extractor = PropertyRegex(fallback)
+        raw_prompts = []
+        properties = extractor.extract(self.datasheet, [self.current, self.voltage], raw_prompts)
+        assert [(p.definition.id, p.value) for p in properties] == [("c", 2), ("v", 24)]
+        assert len(raw_prompts) == 1
+        assert fallback.extract.call_args.args[1] == [self.current]
+
+        properties = asyncio.run(extractor.aextract(self.datasheet, [self.current, self.voltage]))
+        assert [p.definition.id for p in properties] == ["c", "v"]
+        assert [p.definition.id for p in extractor.extract_stream(self.datasheet, [self.current, self.voltage])] == ["v", "c"]
+
+    def test_no_fallback_call_if_all_found(self):
+        fallback = MagicMock()
+        properties = PropertyRegex(fallback).extract(self.datasheet, [self.voltage])
+        assert [p.value for p in properties] == [24]
+        fallback.extract.assert_not_called()
+
+    def test_convert_pdf(self, text_pdf):
+        definitions = [self.voltage, self.temperature, self.weight, self.protection, self.short_circuit]
+        pdf2aas = PDF2AAS(dictionary=None, extractor=PropertyRegex(), generator=None)
+        pdf2aas.definitions = lambda classification: definitions
+
+        properties = pdf2aas.convert(text_pdf(self.datasheet))
+
+        assert [(p.definition.id, p.value) for p in properties] == [
+            ("v", 24), ("t", [-25, 70]), ("w", 1.5), ("ip", "IP67"), ("sc", True),
+        ]
+
+
+class DummyAnswerExtractor(Extractor):
+    def __init__(self, answers):
+        self.answers = answers
+        self.calls = []
+
+    def extract(self, datasheet, property_definition, raw_prompts=None, raw_results=None):
+        self.calls.append([d.id for d in property_definition])
+        return [
+            Property(d.id, *self.answers[d.id], definition=d)
+            for d in property_definition
+            if d.id in self.answers
+        ]
+
+
+class TestPropertyCascade():
+    datasheet = "property1: 1 kT\np2 is a\np3 is 5 .. 10"
+    definitions = [example_property_definition_numeric, example_property_definition_string, example_property_definition_range]
+    second = {
+        "p1": (2, "kT", "property1: 1 kT"),
+        "p2": ("b", None, "p2 is a"),
+        "p3": ([5, 10], None, "p3 is 5 .. 10"),
+    }
+
+    @pytest.mark.parametrize(("answer", "escalate"), [
+        ((1, "kT", "property1: 1 kT"), False),
+        ((1, "kT", "PROPERTY1:   1 kT"), False),
+        (("1", "kT", "property1: 1 kT"), False),
+        ((None, None, None), True),
+        (("one", "kT", "property1: 1 kT"), True),
+        ((1, "kT", "property1 is 1 kT"), True),
+        ((1, "kT", None), True),
+    ])
+    def test_escalate_numeric(self, answer, escalate):
+        first = DummyAnswerExtractor({"p1": answer})
+        second = DummyAnswerExtractor(self.second)
+        properties = PropertyCascade(first, second).extract(self.datasheet, [example_property_definition_numeric])
+        assert second.calls == ([["p1"]] if escalate else [])
+        assert properties[0].value == (2 if escalate else answer[0])
+
+    def test_escalate_values_range_and_missing(self):
+        first = DummyAnswerExtractor({
+            "p2": ("c", None, "p2 is a"),
+            "p3": ("5 .. 10", None, "p3 is 5 .. 10"),
+        })
+        second = DummyAnswerExtractor(self.second)
+        properties = PropertyCascade(first, second).extract(self.datasheet, self.definitions)
+        assert second.calls == [["p1", "p2"]]
+        assert [(p.definition.id, p.value) for p in properties] == [("p1", 2), ("p2", "b"), ("p3", "5 .. 10")]
+
+    def test_keep_first_if_second_has_no_value(self):
+        first = DummyAnswerExtractor({"p1": ("one", "kT", None)})
+        second = DummyAnswerExtractor({"p1": (None, None, None)})
+        properties = PropertyCascade(first, second, check_reference=False).extract(self.datasheet, example_property_definition_numeric)
+        assert [p.value for p in properties] == ["one"]
+
+    def test_aextract_and_stream(self):
+        first = DummyAnswerExtractor({"p2": ("a", None, "p2 is a"), "p3": ("x", None, "p3 is 5 .. 10")})
+        second = DummyAnswerExtractor(self.second)
+        cascade = PropertyCascade(first, second)
+        properties = asyncio.run(cascade.aextract(self.datasheet, self.definitions))
+        assert [(p.definition.id, p.value) for p in properties] == [("p1", 2), ("p2", "a"), ("p3", [5, 10])]
+        streamed = list(cascade.extract_stream(self.datasheet, self.definitions))
+        assert [(p.definition.id, p.value) for p in streamed] == [("p2", "a"), ("p1", 2), ("p3", [5, 10])]
+        assert second.calls[-1] == ["p1", "p3"]
+
+    def test_stream_escalations(self):
+        first = DummyAnswerExtractor({"p1": ("one", "kT", None), "p3": ("x", None, "p3 is 5 .. 10")})
+        second = DummyAnswerExtractor({"p3": ([5, 10], None, "p3 is 5 .. 10")})
+        second.extract_stream = MagicMock(wraps=second.extract_stream)
+        cascade = PropertyCascade(first, second)
+        streamed = list(cascade.extract_stream(self.datasheet, self.definitions))
+        assert [(p.definition.id, p.value) for p in streamed] == [("p3", [5, 10]), ("p1", "one")]
+        second.extract_stream.assert_called_once()
+        assert second.extract_stream.call_args.args[1] == self.definitions
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("12345678") == 2
+    assert estimate_tokens("12345678", "unknown-model") == 2
+    assert estimate_message_tokens([{"role": "user", "content": "12345678"}]) == 2 + MESSAGE_OVERHEAD_TOKENS
+
+
+@pytest.mark.parametrize("error", [KeyError("unknown-model"), ConnectionError("offline")])
+def test_estimate_tokens_tiktoken(error):
+    fake_tiktoken = MagicMock()
+    fake_tiktoken.encoding_for_model.return_value.encode.side_effect = lambda text, disallowed_special: text.split()
+    tokens._encoding.cache_clear()
+    with patch.object(tokens, "tiktoken", fake_tiktoken):
+        assert estimate_tokens("a b c", "gpt-test") == 3
+        fake_tiktoken.encoding_for_model.side_effect = error
+        assert estimate_tokens("12345678", "failing-model") == 2
+        assert estimate_tokens("12345678", "failing-model") == 2
+    tokens._encoding.cache_clear()
+    assert fake_tiktoken.encoding_for_model.call_count == 2
@@ -0,0 +1,193 @@
+import logging
+import urllib.request
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from pdf2aas import PDF2AAS
+from pdf2aas.cache import MemoryCache
+from pdf2aas.extractor import CustomLLMClient, PropertyCascade, PropertyLLMSearch, PropertyRegex
+from pdf2aas.metrics import LoggingSink, MetricsSink, PrometheusSink, record_llm_usage, span
+from pdf2aas.model import PropertyDefinition
+
+
+class RecordingSink(MetricsSink):
+    def __init__(self):
+        self.spans = []
+        self.counts = []
+
+    def record_span(self, name, seconds, attributes):
+        self.spans.append((name, seconds, dict(attributes)))
+
+    def record_count(self, name, value, attributes):
+        self.counts.append((name, value, dict(attributes)))
+
+
+class UsageLLMClient(CustomLLMClient):
+    def create_completions(self, messages, model, temperature, max_tokens, response_format):
+        return (
+            '[{"property": "property0", "value": 1, "unit": null, "reference": "1"}]',
+            {
+                "usage": {
+                    "prompt_tokens": 100,
+                    "completion_tokens": 20,
+                    "prompt_tokens_details": {"cached_tokens": 64},
+                },
+            },
+        )
+
+
+class TestSpan:
+    @staticmethod
+    def test_records_duration_and_attributes():
+        sink = RecordingSink()
+        with span(sink, "extract", filepath="a.pdf") as attributes:
+            attributes["properties"] = 3
+        assert len(sink.spans) == 1
+        name, seconds, attributes = sink.spans[0]
+        assert name == "extract"
+        assert seconds >= 0
+        assert attributes == {"filepath": "a.pdf", "properties": 3}
+
+    @staticmethod
+    def test_records_error():
+        sink = RecordingSink()
+        with pytest.raises(ValueError), span(sink, "parse"):
+            raise ValueError
+        assert sink.spans[0][2] == {"error": "ValueError"}
+
+    @staticmethod
+    def test_without_sink():
+        with span(None, "parse") as attributes:
+            attributes["properties"] = 1
+
+    @staticmethod
+    def test_record_llm_usage():
+        sink = RecordingSink()
+        record_llm_usage(sink, UsageLLMClient().create_completions([], "m", 0, 0, {})[1], {})
+        record_llm_usage(sink, "no usage", {})
+        assert [(name, value) for name, value, _ in sink.counts] == [
+            ("llm_prompt_tokens", 100),
+            ("llm_completion_tokens", 20),
+            ("llm_cached_tokens", 64),
+        ]
+
+
+class TestPrometheusSink:
+    @staticmethod
+    def test_render():
+        sink = PrometheusSink()
+        sink.record_span("llm_request", 0.5, {"model": "gpt", "filepath": "a.pdf"})
+        sink.record_span("llm_request", 1.5, {"model": "gpt"})
+        sink.record_count("llm_prompt_tokens", 100, {"model": 'my "model"'})
+        assert sink.render() == (
+            "# HELP pdf2aas_span_seconds Duration of the toolchain steps in seconds.\n"
+            "# TYPE pdf2aas_span_seconds summary\n"
+            'pdf2aas_span_seconds_sum{span="llm_request",model="gpt"} 2.0\n'
+            'pdf2aas_span_seconds_count{span="llm_request",model="gpt"} 2\n'
+            "# TYPE pdf2aas_llm_prompt_tokens_total counter\n"
+            'pdf2aas_llm_prompt_tokens_total{model="my \\"model\\""} 100\n'
+        )
+        sink.clear()
+        assert sink.render() == ""
+
+    @staticmethod
+    def test_write_and_serve(tmp_path):
+        sink = PrometheusSink()
+        sink.record_count("llm_cache_hits", 1, {})
+        path = tmp_path / "metrics" / "pdf2aas.prom"
+        sink.write(str(path))
+        assert path.read_text() == sink.render()
+        assert path.stat().st_mode & 0o777 == 0o644
+        assert list(path.parent.iterdir()) == [path]
+
+        server = sink.serve(port=0)
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{server.server_port}/metrics") as response:
+                assert response.read().decode() == sink.render()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+    @staticmethod
+    def test_write_failure_removes_temp_file(tmp_path):
+        path = tmp_path / "pdf2aas.prom"
+        with patch.object(Path, "replace", side_effect=OSError("replace failed")), pytest.raises(OSError):
+            PrometheusSink().write(str(path))
+        assert list(tmp_path.iterdir()) == []
+
+
+def test_logging_sink(caplog):
+    with caplog.at_level(logging.INFO, logger="pdf2aas.metrics"):
+        LoggingSink().record_span("extract", 1.0, {"properties": 2})
+    assert "Span extract took 1.000s {'properties': 2}" in caplog.text
+
+
+class TestInstrumentation:
+    @staticmethod
+    def test_property_llm():
+        sink = RecordingSink()
+        llm = PropertyLLMSearch("test", client=UsageLLMClient())
+        llm.metrics = sink
+        llm.cache = MemoryCache()
+        definition = PropertyDefinition("p0", {"en": "property0"})
+        for _ in range(2):
+            llm.extract("datasheet", [definition])
+        assert [name for name, _, _ in sink.spans] == [
+            "prompt_build", "llm_request", "parse", "prompt_build", "parse",
+        ]
+        assert {attributes["model"] for _, _, attributes in sink.spans} == {"test"}
+        assert [(name, value) for name, value, _ in sink.counts] == [
+            ("llm_prompt_tokens", 100),
+            ("llm_completion_tokens", 20),
+            ("llm_cached_tokens", 64),
+            ("llm_cache_hits", 1),
+        ]
+
+    @staticmethod
+    def test_convert(tmp_path):
+        datasheet = tmp_path / "datasheet.txt"
+        datasheet.write_text("property0: 1")
+        sink = PrometheusSink()
+        pdf2aas = PDF2AAS(
+            dictionary=None,
+            extractor=PropertyLLMSearch("test", client=UsageLLMClient()),
+            metrics=sink,
+        )
+        pdf2aas.definitions = lambda classification: [PropertyDefinition("p0", {"en": "property0"})]
+        pdf2aas.convert(str(datasheet), "class")
+        assert pdf2aas.extractor.metrics is sink
+        rendered = sink.render()
+        for name in ("convert", "preprocess", "extract", "generate", "llm_request", "parse"):
+            assert f'pdf2aas_span_seconds_count{{span="{name}"' in rendered
+        assert 'pdf2aas_llm_prompt_tokens_total{model="test"} 100' in rendered
+
+    @staticmethod
+    def test_convert_composed_extractors(tmp_path):
+        datasheet = tmp_path / "datasheet.txt"
+        datasheet.write_text("property0: 1")
+        sink = PrometheusSink()
+        own_sink = RecordingSink()
+        strong = PropertyLLMSearch("strong", client=UsageLLMClient())
+        pdf2aas = PDF2AAS(
+            dictionary=None,
+            extractor=PropertyCascade(
+                PropertyLLMSearch("cheap", client=UsageLLMClient()),
+                PropertyRegex(fallback=strong),
+            ),
+            metrics=sink,
+        )
+        pdf2aas.definitions = lambda classification: [
+            PropertyDefinition("p0", {"en": "property0"}),
+            PropertyDefinition("p1", {"en": "property1"}),
+        ]
+        pdf2aas.convert(str(datasheet), "class")
+        rendered = sink.render()
+        assert 'pdf2aas_llm_prompt_tokens_total{model="cheap"} 100' in rendered
+        assert 'pdf2aas_llm_prompt_tokens_total{model="strong"} 100' in rendered
+
+        strong.metrics = own_sink
+        pdf2aas.extractor.set_metrics(sink, overwrite=False)
+        assert strong.metrics is own_sink
@@ -1,6 +1,32 @@
+import subprocess
 import sys
+from pathlib import Path
 import pytest
-from pdf2aas.preprocessor import PDF2HTMLEX, ReductionLevel, PDFium, Text
+import pypdfium2 as pdfium
+from unittest.mock import patch, MagicMock
+from pdf2aas.preprocessor import PDF2HTMLEX, ReductionLevel, PDFium, PDFPlumber, PDFPlumberTable, Text
+from pdf2aas.preprocessor.core import page_indices
+
+def create_multi_page_pdf(filepath, pages=9):
+    with pdfium.PdfDocument("tests/assets/dummy-test-datasheet.pdf") as source:
+        doc = pdfium.PdfDocument.new()
+        doc.import_pages(source, [0] * pages)
+        doc.save(filepath)
+        doc.close()
+
+def test_settings():
+    assert PDFium(max_workers=4, pages=range(1, 3)).settings() == {"pages": [1, 2]}
+    assert PDF2HTMLEX(temp_dir="/dev/shm", timeout=10).settings() == {"reduction_level": 0, "pages": None}
+    preprocessor = Text("utf-8")
+    preprocessor.client = object()
+    preprocessor.options = {"errors": ("strict",)}
+    assert preprocessor.settings() == {"encoding": "utf-8", "newline": None, "options": {"errors": ["strict"]}}
+
+def test_page_indices():
+    assert page_indices(None, 3) == [0, 1, 2]
+    assert page_indices([3, 1, 1], 3) == [0, 2]
+    assert page_indices(range(2, 10), 3) == [1, 2]
+    assert page_indices([0], 3) == []
 
 @pytest.mark.skipif(not PDF2HTMLEX().is_installed(), reason="pdf2htmlEx not installed.")
 class TestPDF2HTMLEX:
@@ -41,6 +67,149 @@ class TestPDFium:
         text_converted = self.preprocessor.convert(f"{self.datasheet_prefix}.pdf")
         assert "\n".join(text_converted) == self.dummy_datasheet_txt()
 
+    def test_convert_parallel(self, tmp_path):
+        filepath = str(tmp_path / "multi-page.pdf")
+        create_multi_page_pdf(filepath)
+        text_converted = PDFium(max_workers=2, min_parallel_pages=2).convert(filepath)
+        assert text_converted == [self.dummy_datasheet_txt()] * 9
+        assert text_converted == self.preprocessor.convert(filepath)
+
+    @pytest.mark.parametrize("max_workers", [1, 2])
+    def test_pages(self, tmp_path, max_workers):
+        filepath = str(tmp_path / "multi-page.pdf")
+        create_multi_page_pdf(filepath, 3)
+        preprocessor = PDFium(max_workers=max_workers, pages=(page for page in [1, 3]), min_parallel_pages=2)
+        assert len(preprocessor.convert(filepath)) == 2
+        pages = preprocessor.iter_pages(filepath)
+        assert next(pages) == self.dummy_datasheet_txt()
+        assert list(pages) == [self.dummy_datasheet_txt()]
+
+    def test_iter_pages_missing_file(self):
+        assert list(self.preprocessor.iter_pages("missing.pdf")) == []
+
+    def test_few_pages_sequential(self, tmp_path):
+        filepath = str(tmp_path / "multi-page.pdf")
+        create_multi_page_pdf(filepath, 3)
+        with patch("pdf2aas.preprocessor.pdf.pdfium2.ProcessPoolExecutor") as executor:
+            assert len(PDFium(max_workers=2).convert(filepath)) == 3
+        executor.assert_not_called()
+
+class TestPDFPlumber:
+    def test_pages(self, tmp_path):
+        filepath = str(tmp_path / "multi-page.pdf")
+        create_multi_page_pdf(filepath, 3)
+        pages = PDFPlumber().convert(filepath)
+        assert len(pages) == 3
+        assert pages[0].startswith("Dummy Test Datasheet")
+        preprocessor = PDFPlumber(pages=(page for page in [2, 3]))
+        assert list(preprocessor.iter_pages(filepath)) == pages[1:]
+        assert preprocessor.convert(filepath) == pages[1:]
+
+    def test_tables(self, tmp_path):
+        filepath = str(tmp_path / "multi-page.pdf")
+        create_multi_page_pdf(filepath, 3)
+        tables = PDFPlumberTable(output_format="tsv").convert(filepath)
+        assert tables == ["A11\tA12\nA21\tA22"] * 3
+        assert list(PDFPlumberTable(output_format="tsv", pages=[2]).iter_pages(filepath)) == tables[:1]
+
+class TestPDF2HTMLEXReduce:
+    datasheet_prefix = "tests/assets/dummy-test-datasheet"
+
+    @pytest.mark.parametrize("reduction_level", list(ReductionLevel))
+    def test_reduce_without_pdf2htmlex(self, reduction_level):
+        with open(f"{self.datasheet_prefix}.html") as html_file:
+            html = html_file.read()
+        html_reduced = PDF2HTMLEX().reduce_datasheet(html, reduction_level)
+        if reduction_level >= ReductionLevel.PAGES:
+            html_reduced = "\n".join(html_reduced)
+        with open(
+            f"{self.datasheet_prefix}_{reduction_level.value}_{reduction_level.name}.html"
+        ) as html_file:
+            assert html_reduced == html_file.read()
+
+    @pytest.mark.parametrize("reduction_level", list(ReductionLevel))
+    def test_reduce_file(self, reduction_level):
+        html_path = Path(f"{self.datasheet_prefix}.html")
+        preprocessor = PDF2HTMLEX(reduction_level)
+        assert preprocessor._reduce_file(html_path) == preprocessor.reduce_datasheet(
+            html_path.read_text()
+        )
+
+    @staticmethod
+    def test_reduce_missing_body(tmp_path):
+        html_path = tmp_path / "datasheet.html"
+        html_path.write_text('<html>\n<body>\n<div id="pf1">page</div>\n')
+        preprocessor = PDF2HTMLEX(ReductionLevel.TEXT)
+        assert preprocessor.reduce_datasheet(html_path.read_text()) == ""
+        assert preprocessor._reduce_file(html_path) == ""
+
+class TestPDF2HTMLEXPages:
+    @staticmethod
+    def html(pages):
+        return "<html>\n<body>\n" + "\n".join(f'<div id="pf{p}">page {p}</div>' for p in pages) + "\n</body>\n</html>"
+
+    @classmethod
+    def fake_pdf2htmlex(cls, args, **kwargs):
+        """Write the html of the selected pages to the unique dest dir."""
+        first_page = int(args[args.index("--first-page") + 1]) if "--first-page" in args else 1
+        last_page = int(args[args.index("--last-page") + 1]) if "--last-page" in args else 3
+        dest_dir = Path(args[args.index("--dest-dir") + 1])
+        (dest_dir / (Path(args[-1]).stem + ".html")).write_text(
+            cls.html(range(first_page, last_page + 1)).replace("page", Path(args[-1]).parent.name)
+        )
+        return MagicMock(returncode=0, stdout="", stderr="")
+
+    def test_convert_pages(self, tmp_path):
+        preprocessor = PDF2HTMLEX(ReductionLevel.PAGES, str(tmp_path), pages=[4, 2])
+        with patch("subprocess.run", side_effect=self.fake_pdf2htmlex) as run:
+            pages = preprocessor.convert("datasheet.pdf")
+        args = run.call_args.args[0]
+        assert args[args.index("--first-page") + 1] == "2"
+        assert args[args.index("--last-page") + 1] == "4"
+        assert pages == ['<div id="pf2"> 2</div>', '<div id="pf4"> 4</div>']
+        assert list(tmp_path.iterdir()) == []
+
+    def test_iter_pages(self, tmp_path):
+        preprocessor = PDF2HTMLEX(ReductionLevel.TEXT, str(tmp_path), pages=[4, 2])
+        with patch("subprocess.run", side_effect=self.fake_pdf2htmlex) as run:
+            pages = preprocessor.iter_pages("datasheet.pdf")
+            assert next(pages) == " 2"
+            assert list(pages) == [" 4"]
+            assert list(PDF2HTMLEX(ReductionLevel.TEXT, str(tmp_path)).iter_pages("datasheet.pdf")) == [
+                " 1", " 2", " 3",
+            ]
+        assert run.call_count == 2
+        assert list(tmp_path.iterdir()) == []
+
+    def test_convert_many(self, tmp_path):
+        temp_dir = tmp_path / "html"
+        preprocessor = PDF2HTMLEX(ReductionLevel.TEXT, str(temp_dir))
+        filepaths = [f"{folder}/datasheet.pdf" for folder in ("a", "b", "c", "d")]
+        with patch("subprocess.run", side_effect=self.fake_pdf2htmlex) as run:
+            results = preprocessor.convert_many(filepaths, max_workers=2)
+        assert results == [[f"{folder} {p}" for p in range(1, 4)] for folder in "abcd"]
+        dest_dirs = {call.args[0][call.args[0].index("--dest-dir") + 1] for call in run.call_args_list}
+        assert len(dest_dirs) == len(filepaths)
+        assert list(temp_dir.iterdir()) == []
+
+    @staticmethod
+    def test_convert_keep_temp_files(tmp_path):
+        preprocessor = PDF2HTMLEX(ReductionLevel.TEXT, str(tmp_path), cleanup=False)
+        with patch("subprocess.run", side_effect=TestPDF2HTMLEXPages.fake_pdf2htmlex):
+            preprocessor.convert("a/datasheet.pdf")
+            preprocessor.convert("b/datasheet.pdf")
+        assert len(list(tmp_path.glob("datasheet_*/datasheet.html"))) == 2
+
+    @staticmethod
+    def test_convert_timeout(tmp_path):
+        preprocessor = PDF2HTMLEX(ReductionLevel.TEXT, str(tmp_path), timeout=0.5)
+        with patch(
+            "subprocess.run", side_effect=subprocess.TimeoutExpired("pdf2htmlEX", 0.5)
+        ) as run:
+            assert preprocessor.convert("datasheet.pdf") == ""
+        assert run.call_args.kwargs["timeout"] == 0.5
+        assert list(tmp_path.iterdir()) == []
+
 class TestText:
     preprocessor = Text()
 
@@ -50,4 +219,7 @@ class TestText:
     
     def test_convert(self):
         text_converted = self.preprocessor.convert("tests/assets/dummy-test-datasheet.txt")
-        assert text_converted == self.dummy_datasheet_txt()
\ No newline at end of file
+        assert text_converted == self.dummy_datasheet_txt()
+
+    def test_iter_pages(self):
+        assert list(self.preprocessor.iter_pages("tests/assets/dummy-test-datasheet.txt")) == [self.dummy_datasheet_txt()]